@@ -15,23 +15,39 @@ import dash_core_components as dcc
 import dash_html_components as html
 import dash.dependencies as dcd
 import numpy as np
-from scipy import stats
-import plotly.graph_objs as go
 from datetime import datetime, timedelta, date
-from astropy.utils.data import download_file
-import astropy.units as u
-import sunpy
 import json
-import pandas as pd
+import hashlib
 import re
-import julian
+import copy
 import logging
 import flask
 import os
 import io
 import swpc_utils
+import swpc_session
+import swpc_jobs
+import swpc_preprocess
+import swpc_frames
+import swpc_api
+import swpc_ensemble
+import swpc_export
+import swpc_hulls
+import swpc_kinematics
+import swpc_matches
+import swpc_movie
+import swpc_persist
+import swpc_rest
 import pytz
 import time
+import functools
+from swpc_lazy import LazyModule
+
+# heavy imports are deferred to first use to keep worker start up fast
+go = LazyModule('plotly.graph_objs')
+u = LazyModule('astropy.units')
+pd = LazyModule('pandas')
+julian = LazyModule('julian')
 
 DEVMODE = True
 
@@ -41,6 +57,34 @@ log.setLevel(logging.ERROR)
 # constant for domain and grid inits
 GRID_HALF_WIDTH = 800
 
+# image array json of a window without images
+EMPTY_IMAGE_JSON = json.dumps(np.zeros(1).tolist())
+
+# milliseconds between polls of the load images jobs
+JOB_POLL_INTERVAL = 500
+
+# default frames per second of the client side movie playback
+PLAYBACK_FPS = 8
+
+# milliseconds before silhouettes answered from the precomputed lattice are redrawn exactly
+HULL_REFINE_INTERVAL = 300
+
+# cookie holding the session id of a browser, a reloaded page reopens the saved document of that session
+SESSION_COOKIE = 'swpc_cat_session'
+
+# control values kept in a session document, as (component id, property)
+PERSISTED_CONTROLS = [('date-picker', 'date'), ('date-time', 'value'), ('end-time', 'value'),
+                      ('l-image-dropdown', 'value'), ('c-image-dropdown', 'value'),
+                      ('l-image-slider', 'value'), ('c-image-slider', 'value'), ('r-image-slider', 'value'),
+                      ('radial-slider', 'value'), ('angular-slider', 'value'), ('lat-slider', 'value'),
+                      ('long-slider', 'value')] + \
+                     [(tab + '-' + slider + '-slider', 'value') for tab in 'LCR'
+                      for slider in ('stretch-top', 'stretch-bot', 'gamma', 'saturation')] + \
+                     [(tab + '-difference-mode', 'value') for tab in 'LCR']
+
+# matched frames warmed per step when a session is restored
+RESTORE_CHUNK = 8
+
 # constants of the lemniscate
 # C1 = Radial Distance
 # C2 = C1 * tan(Angular Width/2)
@@ -70,25 +114,33 @@ external_css = ['https://stackpath.bootstrapcdn.com/bootstrap/4.1.1/css/bootstra
                 'https://use.fontawesome.com/releases/v5.9.0/css/all.css']
 
 
+# app factory, builds the dash application exactly once
+# the dev server runs at the root path, deployments are served under /swpc_cat_web/
+def create_app(devmode=DEVMODE):
+    if devmode:
+        dash_app = dash.Dash(__name__,
+                             external_scripts=external_js,
+                             external_stylesheets=external_css)
+    else:
+        dash_app = dash.Dash(__name__,
+                             external_scripts=external_js,
+                             external_stylesheets=external_css,
+                             requests_pathname_prefix='/swpc_cat_web/')
 
-app = dash.Dash(__name__,
-                external_scripts=external_js,
-                external_stylesheets=external_css,
-                requests_pathname_prefix='/swpc_cat_web/')
-
-if DEVMODE:
-    app = dash.Dash(__name__,
-                external_scripts=external_js,
-                external_stylesheets=external_css)
+    # app.css.append_css({'external_url': 'https://codepen.io/chriddyp/pen/brPBPO.css'})
 
+    dash_app.title = 'SWPC_CAT'
 
+    # dev mode runs single process, so frames are preprocessed synchronously in the request thread
+    if devmode:
+        swpc_preprocess.configure(0)
 
-# app.css.append_css({'external_url': 'https://codepen.io/chriddyp/pen/brPBPO.css'})
+    return dash_app
 
-server = app.server
 
-app.title = 'SWPC_CAT'
+app = create_app()
 
+server = app.server
 
 
 
@@ -98,6 +150,159 @@ def favicon():
                                      'favicon.ico')
 
 
+# versioned JSON routes for other tools, /api/v1/...
+server.register_blueprint(swpc_rest.api)
+
+
+# reports how many 2d renders were started, completed and cancelled as stale
+@server.route('/render-stats')
+def render_stats():
+    return flask.jsonify(dict(swpc_session.render_stats))
+
+
+# reports the hits, misses and evictions of the hull cache
+@server.route('/hull-cache-stats')
+def hull_cache_stats():
+    return flask.jsonify(swpc_utils.hull_cache_info())
+
+
+# serves the cone parameter file of the last ensemble of a session
+@server.route('/ensemble/<session_id>')
+def ensemble_file(session_id):
+    ensemble = swpc_session.published(session_id, 'ensemble', 'members')
+
+    if ensemble is None:
+        flask.abort(404)
+
+    response = flask.Response(swpc_ensemble.cone_file(ensemble), mimetype='text/plain')
+    response.headers['Content-Disposition'] = 'attachment; filename=swpc_cat_ensemble.txt'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# float query argument of an export request, 400 when it is not a number or is missing without a default
+def export_arg(name, default=None):
+    if name not in flask.request.args and default is not None:
+        return default
+
+    try:
+        return float(flask.request.args[name])
+    except (KeyError, ValueError):
+        flask.abort(400)
+
+
+# streams the measurement table of a session, ?format=csv|json&lat=&long=&angular=
+# the matches are read from the session store, only the slider values travel in the link
+@server.route('/export/measurements/<session_id>')
+def export_measurements(session_id):
+    store = swpc_session.published(session_id, 'matches', 'store')
+    fmt = flask.request.args.get('format', 'csv')
+
+    if store is None or fmt not in ('csv', 'json'):
+        flask.abort(404)
+
+    fit = swpc_api.KinematicFit(swpc_kinematics.session_kinematics(session_id, store))
+    lat, long, angular = export_arg('lat'), export_arg('long'), export_arg('angular')
+    rows = (swpc_export.measurement_csv if fmt == 'csv' else swpc_export.measurement_json)(store, fit, lat, long,
+                                                                                              angular)
+
+    response = flask.Response(flask.stream_with_context(rows), mimetype='text/csv' if fmt == 'csv' else
+                              'application/json')
+    response.headers['Content-Disposition'] = 'attachment; filename=MeasurementResults{}.{}'.format(
+        datetime.utcnow().strftime('%Y%m%d_%H%M%S'), fmt)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# streams the running difference stacks of the loaded panels of a session with the lemniscate silhouette of
+# every frame as a zip archive, ?format=npz|fits&radial=&angular=&long=&lat=&l_saturation=&c_saturation=&r_saturation=
+# every stack is differenced at the saturation of its panel, the default of its instrument when none is given
+# frames are differenced and compressed one at a time as the archive is sent
+@server.route('/export/stacks/<session_id>')
+def export_stacks(session_id):
+    fmt = flask.request.args.get('format', 'npz')
+    sources = [(swpc_api.FrameSource(panel['instrument'], swpc_session.published(session_id, 'rows', panel['hidden'])
+                                     or []), export_arg(panel['tab'].lower() + '_saturation',
+                                                        swpc_api.SATURATIONS[panel['instrument']])) for panel in PANELS]
+    sources = [(source, saturation) for source, saturation in sources if len(source) > 1]
+
+    if not sources or fmt not in swpc_export.STACK_FORMATS:
+        flask.abort(404)
+
+    lemniscate = swpc_api.Lemniscate(export_arg('radial'), export_arg('angular'), export_arg('long'),
+                                     export_arg('lat'))
+    stacks = [(source.instrument, len(source) - 1, swpc_export.source_frames(source, lemniscate, saturation))
+              for source, saturation in sources]
+
+    response = flask.Response(flask.stream_with_context(swpc_export.stack_archive(stacks, fmt)),
+                              mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=DifferenceStacks{}.{}'.format(
+        datetime.utcnow().strftime('%Y%m%d_%H%M%S'), 'npz' if fmt == 'npz' else 'zip')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# serves the uint8 difference stack of a loaded window as raw bytes for the client side movie playback
+# frames are stored bottom row first, the X-Stack-Shape header holds 'frames,height,width'
+# the ETag names the links and saturation of the stack, a player holding that stack already gets a 304 back
+@server.route('/difference-stack/<session_id>/<hidden_id>')
+def difference_stack(session_id, hidden_id):
+    stack = swpc_session.published(session_id, 'stacks', hidden_id)
+
+    if stack is None:
+        flask.abort(404)
+
+    version = hashlib.sha1(json.dumps([list(stack['links']), stack['sat']]).encode()).hexdigest()
+
+    if flask.request.if_none_match.contains(version):
+        response = flask.Response(status=304)
+    else:
+        response = flask.Response(stack['frames'].tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Stack-Shape'] = ','.join(str(size) for size in stack['frames'].shape)
+
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# serves a rendered movie from the movie cache, keys are the hex digests of swpc_movie.movie_key
+@server.route('/movie/<key>/<fmt>')
+def movie_file(key, fmt):
+    if fmt not in swpc_movie.MOVIE_FORMATS or not re.match('^[0-9a-f]{64}$', key):
+        flask.abort(404)
+
+    path = swpc_movie.cached_movie(key, fmt)
+
+    if path is None:
+        flask.abort(404)
+
+    return flask.send_file(path, mimetype=swpc_movie.MOVIE_FORMATS[fmt][1], as_attachment=True,
+                           attachment_filename='swpc_cat_movie.' + swpc_movie.MOVIE_FORMATS[fmt][0])
+
+
+# keeps the session of a browser in its cookie
+def session_cookie(response, session_id):
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=int(swpc_persist.SESSION_TTL), httponly=True,
+                        samesite='Lax')
+    return response
+
+
+# opens a saved session, e.g. from the share link of another operator, in this browser
+# /session/new starts a new one instead
+@server.route('/session/<session_id>')
+def open_session(session_id):
+    response = flask.redirect(app.config.requests_pathname_prefix)
+
+    if session_id == 'new':
+        response.delete_cookie(SESSION_COOKIE)
+        return response
+
+    if not re.match('^[0-9a-f]{32}$', session_id) or swpc_persist.load(session_id) is None:
+        flask.abort(404)
+
+    return session_cookie(response, session_id)
+
+
 
 
 # app.config.suppress_callback_exceptions = True
@@ -105,1339 +310,1479 @@ def favicon():
 # --------------------------------------------------------------<html section>----------------------------------
 # layout for dash application
 
-app.layout = html.Div([
-    # -----------<Nav-Bar>----------
-    html.Nav(className='navbar navbar-expand-lg navbar-dark bg-dark',
-             children=[
-                 html.Button(className='navbar-toggler', type='button',
-                             **{'data-toggle': 'collapse', 'data-target': '#navbarTogglerSection',
-                                'aria-controls': 'navbarTogglerSection', 'aria-expanded': 'false',
-                                'aria-label': 'Toggle navigation'},
-                             children=[html.Span(className='navbar-toggler-icon')]),
-                 html.Span(className="navbar-brand",
-                           children=[
-                               html.Img(src='/assets/SWPC_CAT.png',
-                                        width='50', height='50', className='d-inline', style={'margin-right': '10px'}),
-                               'SWPC_CAT']),
-                 html.Div(className='collapse navbar-collapse', id='navbarTogglerSection',
-                          children=[
-                              html.Ul(className='navbar-nav mr-auto mt-2 mt-lg-0',
-                                      children=[
-                                          html.Li(className='nav-item',
-                                                  children=[
-                                                      html.A(className='nav-link active', href='#',
-                                                             children=[html.H5(children=['Home']),
-                                                                       html.Span(className='sr-only',
-                                                                                 children=['(current)'])])]),
-                                          html.Li(className='nav-item',
-                                                  children=[
-                                                      html.A(className='nav-link',
-                                                             href='https://ccmc.gsfc.nasa.gov/swpc_cat_web/',
-                                                             children=[html.H5(children=['About'])])]),
-                                          html.Li(className='nav-item',
-                                                  children=[
-                                                      html.A(className='nav-link', href='https://ccmc.gsfc.nasa.gov/',
-                                                             children=[html.H5(children=['CCMC'])])]),
-                                          html.Li(className='nav-item',
-                                                  children=[
-                                                      html.A(className='nav-link',
-                                                             href='https://www.nasa.gov/centers/goddard/home/index.html',
-                                                             children=[html.H5(children=['NASA'])])]),
-                                      ]),
-                              html.H5(className='navbar-text text-white  mr-sm-2',
-                                      children=['Select Start Date and Time:']),
-                              dcc.DatePickerSingle(
-                                  placeholder='YYYY-MM-DD',
-                                  date=datetime.now(tz=pytz.UTC).date(),
-                                  min_date_allowed=datetime(2007, 1, 1),
-                                  #max_date_allowed=datetime.now(tz=pytz.UTC).date(),
-                                  display_format='YYYY-MM-DD',
-                                  id='date-picker',
-                                  className='mr-sm-2'),
-
-                              html.Div(className='mr-sm-2',
-                                       children=[
-                                           dcc.Input(type='text',
-                                                     placeholder="HH:MM",
-                                                     style={'width': '80px'},
-                                                     className='form-control',
-                                                     value='00:00',
-                                                     pattern=u"^(2[0-3]|[01]?[0-9]):([0-5]?[0-9])$",
-                                                     id='date-time')
-                                       ]),
-
-                              dcc.RadioItems(
-                                  id='end-time',
-                                  inputStyle={"margin-left": "5px"},
-                                  className='text-white',
-                                  labelStyle={'display': 'inline-block'},
-                                  options=[
-                                      {'label': '+6 hrs ', 'value': 6},
-                                      {'label': '+12 hrs ', 'value': 12},
-                                      {'label': '+24 hrs ', 'value': 24}
-                                  ],
-                                  value=6
-                              ),
-
-                              html.Button(
-                                  style={'margin-right': '5px',
-                                         'margin-left': '5px'},
-                                  **{'data-toggle': 'tooltip',
-                                     'data-placement': 'bottom',
-                                     'title': 'Loads two days of images, if available, starting from the selected date'},
-                                  id='btn-load-images',
-                                  type='button',
-                                  className='btn btn-primary btn-md',
-                                  n_clicks_timestamp=0,
-                                  children=['Load Images'])
-
-                          ])
-
-             ]),
-    # -----------</Nav-Bar>----------
-
-    # -----------<Plot-Section>----------
-    html.Div(className='container-fluid',
-             children=[html.Div(className='row',
-                                children=[
-                                    html.Div(className='col card bg-dark text-center',
-                                             id='STEREO-B',
-                                             children=[
-                                                 html.Div(className='card-header row',
-                                                          children=[
-                                                              html.Button(
-                                                                  id='left_move_btn_l',
-                                                                  style={'margin-left': '20px'},
-                                                                  type='button',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  n_clicks_timestamp=0,
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-left')
-                                                                  ]),
-                                                              html.Div(className='col',
-                                                                       children=[
-                                                                           dcc.Dropdown(
-                                                                               id='l-image-dropdown',
-                                                                               options=[
-                                                                                   {'label': 'STEREO B COR2 - Running difference',
-                                                                                    'value': 'Norm'}
-                                                                               ],
-                                                                               value='Norm',
-                                                                               searchable=False,
-                                                                               clearable=False
-                                                                           )]),
-                                                              html.Button(
-                                                                  id='right_move_btn_l',
-                                                                  style={'margin-right': '20px'},
-                                                                  type='button',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  n_clicks_timestamp=0,
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-right')
-                                                                  ]),
-                                                              html.Button(
-                                                                  id='time_import_btn_l',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  type='button',
-                                                                  title='Sync other spacecraft to this timestamp',
-                                                                  n_clicks_timestamp=0,
-                                                                  style={'margin-right': '20px'},
-                                                                  children=[
-                                                                      html.Img(src='assets/clock.png', height=24, width=24)
-                                                                  ])]),
-
-                                                 html.Div(id='l-image-text',
-                                                          style={'color': 'white',
-                                                                 'font-size': 'x-large'}),
-                                                 html.Div(className='row',
-                                                          children=[
-                                                              dcc.Slider(
-                                                                  className='col',
-                                                                  id='l-image-slider',
-                                                                  min=1,
-                                                                  max=1,
-                                                                  value=1,
-                                                                  step=1,
-                                                                  updatemode='mouseup'),
-                                                              html.Div(className='text-center',
-                                                                       children=[
-                                                                           html.Div(
-                                                                               className='btn-group btn-group-sm',
-                                                                               role='group',
-                                                                               **{
-                                                                                   'aria-label': 'button-group-r'},
-                                                                               children=[
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='l-btn-match',
-                                                                                       type='button',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Match Image']),
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='unmatch-btn-l',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       type='button',
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Unmatch Image']),
-                                                                               ])
-                                                                       ]),
-
-
-                                                          ]),
-                                                 html.Div(
-                                                     style={'margin': 'auto'},
-                                                     children=[
-                                                         dcc.Loading(type='circle',
-                                                                     children=[
-                                                                         dcc.Graph(id='2d-l-lemniscate',
-                                                                                   config={
-                                                                                       'modeBarButtonsToRemove': [
-                                                                                           'sendDataToCloud',
-                                                                                           'zoom2d', 'pan2d',
-                                                                                           'select2d',
-                                                                                           'lasso2d', 'zoomIn2d',
-                                                                                           'zoomOut2d',
-                                                                                           'hoverCompareCartesian',
-                                                                                           'hoverClosestCartesian',
-                                                                                           'toggleSpikelines'],
-                                                                                       'displaylogo': False})]),
-                                                     ]),
-
-
-                                                 html.Br()
-                                             ]),
-                                    html.Div(className='col card bg-dark text-center',
-                                             id='SOHO',
-                                             children=[
-                                                 html.Div(className='card-header row',
-                                                          children=[
-                                                              html.Button(
-                                                                  id='left_move_btn_c',
-                                                                  style={'margin-left': '20px'},
-                                                                  type='button',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  n_clicks_timestamp=0,
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-left')
-                                                                  ]),
-                                                              html.Div(className='col',
-                                                                       children=[
-                                                                           dcc.Dropdown(
-                                                                               id='c-image-dropdown',
-                                                                               options=[
-                                                                                   {
-                                                                                       'label': 'SOHO LASCO C2 - Running difference',
-                                                                                       'value': 'C2'},
-                                                                                   {
-                                                                                       'label': 'SOHO LASCO C3 - Running difference',
-                                                                                       'value': 'C3'},
-                                                                               ],
-                                                                               value='C3',
-                                                                               searchable=False,
-                                                                               clearable=False
-                                                                           )]),
-                                                              html.Button(
-                                                                  id='right_move_btn_c',
-                                                                  style={'margin-right': '20px'},
-                                                                  type='button',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  n_clicks_timestamp=0,
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-right')
-                                                                  ]),
-                                                              html.Button(
-                                                                  id='time_import_btn_c',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  type='button',
-                                                                  title='Sync other spacecraft to this timestamp',
-                                                                  n_clicks_timestamp=0,
-                                                                  style={'margin-right': '20px'},
-                                                                  children=[
-                                                                      html.Img(src='assets/clock.png', height=24,
-                                                                               width=24)
-                                                                  ]
-                                                              )
-                                                          ]),
-                                                 html.Div(id='c-image-text',
-                                                          style={'color': 'white',
-                                                                 'font-size': 'x-large'}),
-                                                 html.Div(className='row',
-                                                          children=[
-                                                              dcc.Slider(
-                                                                  className='col',
-                                                                  id='c-image-slider',
-                                                                  min=1,
-                                                                  max=1,
-                                                                  value=1,
-                                                                  step=1,
-                                                                  updatemode='mouseup'),
-                                                              html.Div(className='text-center',
-                                                                       children=[
-                                                                           html.Div(
-                                                                               className='btn-group btn-group-sm',
-                                                                               role='group',
-                                                                               **{
-                                                                                   'aria-label': 'button-group-r'},
-                                                                               children=[
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='c-btn-match',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       type='button',
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Match Image']),
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='unmatch-btn-c',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       type='button',
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Unmatch Image']),
-                                                                               ])
-                                                                       ]),
-
-                                                          ]),
-                                                 html.Div(
-                                                     style={'margin': 'auto'},
-                                                     children=[
-                                                         dcc.Loading(type='circle',
-                                                                     children=[
-                                                                         dcc.Graph(id='2d-c-lemniscate',
-                                                                                   config={
-                                                                                       'modeBarButtonsToRemove': ['sendDataToCloud',
-                                                                                                                  'zoom2d', 'pan2d',
-                                                                                                                  'select2d',
-                                                                                                                  'lasso2d', 'zoomIn2d',
-                                                                                                                  'zoomOut2d',
-                                                                                                                  'hoverCompareCartesian',
-                                                                                                                  'hoverClosestCartesian',
-                                                                                                                  'toggleSpikelines'],
-                                                                                       'displaylogo':False})]),
-                                                     ]),
-
-                                                 html.Br()
-                                             ]),
-                                    html.Div(className='col card bg-dark text-center',
-                                             id='STEREO-A',
-                                             children=[
-                                                 html.Div(className='card-header row',
-                                                          children=[
-                                                              html.Button(
-                                                                  id='left_move_btn_r',
-                                                                  style={'margin-left': '20px'},
-                                                                  type='button',
-                                                                  n_clicks_timestamp=0,
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-left')
-                                                                  ]),
-                                                              html.Div(className='col',
-                                                                       children=[
-                                                                           dcc.Dropdown(
-                                                                               id='r-image-dropdown',
-                                                                               options=[
-                                                                                   {
-                                                                                       'label': 'STEREO A COR2 - Running difference',
-                                                                                       'value': 'Norm'}],
-                                                                               value='Norm',
-                                                                               searchable=False,
-                                                                               clearable=False
-                                                                           )]),
-                                                              html.Button(
-                                                                  id='right_move_btn_r',
-                                                                  type='button',
-                                                                  style={'margin-right': '20px'},
-                                                                  n_clicks_timestamp=0,
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  children=[
-                                                                      html.Span(className='fas fa-arrow-right')
-                                                                  ]),
-                                                              html.Button(
-                                                                  id='time_import_btn_r',
-                                                                  className='btn btn-primary col-sm-1',
-                                                                  type='button',
-                                                                  title='Sync other spacecraft to this timestamp',
-                                                                  n_clicks_timestamp=0,
-                                                                  style={'margin-right': '20px'},
-                                                                  children=[
-                                                                      html.Img(src='assets/clock.png', height=24, width=24)
-                                                                  ])]),
-
-                                                 html.Div(id='r-image-text',
-                                                          style={'color': 'white',
-                                                                 'font-size': 'x-large'}),
-
-                                                 html.Div(className='row',
-                                                          children=[
-                                                              dcc.Slider(
-                                                                  className='col',
-                                                                  id='r-image-slider',
-                                                                  min=1,
-                                                                  max=1,
-                                                                  value=1,
-                                                                  step=1,
-                                                                  updatemode='mouseup'),
-                                                              html.Div(className='text-center',
-                                                                       children=[
-                                                                           html.Div(
-                                                                               className='btn-group btn-group-sm',
-                                                                               role='group',
-                                                                               **{
-                                                                                   'aria-label': 'button-group-r'},
-                                                                               children=[
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='r-btn-match',
-                                                                                       type='button',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Match Image']),
-                                                                                   html.Button(
-                                                                                       style={'margin-right': '20px'},
-                                                                                       id='unmatch-btn-r',
-                                                                                       n_clicks_timestamp=0,
-                                                                                       type='button',
-                                                                                       className='btn btn-primary btn-lg btn-block',
-                                                                                       children=['Unmatch Image']),
-                                                                               ])
-                                                                       ]),
-
-
-                                                          ]),
-                                                 html.Div(
-                                                     style={'margin': 'auto'},
-                                                     children=[
-                                                         dcc.Loading(type='circle',
-                                                                     children=[
-                                                                         dcc.Graph(id='2d-r-lemniscate',
-                                                                                   config={
-                                                                                       'modeBarButtonsToRemove': [
-                                                                                           'sendDataToCloud',
-                                                                                           'zoom2d', 'pan2d',
-                                                                                           'select2d',
-                                                                                           'lasso2d', 'zoomIn2d',
-                                                                                           'zoomOut2d',
-                                                                                           'hoverCompareCartesian',
-                                                                                           'hoverClosestCartesian',
-                                                                                           'toggleSpikelines'],
-                                                                                       'displaylogo': False})]),
-                                                     ]),
-
-
-
-                                                 html.Br()
-
-                                             ])
-                                ])
-
-                       ]),
-    # -----------</Plot-Section>----------
-
-    html.Div(className='container-fluid',
-             children=[
-                 html.Div(className="row",
-                          children=[
-                              # -----------<IMG-Controls----------
-                              html.Div(className='card col-xl-3 bg-light',
-                                       style={'display': 'block'},
-                                       children=[
-                                           html.Div(className='card-header text-center font-weight-bold',
-                                                    style={'text-align': 'left',
-                                                           'font-size': 'x-large'},
-                                                    children=['IMG-CONTROLS',
-                                                              html.Ul(
-                                                                  className='nav nav-pills nav-fill card-header-pills',
-                                                                  children=[
-                                                                      html.Li(className='nav-item',
-                                                                              children=[
-                                                                                  html.A(className='nav-link active',
-                                                                                         **{'data-toggle': 'tab'},
-                                                                                         href='#L-tab',
-                                                                                         children=['STEREO B'])
-                                                                              ]),
-                                                                      html.Li(className='nav-item',
-                                                                              children=[html.A(className='nav-link',
-                                                                                               **{'data-toggle': 'tab'},
-                                                                                               href='#C-tab',
-                                                                                               children=['SOHO'])
-                                                                                        ]),
-                                                                      html.Li(className='nav-item',
-                                                                              children=[html.A(className='nav-link',
-                                                                                               **{'data-toggle': 'tab'},
-                                                                                               href='#R-tab',
-                                                                                               children=['STEREO A'])
-                                                                                        ])
-                                                                  ])
-                                                              ]),
+# movie playback controls of one 2d panel, the canvas stays hidden until playback starts
+def playback_controls(tab):
+    return html.Div(className='playback',
+                    children=[html.Button(id='play-btn-' + tab,
+                                          type='button',
+                                          n_clicks=0,
+                                          className='btn btn-primary',
+                                          children=['Play']),
+                              html.Div(style={'display': 'inline-block', 'width': '60%',
+                                              'vertical-align': 'middle'},
+                                       children=[dcc.Slider(id='play-speed-' + tab,
+                                                            min=1,
+                                                            max=30,
+                                                            value=PLAYBACK_FPS,
+                                                            step=1,
+                                                            marks={1: '1 fps', 10: '10', 20: '20', 30: '30 fps'})]),
+                              html.Canvas(id='play-canvas-' + tab,
+                                          className='playback-canvas',
+                                          style={'display': 'none'}),
+                              html.Button(id='movie-btn-' + tab,
+                                          type='button',
+                                          n_clicks=0,
+                                          className='btn btn-primary',
+                                          title='renders the loaded window with the silhouette as a movie file',
+                                          children=['Movie']),
+                              html.Div(style={'display': 'inline-block', 'width': '25%',
+                                              'vertical-align': 'middle'},
+                                       children=[dcc.Dropdown(id='movie-format-' + tab,
+                                                              options=[{'label': fmt.upper(), 'value': fmt}
+                                                                       for fmt in swpc_movie.movie_formats()],
+                                                              value=swpc_movie.movie_formats()[0],
+                                                              clearable=False)]),
+                              html.Span(id='movie-result-' + tab),
+                              html.Div(id='movie-job-' + tab,
+                                       style={'display': 'none'}),
+                              dcc.Interval(id='movie-interval-' + tab,
+                                           interval=JOB_POLL_INTERVAL,
+                                           disabled=True)])
+
+
+# difference mode of one 2d panel (swpc_utils.DIFFERENCE_MODES), base differences every frame of the loaded
+# window against its first frame
+def difference_mode_control(tab):
+    return html.Div(children=[html.Div('Difference',
+                                       style={'text-align': 'left', 'font-size': 'x-large'}),
+                              dcc.RadioItems(id=tab + '-difference-mode',
+                                             options=[{'label': swpc_utils.DIFFERENCE_MODE_LABELS[mode], 'value': mode}
+                                                      for mode in swpc_utils.DIFFERENCE_MODES],
+                                             value='running',
+                                             labelStyle={'display': 'inline-block', 'margin-right': '1em',
+                                                         'font-size': 'large'})])
+
+
+# builds the static part of the layout
+# built on the first page load rather than at import, then cached for every later one
+@functools.lru_cache(maxsize=None)
+def main_layout():
+    return html.Div([
+        # -----------<Nav-Bar>----------
+        html.Nav(className='navbar navbar-expand-lg navbar-dark bg-dark',
+                 children=[
+                     html.Button(className='navbar-toggler', type='button',
+                                 **{'data-toggle': 'collapse', 'data-target': '#navbarTogglerSection',
+                                    'aria-controls': 'navbarTogglerSection', 'aria-expanded': 'false',
+                                    'aria-label': 'Toggle navigation'},
+                                 children=[html.Span(className='navbar-toggler-icon')]),
+                     html.Span(className="navbar-brand",
+                               children=[
+                                   html.Img(src='/assets/SWPC_CAT.png',
+                                            width='50', height='50', className='d-inline', style={'margin-right': '10px'}),
+                                   'SWPC_CAT']),
+                     html.Div(className='collapse navbar-collapse', id='navbarTogglerSection',
+                              children=[
+                                  html.Ul(className='navbar-nav mr-auto mt-2 mt-lg-0',
+                                          children=[
+                                              html.Li(className='nav-item',
+                                                      children=[
+                                                          html.A(className='nav-link active', href='#',
+                                                                 children=[html.H5(children=['Home']),
+                                                                           html.Span(className='sr-only',
+                                                                                     children=['(current)'])])]),
+                                              html.Li(className='nav-item',
+                                                      children=[
+                                                          html.A(className='nav-link',
+                                                                 href='https://ccmc.gsfc.nasa.gov/swpc_cat_web/',
+                                                                 children=[html.H5(children=['About'])])]),
+                                              html.Li(className='nav-item',
+                                                      children=[
+                                                          html.A(className='nav-link', href='https://ccmc.gsfc.nasa.gov/',
+                                                                 children=[html.H5(children=['CCMC'])])]),
+                                              html.Li(className='nav-item',
+                                                      children=[
+                                                          html.A(className='nav-link',
+                                                                 href='https://www.nasa.gov/centers/goddard/home/index.html',
+                                                                 children=[html.H5(children=['NASA'])])]),
+                                          ]),
+                                  html.H5(className='navbar-text text-white  mr-sm-2',
+                                          children=['Select Start Date and Time:']),
+                                  dcc.DatePickerSingle(
+                                      placeholder='YYYY-MM-DD',
+                                      date=datetime.now(tz=pytz.UTC).date(),
+                                      min_date_allowed=datetime(2007, 1, 1),
+                                      #max_date_allowed=datetime.now(tz=pytz.UTC).date(),
+                                      display_format='YYYY-MM-DD',
+                                      id='date-picker',
+                                      className='mr-sm-2'),
+
+                                  html.Div(className='mr-sm-2',
+                                           children=[
+                                               dcc.Input(type='text',
+                                                         placeholder="HH:MM",
+                                                         style={'width': '80px'},
+                                                         className='form-control',
+                                                         value='00:00',
+                                                         pattern=u"^(2[0-3]|[01]?[0-9]):([0-5]?[0-9])$",
+                                                         id='date-time')
+                                           ]),
+
+                                  dcc.RadioItems(
+                                      id='end-time',
+                                      inputStyle={"margin-left": "5px"},
+                                      className='text-white',
+                                      labelStyle={'display': 'inline-block'},
+                                      options=[
+                                          {'label': '+6 hrs ', 'value': 6},
+                                          {'label': '+12 hrs ', 'value': 12},
+                                          {'label': '+24 hrs ', 'value': 24}
+                                      ],
+                                      value=6
+                                  ),
+
+                                  html.Button(
+                                      style={'margin-right': '5px',
+                                             'margin-left': '5px'},
+                                      **{'data-toggle': 'tooltip',
+                                         'data-placement': 'bottom',
+                                         'title': 'Loads two days of images, if available, starting from the selected date'},
+                                      id='btn-load-images',
+                                      type='button',
+                                      className='btn btn-primary btn-md',
+                                      n_clicks_timestamp=0,
+                                      children=['Load Images']),
+
+                                  html.Span(id='load-progress',
+                                            className='navbar-text text-white'),
+
+                                  html.Span(id='session-saved',
+                                            className='navbar-text text-white',
+                                            style={'margin-left': '20px'})
+
+                              ])
+
+                 ]),
+        # -----------</Nav-Bar>----------
+
+        # -----------<Plot-Section>----------
+        html.Div(className='container-fluid',
+                 children=[html.Div(className='row',
+                                    children=[
+                                        html.Div(className='col card bg-dark text-center',
+                                                 id='STEREO-B',
+                                                 children=[
+                                                     html.Div(className='card-header row',
+                                                              children=[
+                                                                  html.Button(
+                                                                      id='left_move_btn_l',
+                                                                      style={'margin-left': '20px'},
+                                                                      type='button',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      n_clicks_timestamp=0,
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-left')
+                                                                      ]),
+                                                                  html.Div(className='col',
+                                                                           children=[
+                                                                               dcc.Dropdown(
+                                                                                   id='l-image-dropdown',
+                                                                                   options=[
+                                                                                       {'label': 'STEREO B COR2 - Running difference',
+                                                                                        'value': 'Norm'}
+                                                                                   ],
+                                                                                   value='Norm',
+                                                                                   searchable=False,
+                                                                                   clearable=False
+                                                                               )]),
+                                                                  html.Button(
+                                                                      id='right_move_btn_l',
+                                                                      style={'margin-right': '20px'},
+                                                                      type='button',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      n_clicks_timestamp=0,
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-right')
+                                                                      ]),
+                                                                  html.Button(
+                                                                      id='time_import_btn_l',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      type='button',
+                                                                      title='Sync other spacecraft to this timestamp',
+                                                                      n_clicks_timestamp=0,
+                                                                      style={'margin-right': '20px'},
+                                                                      children=[
+                                                                          html.Img(src='assets/clock.png', height=24, width=24)
+                                                                      ])]),
+
+                                                     html.Div(id='l-image-text',
+                                                              style={'color': 'white',
+                                                                     'font-size': 'x-large'}),
+                                                     html.Div(className='row',
+                                                              children=[
+                                                                  dcc.Slider(
+                                                                      className='col',
+                                                                      id='l-image-slider',
+                                                                      min=1,
+                                                                      max=1,
+                                                                      value=1,
+                                                                      step=1,
+                                                                      updatemode='mouseup'),
+                                                                  html.Div(className='text-center',
+                                                                           children=[
+                                                                               html.Div(
+                                                                                   className='btn-group btn-group-sm',
+                                                                                   role='group',
+                                                                                   **{
+                                                                                       'aria-label': 'button-group-r'},
+                                                                                   children=[
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='l-btn-match',
+                                                                                           type='button',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Match Image']),
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='unmatch-btn-l',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           type='button',
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Unmatch Image']),
+                                                                                   ])
+                                                                           ]),
 
-                                           html.Div(className='card-body',
-                                                    children=[
-                                                        html.Div(className='tab-content',
-                                                                 children=[
-                                                                     html.Div(
-                                                                         className='tab-pane container active fade-in',
-                                                                         id='L-tab',
-                                                                         children=[
-                                                                             html.Div(id="L-stretch-top-text",
-                                                                                      style={'text-align': 'left',
-                                                                                             'font-size': 'x-large'}),
-                                                                             html.Br(),
-                                                                             dcc.Slider(
-                                                                                 id='L-stretch-top-slider',
-                                                                                 min=0,
-                                                                                 max=255,
-                                                                                 value=0,
-                                                                                 step=1,
-                                                                                 marks={0: {'label': '0', 'style': {
-                                                                                     'font-size': 'large'}},
-                                                                                        63: {'label': '63', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        127: {'label': '127', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        191: {'label': '191', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        255: {'label': '255', 'style': {
-                                                                                            'font-size': 'large'}}},
-                                                                                 updatemode='mouseup'
-                                                                             ),
-
-
-                                                                             html.Div(id="L-stretch-bot-text",
-                                                                                      style={'text-align': 'left',
-                                                                                             'font-size': 'x-large'}),
-
-                                                                             html.Br(),
-
-                                                                             dcc.Slider(
-                                                                                 id='L-stretch-bot-slider',
-                                                                                 min=0,
-                                                                                 max=255,
-                                                                                 value=255,
-                                                                                 step=1,
-                                                                                 marks={0: {'label': '0', 'style': {
-                                                                                     'font-size': 'large'}},
-                                                                                        63: {'label': '63', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        127: {'label': '127', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        191: {'label': '191', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        255: {'label': '255', 'style': {
-                                                                                            'font-size': 'large'}}},
-                                                                                 updatemode='mouseup'
-                                                                             ),
-
-                                                                             html.Div(id="L-gamma-text",
-                                                                                      style={'text-align': 'left',
-                                                                                             'font-size': 'x-large'}),
-
-                                                                             html.Br(),
-
-                                                                             dcc.Slider(
-                                                                                 id='L-gamma-slider',
-                                                                                 min=0,
-                                                                                 max=1,
-                                                                                 value=1,
-                                                                                 step=.05,
-                                                                                 marks={0: {'label': '0', 'style': {
-                                                                                     'font-size': 'large'}},
-                                                                                        0.25: {'label': '.25',
-                                                                                               'style': {
-                                                                                                   'font-size': 'large'}},
-                                                                                        .5: {'label': '.5', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        .75: {'label': '.75', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        1: {'label': '1', 'style': {
-                                                                                            'font-size': 'large'}}},
-                                                                                 updatemode='mouseup'
-                                                                             ),
-
-
-                                                                             html.Div(id='L-saturation-text',
-                                                                                      style={'text-align': 'left',
-                                                                                             'font-size': 'x-large'}),
-
-                                                                             html.Br(),
-
-                                                                             dcc.Slider(
-                                                                                 id='L-saturation-slider',
-                                                                                 min=0.1,
-                                                                                 max=5,
-                                                                                 value=.50,
-                                                                                 step=.1,
-                                                                                 marks={0: {'label': '0', 'style': {
-                                                                                     'font-size': 'large'}},
-                                                                                        1: {'label': '1', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        1.5: {'label': '1.5', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        2.5: {'label': '2.5', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        3.5: {'label': '3.5', 'style': {
-                                                                                            'font-size': 'large'}},
-                                                                                        5: {'label': '5', 'style': {
-                                                                                            'font-size': 'large'}}},
-                                                                                 updatemode='mouseup'),
-                                                                             html.Br(),
-                                                                             html.Div(className='text-center',
-                                                                                      children=[
-                                                                                          html.Button(id='L-Reset',
-                                                                                                      type='button',
-                                                                                                      className='btn btn-primary btn-lg',
-                                                                                                      children=[
-                                                                                                          'Reset'])]),
-                                                                             html.Br(),
-                                                                             # html.Div(className='text-center',
-                                                                             #          children=[
-                                                                             #              html.Div(
-                                                                             #                  className='btn-group',
-                                                                             #                  role='group',
-                                                                             #                  **{
-                                                                             #                      'aria-label': 'button-group-L'},
-                                                                             #                  children=[
-                                                                             #                      html.Button(
-                                                                             #                          id='L-copy-C',
-                                                                             #                          type='button',
-                                                                             #                          className='btn btn-primary  btn-lg',
-                                                                             #                          children=[
-                                                                             #                              'Copy C']),
-                                                                             #                      html.Button(
-                                                                             #                          id='L-copy-R',
-                                                                             #                          type='button',
-                                                                             #                          className='btn btn-primary btn-lg',
-                                                                             #                          children=[
-                                                                             #                              'Copy R'])])
-                                                                             #          ])
-                                                                         ]),
-
-                                                                     html.Div(className='tab-pane container fade-in',
-                                                                              id='C-tab',
-                                                                              children=[
-                                                                                  html.Div(id="C-stretch-top-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-                                                                                  html.Br(),
-                                                                                  dcc.Slider(
-                                                                                      id='C-stretch-top-slider',
-                                                                                      min=0,
-                                                                                      max=255,
-                                                                                      value=0,
-                                                                                      step=1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             63: {'label': '63',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             127: {'label': '127',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             191: {'label': '191',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             255: {'label': '255',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-
-                                                                                  html.Div(id="C-stretch-bot-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='C-stretch-bot-slider',
-                                                                                      min=0,
-                                                                                      max=255,
-                                                                                      value=255,
-                                                                                      step=1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             63: {'label': '63',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             127: {'label': '127',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             191: {'label': '191',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             255: {'label': '255',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-                                                                                  html.Div(id="C-gamma-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='C-gamma-slider',
-                                                                                      min=0,
-                                                                                      max=1,
-                                                                                      value=1,
-                                                                                      step=.05,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             0.25: {'label': '.25',
-                                                                                                    'style': {
-                                                                                                        'font-size': 'large'}},
-                                                                                             .5: {'label': '.5',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             .75: {'label': '.75',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             1: {'label': '1',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-
-                                                                                  html.Div(id='C-saturation-text',
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='C-saturation-slider',
-                                                                                      min=0.1,
-                                                                                      max=5,
-                                                                                      value=2,
-                                                                                      step=.1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             1: {'label': '1',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             1.5: {'label': '1.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             2.5: {'label': '2.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             3.5: {'label': '3.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             5: {'label': '5',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'),
-
-                                                                                  html.Br(),
-
-                                                                                  html.Div(
-                                                                                      className='text-center',
-                                                                                      children=[
-                                                                                          html.Button(
-                                                                                              id='C-Reset',
-                                                                                              type='button',
-                                                                                              className='btn btn-primary btn-lg',
-                                                                                              children=[
-                                                                                                  'Reset'])]),
-                                                                                  html.Br(),
-                                                                                  #
-                                                                                  # html.Div(className='text-center',
-                                                                                  #          children=[
-                                                                                  #              html.Div(
-                                                                                  #                  className='btn-group',
-                                                                                  #                  role='group',
-                                                                                  #                  **{
-                                                                                  #                      'aria-label': 'button-group-C'},
-                                                                                  #                  children=[
-                                                                                  #                      html.Button(
-                                                                                  #                          id='C-copy-L',
-                                                                                  #                          type='button',
-                                                                                  #                          className='btn btn-primary  btn-lg',
-                                                                                  #                          children=[
-                                                                                  #                              'Copy L']),
-                                                                                  #                      html.Button(
-                                                                                  #                          id='C-copy-R',
-                                                                                  #                          type='button',
-                                                                                  #                          className='btn btn-primary  btn-lg',
-                                                                                  #                          children=[
-                                                                                  #                              'Copy R'])])
-                                                                                  #          ])
-                                                                              ]),
-
-                                                                     html.Div(className='tab-pane container fade-in',
-                                                                              id='R-tab',
-                                                                              children=[
-                                                                                  html.Div(id="R-stretch-top-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-                                                                                  html.Br(),
-                                                                                  dcc.Slider(
-                                                                                      id='R-stretch-top-slider',
-                                                                                      min=0,
-                                                                                      max=255,
-                                                                                      value=0,
-                                                                                      step=1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             63: {'label': '63',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             127: {'label': '127',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             191: {'label': '191',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             255: {'label': '255',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-
-                                                                                  html.Div(id="R-stretch-bot-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='R-stretch-bot-slider',
-                                                                                      min=0,
-                                                                                      max=255,
-                                                                                      value=255,
-                                                                                      step=1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             63: {'label': '63',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             127: {'label': '127',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             191: {'label': '191',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             255: {'label': '255',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-                                                                                  html.Div(id="R-gamma-text",
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='R-gamma-slider',
-                                                                                      min=0,
-                                                                                      max=1,
-                                                                                      value=1,
-                                                                                      step=.05,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             0.25: {'label': '.25',
-                                                                                                    'style': {
-                                                                                                        'font-size': 'large'}},
-                                                                                             .5: {'label': '.5',
-                                                                                                  'style': {
-                                                                                                      'font-size': 'large'}},
-                                                                                             .75: {'label': '.75',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             1: {'label': '1',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'
-                                                                                  ),
-
-
-                                                                                  html.Div(id='R-saturation-text',
-                                                                                           style={'text-align': 'left',
-                                                                                                  'font-size': 'x-large'}),
-
-                                                                                  html.Br(),
-
-                                                                                  dcc.Slider(
-                                                                                      id='R-saturation-slider',
-                                                                                      min=0.1,
-                                                                                      max=5,
-                                                                                      value=1,
-                                                                                      step=.1,
-                                                                                      marks={0: {'label': '0',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             1: {'label': '1',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}},
-                                                                                             1.5: {'label': '1.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             2.5: {'label': '2.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             3.5: {'label': '3.5',
-                                                                                                   'style': {
-                                                                                                       'font-size': 'large'}},
-                                                                                             5: {'label': '5',
-                                                                                                 'style': {
-                                                                                                     'font-size': 'large'}}},
-                                                                                      updatemode='mouseup'),
-
-                                                                                  html.Br(),
-
-                                                                                  html.Div(
-                                                                                      className='text-center',
-                                                                                      children=[
-                                                                                          html.Button(
-                                                                                              id='R-Reset',
-                                                                                              type='button',
-                                                                                              className='btn btn-primary btn-lg',
-                                                                                              children=[
-                                                                                                  'Reset'])]),
-                                                                                  html.Br(),
-
-                                                                                  # html.Div(
-                                                                                  #     className='text-center',
-                                                                                  #     children=[
-                                                                                  #         html.Div(
-                                                                                  #             className='btn-group',
-                                                                                  #             role='group',
-                                                                                  #             **{
-                                                                                  #                 'aria-label': 'button-group-R'},
-                                                                                  #             children=[
-                                                                                  #                 html.Button(
-                                                                                  #                     id='R-copy-L',
-                                                                                  #                     type='button',
-                                                                                  #                     className='btn btn-primary  btn-lg',
-                                                                                  #                     children=[
-                                                                                  #                         'Copy L']),
-                                                                                  #                 html.Button(
-                                                                                  #                     id='R-copy-C',
-                                                                                  #                     type='button',
-                                                                                  #                     className='btn btn-primary btn-lg',
-                                                                                  #                     children=[
-                                                                                  #                         'Copy C'])])
-                                                                                  #     ])
-                                                                              ])
-                                                                 ])
-                                                    ])
-                                       ]),
-                              # -----------</IMG-Controls----------
-
-                              # -----------<CME-Controls----------
-                              html.Div(className='col-xl-3 card bg-light',
-                                       style={'display': 'flex'},
-                                       children=[
-                                           html.Div(className='card-header text-center font-weight-bold',
-                                                    style={'text-align': 'left',
-                                                           'font-size': 'x-large'},
-                                                    children=['CME-CONTROLS']
-                                                    ),
-                                           html.Div(className='card-body',
-                                                    children=[
-
-                                                        html.Div(id='radial-text', style={'text-align': 'left',
-                                                                                          'font-size': 'x-large'}),
-
-                                                        html.Br(),
-
-                                                        html.Div(className="row",
-                                                                 children=[
-                                                                     html.Button(
-                                                                         id='left_rad_btn',
-                                                                         style={'margin-right': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-left')
-                                                                         ]),
-                                                                     dcc.Slider(
-                                                                         id='radial-slider',
-                                                                         className="col",
-                                                                         min=1,
-                                                                         max=45,
-                                                                         value=8,
-                                                                         step=.1,
-                                                                         marks={1: {'label': '1',
-                                                                                    'style': {'font-size': 'large'}},
-                                                                                8: {'label': '8',
-                                                                                    'style': {'font-size': 'large'}},
-                                                                                20: {'label': '20',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                45: {'label': '45',
-                                                                                     'style': {'font-size': 'large'}}},
-                                                                         updatemode='mouseup'
-                                                                     ),
-
-                                                                     html.Button(
-                                                                         id='right_rad_btn',
-                                                                         style={'margin-left': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-right')
-                                                                         ]),
-                                                                 ]),
-
-                                                        html.Br(),
-
-                                                        html.Div(id="lat-text", style={'text-align': 'left',
-                                                                                       'font-size': 'x-large'}),
-                                                        html.Br(),
-                                                        html.Div(className="row",
-                                                                 children=[
-                                                                     html.Button(
-                                                                         id='left_lat_btn',
-                                                                         style={'margin-right': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-left')
-                                                                         ]),
-                                                                     dcc.Slider(
-                                                                         id='lat-slider',
-                                                                         className="col",
-                                                                         min=-90,
-                                                                         max=90,
-                                                                         value=0,
-                                                                         step=1,
-                                                                         marks={-90: {'label': '-90',
-                                                                                      'style': {'font-size': 'large'}},
-                                                                                -45: {'label': '-45',
-                                                                                      'style': {'font-size': 'large'}},
-                                                                                0: {'label': '0',
-                                                                                    'style': {'font-size': 'large'}},
-                                                                                45: {'label': '45',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                90: {'label': '90',
-                                                                                     'style': {'font-size': 'large'}}},
-                                                                         updatemode='mouseup'
-                                                                     ),
-                                                                     html.Button(
-                                                                         id='right_lat_btn',
-                                                                         style={'margin-left': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-right')
-                                                                         ]),
-                                                                 ]),
 
+                                                              ]),
+                                                     html.Div(
+                                                         style={'margin': 'auto'},
+                                                         children=[
+                                                             dcc.Loading(type='circle',
+                                                                         children=[
+                                                                             dcc.Graph(id='2d-l-lemniscate',
+                                                                                       config={
+                                                                                           'modeBarButtonsToRemove': [
+                                                                                               'sendDataToCloud',
+                                                                                               'select2d',
+                                                                                               'lasso2d',
+                                                                                               'hoverCompareCartesian',
+                                                                                               'hoverClosestCartesian',
+                                                                                               'toggleSpikelines'],
+                                                                                           'displaylogo': False})]),
+                                                             playback_controls('l'),
+                                                         ]),
+
+
+                                                     html.Br()
+                                                 ]),
+                                        html.Div(className='col card bg-dark text-center',
+                                                 id='SOHO',
+                                                 children=[
+                                                     html.Div(className='card-header row',
+                                                              children=[
+                                                                  html.Button(
+                                                                      id='left_move_btn_c',
+                                                                      style={'margin-left': '20px'},
+                                                                      type='button',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      n_clicks_timestamp=0,
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-left')
+                                                                      ]),
+                                                                  html.Div(className='col',
+                                                                           children=[
+                                                                               dcc.Dropdown(
+                                                                                   id='c-image-dropdown',
+                                                                                   options=[
+                                                                                       {
+                                                                                           'label': 'SOHO LASCO C2 - Running difference',
+                                                                                           'value': 'C2'},
+                                                                                       {
+                                                                                           'label': 'SOHO LASCO C3 - Running difference',
+                                                                                           'value': 'C3'},
+                                                                                   ],
+                                                                                   value='C3',
+                                                                                   searchable=False,
+                                                                                   clearable=False
+                                                                               )]),
+                                                                  html.Button(
+                                                                      id='right_move_btn_c',
+                                                                      style={'margin-right': '20px'},
+                                                                      type='button',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      n_clicks_timestamp=0,
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-right')
+                                                                      ]),
+                                                                  html.Button(
+                                                                      id='time_import_btn_c',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      type='button',
+                                                                      title='Sync other spacecraft to this timestamp',
+                                                                      n_clicks_timestamp=0,
+                                                                      style={'margin-right': '20px'},
+                                                                      children=[
+                                                                          html.Img(src='assets/clock.png', height=24,
+                                                                                   width=24)
+                                                                      ]
+                                                                  )
+                                                              ]),
+                                                     html.Div(id='c-image-text',
+                                                              style={'color': 'white',
+                                                                     'font-size': 'x-large'}),
+                                                     html.Div(className='row',
+                                                              children=[
+                                                                  dcc.Slider(
+                                                                      className='col',
+                                                                      id='c-image-slider',
+                                                                      min=1,
+                                                                      max=1,
+                                                                      value=1,
+                                                                      step=1,
+                                                                      updatemode='mouseup'),
+                                                                  html.Div(className='text-center',
+                                                                           children=[
+                                                                               html.Div(
+                                                                                   className='btn-group btn-group-sm',
+                                                                                   role='group',
+                                                                                   **{
+                                                                                       'aria-label': 'button-group-r'},
+                                                                                   children=[
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='c-btn-match',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           type='button',
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Match Image']),
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='unmatch-btn-c',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           type='button',
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Unmatch Image']),
+                                                                                   ])
+                                                                           ]),
 
-                                                        html.Br(),
-                                                        html.Div(id="long-text", style={'text-align': 'left',
-                                                                                        'font-size': 'x-large'}),
+                                                              ]),
+                                                     html.Div(
+                                                         style={'margin': 'auto'},
+                                                         children=[
+                                                             dcc.Loading(type='circle',
+                                                                         children=[
+                                                                             dcc.Graph(id='2d-c-lemniscate',
+                                                                                       config={
+                                                                                           'modeBarButtonsToRemove': ['sendDataToCloud',
+                                                                                                                      'select2d',
+                                                                                                                      'lasso2d',
+                                                                                                                      'hoverCompareCartesian',
+                                                                                                                      'hoverClosestCartesian',
+                                                                                                                      'toggleSpikelines'],
+                                                                                           'displaylogo':False})]),
+                                                             playback_controls('c'),
+                                                         ]),
+
+                                                     html.Br()
+                                                 ]),
+                                        html.Div(className='col card bg-dark text-center',
+                                                 id='STEREO-A',
+                                                 children=[
+                                                     html.Div(className='card-header row',
+                                                              children=[
+                                                                  html.Button(
+                                                                      id='left_move_btn_r',
+                                                                      style={'margin-left': '20px'},
+                                                                      type='button',
+                                                                      n_clicks_timestamp=0,
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-left')
+                                                                      ]),
+                                                                  html.Div(className='col',
+                                                                           children=[
+                                                                               dcc.Dropdown(
+                                                                                   id='r-image-dropdown',
+                                                                                   options=[
+                                                                                       {
+                                                                                           'label': 'STEREO A COR2 - Running difference',
+                                                                                           'value': 'Norm'}],
+                                                                                   value='Norm',
+                                                                                   searchable=False,
+                                                                                   clearable=False
+                                                                               )]),
+                                                                  html.Button(
+                                                                      id='right_move_btn_r',
+                                                                      type='button',
+                                                                      style={'margin-right': '20px'},
+                                                                      n_clicks_timestamp=0,
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      children=[
+                                                                          html.Span(className='fas fa-arrow-right')
+                                                                      ]),
+                                                                  html.Button(
+                                                                      id='time_import_btn_r',
+                                                                      className='btn btn-primary col-sm-1',
+                                                                      type='button',
+                                                                      title='Sync other spacecraft to this timestamp',
+                                                                      n_clicks_timestamp=0,
+                                                                      style={'margin-right': '20px'},
+                                                                      children=[
+                                                                          html.Img(src='assets/clock.png', height=24, width=24)
+                                                                      ])]),
+
+                                                     html.Div(id='r-image-text',
+                                                              style={'color': 'white',
+                                                                     'font-size': 'x-large'}),
+
+                                                     html.Div(className='row',
+                                                              children=[
+                                                                  dcc.Slider(
+                                                                      className='col',
+                                                                      id='r-image-slider',
+                                                                      min=1,
+                                                                      max=1,
+                                                                      value=1,
+                                                                      step=1,
+                                                                      updatemode='mouseup'),
+                                                                  html.Div(className='text-center',
+                                                                           children=[
+                                                                               html.Div(
+                                                                                   className='btn-group btn-group-sm',
+                                                                                   role='group',
+                                                                                   **{
+                                                                                       'aria-label': 'button-group-r'},
+                                                                                   children=[
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='r-btn-match',
+                                                                                           type='button',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Match Image']),
+                                                                                       html.Button(
+                                                                                           style={'margin-right': '20px'},
+                                                                                           id='unmatch-btn-r',
+                                                                                           n_clicks_timestamp=0,
+                                                                                           type='button',
+                                                                                           className='btn btn-primary btn-lg btn-block',
+                                                                                           children=['Unmatch Image']),
+                                                                                   ])
+                                                                           ]),
 
-                                                        html.Br(),
 
-                                                        html.Div(className="row",
-                                                                 children=[
-                                                                     html.Button(
-                                                                         id='left_long_btn',
-                                                                         style={'margin-right': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-left')
-                                                                         ]),
-                                                                     dcc.Slider(
-                                                                         id='long-slider',
-                                                                         className="col",
-                                                                         min=-180,
-                                                                         max=180,
-                                                                         value=0,
-                                                                         step=1,
-                                                                         marks={-180: {'label': '-180',
-                                                                                       'style': {'font-size': 'large'}},
-                                                                                -90: {'label': '-90',
-                                                                                      'style': {'font-size': 'large'}},
-                                                                                -45: {'label': '-45',
-                                                                                      'style': {'font-size': 'large'}},
-                                                                                0: {'label': '0',
-                                                                                    'style': {'font-size': 'large'}},
-                                                                                45: {'label': '45',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                90: {'label': '90',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                180: {'label': '180', 'style': {
-                                                                                    'font-size': 'large'}}, },
-                                                                         updatemode='mouseup'
-
-                                                                     ),
-                                                                     html.Button(
-                                                                         id='right_long_btn',
-                                                                         style={'margin-left': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
+                                                              ]),
+                                                     html.Div(
+                                                         style={'margin': 'auto'},
+                                                         children=[
+                                                             dcc.Loading(type='circle',
                                                                          children=[
-                                                                             html.Span(className='fas fa-arrow-right')
-                                                                         ]),
-                                                                 ]),
-
-                                                        html.Br(),
+                                                                             dcc.Graph(id='2d-r-lemniscate',
+                                                                                       config={
+                                                                                           'modeBarButtonsToRemove': [
+                                                                                               'sendDataToCloud',
+                                                                                               'select2d',
+                                                                                               'lasso2d',
+                                                                                               'hoverCompareCartesian',
+                                                                                               'hoverClosestCartesian',
+                                                                                               'toggleSpikelines'],
+                                                                                           'displaylogo': False})]),
+                                                             playback_controls('r'),
+                                                         ]),
+
+
+
+                                                     html.Br()
+
+                                                 ])
+                                    ])
+
+                           ]),
+        # -----------</Plot-Section>----------
+
+        html.Div(className='container-fluid',
+                 children=[
+                     html.Div(className="row",
+                              children=[
+                                  # -----------<IMG-Controls----------
+                                  html.Div(className='card col-xl-3 bg-light',
+                                           style={'display': 'block'},
+                                           children=[
+                                               html.Div(className='card-header text-center font-weight-bold',
+                                                        style={'text-align': 'left',
+                                                               'font-size': 'x-large'},
+                                                        children=['IMG-CONTROLS',
+                                                                  html.Ul(
+                                                                      className='nav nav-pills nav-fill card-header-pills',
+                                                                      children=[
+                                                                          html.Li(className='nav-item',
+                                                                                  children=[
+                                                                                      html.A(className='nav-link active',
+                                                                                             **{'data-toggle': 'tab'},
+                                                                                             href='#L-tab',
+                                                                                             children=['STEREO B'])
+                                                                                  ]),
+                                                                          html.Li(className='nav-item',
+                                                                                  children=[html.A(className='nav-link',
+                                                                                                   **{'data-toggle': 'tab'},
+                                                                                                   href='#C-tab',
+                                                                                                   children=['SOHO'])
+                                                                                            ]),
+                                                                          html.Li(className='nav-item',
+                                                                                  children=[html.A(className='nav-link',
+                                                                                                   **{'data-toggle': 'tab'},
+                                                                                                   href='#R-tab',
+                                                                                                   children=['STEREO A'])
+                                                                                            ])
+                                                                      ])
+                                                                  ]),
 
-                                                        html.Div(id="angular-text", style={'text-align': 'left',
+                                               html.Div(className='card-body',
+                                                        children=[
+                                                            html.Div(className='tab-content',
+                                                                     children=[
+                                                                         html.Div(
+                                                                             className='tab-pane container active fade-in',
+                                                                             id='L-tab',
+                                                                             children=[
+                                                                                 html.Div(id="L-stretch-top-text",
+                                                                                          style={'text-align': 'left',
+                                                                                                 'font-size': 'x-large'}),
+                                                                                 html.Br(),
+                                                                                 dcc.Slider(
+                                                                                     id='L-stretch-top-slider',
+                                                                                     min=0,
+                                                                                     max=255,
+                                                                                     value=0,
+                                                                                     step=1,
+                                                                                     marks={0: {'label': '0', 'style': {
+                                                                                         'font-size': 'large'}},
+                                                                                            63: {'label': '63', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            127: {'label': '127', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            191: {'label': '191', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            255: {'label': '255', 'style': {
+                                                                                                'font-size': 'large'}}},
+                                                                                     updatemode='mouseup'
+                                                                                 ),
+
+
+                                                                                 html.Div(id="L-stretch-bot-text",
+                                                                                          style={'text-align': 'left',
+                                                                                                 'font-size': 'x-large'}),
+
+                                                                                 html.Br(),
+
+                                                                                 dcc.Slider(
+                                                                                     id='L-stretch-bot-slider',
+                                                                                     min=0,
+                                                                                     max=255,
+                                                                                     value=255,
+                                                                                     step=1,
+                                                                                     marks={0: {'label': '0', 'style': {
+                                                                                         'font-size': 'large'}},
+                                                                                            63: {'label': '63', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            127: {'label': '127', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            191: {'label': '191', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            255: {'label': '255', 'style': {
+                                                                                                'font-size': 'large'}}},
+                                                                                     updatemode='mouseup'
+                                                                                 ),
+
+                                                                                 html.Div(id="L-gamma-text",
+                                                                                          style={'text-align': 'left',
+                                                                                                 'font-size': 'x-large'}),
+
+                                                                                 html.Br(),
+
+                                                                                 dcc.Slider(
+                                                                                     id='L-gamma-slider',
+                                                                                     min=0,
+                                                                                     max=1,
+                                                                                     value=1,
+                                                                                     step=.05,
+                                                                                     marks={0: {'label': '0', 'style': {
+                                                                                         'font-size': 'large'}},
+                                                                                            0.25: {'label': '.25',
+                                                                                                   'style': {
+                                                                                                       'font-size': 'large'}},
+                                                                                            .5: {'label': '.5', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            .75: {'label': '.75', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            1: {'label': '1', 'style': {
+                                                                                                'font-size': 'large'}}},
+                                                                                     updatemode='mouseup'
+                                                                                 ),
+
+
+                                                                                 html.Div(id='L-saturation-text',
+                                                                                          style={'text-align': 'left',
+                                                                                                 'font-size': 'x-large'}),
+
+                                                                                 html.Br(),
+
+                                                                                 dcc.Slider(
+                                                                                     id='L-saturation-slider',
+                                                                                     min=0.1,
+                                                                                     max=5,
+                                                                                     value=swpc_api.SATURATIONS[
+                                                                                         'Stereo-B'],
+                                                                                     step=.1,
+                                                                                     marks={0: {'label': '0', 'style': {
+                                                                                         'font-size': 'large'}},
+                                                                                            1: {'label': '1', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            1.5: {'label': '1.5', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            2.5: {'label': '2.5', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            3.5: {'label': '3.5', 'style': {
+                                                                                                'font-size': 'large'}},
+                                                                                            5: {'label': '5', 'style': {
+                                                                                                'font-size': 'large'}}},
+                                                                                     updatemode='mouseup'),
+
+                                                                                 difference_mode_control('L'),
+                                                                                 html.Br(),
+                                                                                 html.Div(className='text-center',
+                                                                                          children=[
+                                                                                              html.Button(id='L-Reset',
+                                                                                                          type='button',
+                                                                                                          className='btn btn-primary btn-lg',
+                                                                                                          children=[
+                                                                                                              'Reset'])]),
+                                                                                 html.Br(),
+                                                                                 # html.Div(className='text-center',
+                                                                                 #          children=[
+                                                                                 #              html.Div(
+                                                                                 #                  className='btn-group',
+                                                                                 #                  role='group',
+                                                                                 #                  **{
+                                                                                 #                      'aria-label': 'button-group-L'},
+                                                                                 #                  children=[
+                                                                                 #                      html.Button(
+                                                                                 #                          id='L-copy-C',
+                                                                                 #                          type='button',
+                                                                                 #                          className='btn btn-primary  btn-lg',
+                                                                                 #                          children=[
+                                                                                 #                              'Copy C']),
+                                                                                 #                      html.Button(
+                                                                                 #                          id='L-copy-R',
+                                                                                 #                          type='button',
+                                                                                 #                          className='btn btn-primary btn-lg',
+                                                                                 #                          children=[
+                                                                                 #                              'Copy R'])])
+                                                                                 #          ])
+                                                                             ]),
+
+                                                                         html.Div(className='tab-pane container fade-in',
+                                                                                  id='C-tab',
+                                                                                  children=[
+                                                                                      html.Div(id="C-stretch-top-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+                                                                                      html.Br(),
+                                                                                      dcc.Slider(
+                                                                                          id='C-stretch-top-slider',
+                                                                                          min=0,
+                                                                                          max=255,
+                                                                                          value=0,
+                                                                                          step=1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 63: {'label': '63',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 127: {'label': '127',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 191: {'label': '191',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 255: {'label': '255',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+
+                                                                                      html.Div(id="C-stretch-bot-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='C-stretch-bot-slider',
+                                                                                          min=0,
+                                                                                          max=255,
+                                                                                          value=255,
+                                                                                          step=1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 63: {'label': '63',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 127: {'label': '127',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 191: {'label': '191',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 255: {'label': '255',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+                                                                                      html.Div(id="C-gamma-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='C-gamma-slider',
+                                                                                          min=0,
+                                                                                          max=1,
+                                                                                          value=1,
+                                                                                          step=.05,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 0.25: {'label': '.25',
+                                                                                                        'style': {
+                                                                                                            'font-size': 'large'}},
+                                                                                                 .5: {'label': '.5',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 .75: {'label': '.75',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 1: {'label': '1',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+
+                                                                                      html.Div(id='C-saturation-text',
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='C-saturation-slider',
+                                                                                          min=0.1,
+                                                                                          max=5,
+                                                                                          value=swpc_api.SATURATIONS[
+                                                                                              'SOHO C3'],
+                                                                                          step=.1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 1: {'label': '1',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 1.5: {'label': '1.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 2.5: {'label': '2.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 3.5: {'label': '3.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 5: {'label': '5',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'),
+
+                                                                                      difference_mode_control('C'),
+
+                                                                                      html.Br(),
+
+                                                                                      html.Div(
+                                                                                          className='text-center',
+                                                                                          children=[
+                                                                                              html.Button(
+                                                                                                  id='C-Reset',
+                                                                                                  type='button',
+                                                                                                  className='btn btn-primary btn-lg',
+                                                                                                  children=[
+                                                                                                      'Reset'])]),
+                                                                                      html.Br(),
+                                                                                      #
+                                                                                      # html.Div(className='text-center',
+                                                                                      #          children=[
+                                                                                      #              html.Div(
+                                                                                      #                  className='btn-group',
+                                                                                      #                  role='group',
+                                                                                      #                  **{
+                                                                                      #                      'aria-label': 'button-group-C'},
+                                                                                      #                  children=[
+                                                                                      #                      html.Button(
+                                                                                      #                          id='C-copy-L',
+                                                                                      #                          type='button',
+                                                                                      #                          className='btn btn-primary  btn-lg',
+                                                                                      #                          children=[
+                                                                                      #                              'Copy L']),
+                                                                                      #                      html.Button(
+                                                                                      #                          id='C-copy-R',
+                                                                                      #                          type='button',
+                                                                                      #                          className='btn btn-primary  btn-lg',
+                                                                                      #                          children=[
+                                                                                      #                              'Copy R'])])
+                                                                                      #          ])
+                                                                                  ]),
+
+                                                                         html.Div(className='tab-pane container fade-in',
+                                                                                  id='R-tab',
+                                                                                  children=[
+                                                                                      html.Div(id="R-stretch-top-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+                                                                                      html.Br(),
+                                                                                      dcc.Slider(
+                                                                                          id='R-stretch-top-slider',
+                                                                                          min=0,
+                                                                                          max=255,
+                                                                                          value=0,
+                                                                                          step=1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 63: {'label': '63',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 127: {'label': '127',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 191: {'label': '191',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 255: {'label': '255',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+
+                                                                                      html.Div(id="R-stretch-bot-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='R-stretch-bot-slider',
+                                                                                          min=0,
+                                                                                          max=255,
+                                                                                          value=255,
+                                                                                          step=1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 63: {'label': '63',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 127: {'label': '127',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 191: {'label': '191',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 255: {'label': '255',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+                                                                                      html.Div(id="R-gamma-text",
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='R-gamma-slider',
+                                                                                          min=0,
+                                                                                          max=1,
+                                                                                          value=1,
+                                                                                          step=.05,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 0.25: {'label': '.25',
+                                                                                                        'style': {
+                                                                                                            'font-size': 'large'}},
+                                                                                                 .5: {'label': '.5',
+                                                                                                      'style': {
+                                                                                                          'font-size': 'large'}},
+                                                                                                 .75: {'label': '.75',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 1: {'label': '1',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'
+                                                                                      ),
+
+
+                                                                                      html.Div(id='R-saturation-text',
+                                                                                               style={'text-align': 'left',
+                                                                                                      'font-size': 'x-large'}),
+
+                                                                                      html.Br(),
+
+                                                                                      dcc.Slider(
+                                                                                          id='R-saturation-slider',
+                                                                                          min=0.1,
+                                                                                          max=5,
+                                                                                          value=swpc_api.SATURATIONS[
+                                                                                              'Stereo-A'],
+                                                                                          step=.1,
+                                                                                          marks={0: {'label': '0',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 1: {'label': '1',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}},
+                                                                                                 1.5: {'label': '1.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 2.5: {'label': '2.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 3.5: {'label': '3.5',
+                                                                                                       'style': {
+                                                                                                           'font-size': 'large'}},
+                                                                                                 5: {'label': '5',
+                                                                                                     'style': {
+                                                                                                         'font-size': 'large'}}},
+                                                                                          updatemode='mouseup'),
+
+                                                                                      difference_mode_control('R'),
+
+                                                                                      html.Br(),
+
+                                                                                      html.Div(
+                                                                                          className='text-center',
+                                                                                          children=[
+                                                                                              html.Button(
+                                                                                                  id='R-Reset',
+                                                                                                  type='button',
+                                                                                                  className='btn btn-primary btn-lg',
+                                                                                                  children=[
+                                                                                                      'Reset'])]),
+                                                                                      html.Br(),
+
+                                                                                      # html.Div(
+                                                                                      #     className='text-center',
+                                                                                      #     children=[
+                                                                                      #         html.Div(
+                                                                                      #             className='btn-group',
+                                                                                      #             role='group',
+                                                                                      #             **{
+                                                                                      #                 'aria-label': 'button-group-R'},
+                                                                                      #             children=[
+                                                                                      #                 html.Button(
+                                                                                      #                     id='R-copy-L',
+                                                                                      #                     type='button',
+                                                                                      #                     className='btn btn-primary  btn-lg',
+                                                                                      #                     children=[
+                                                                                      #                         'Copy L']),
+                                                                                      #                 html.Button(
+                                                                                      #                     id='R-copy-C',
+                                                                                      #                     type='button',
+                                                                                      #                     className='btn btn-primary btn-lg',
+                                                                                      #                     children=[
+                                                                                      #                         'Copy C'])])
+                                                                                      #     ])
+                                                                                  ])
+                                                                     ])
+                                                        ])
+                                           ]),
+                                  # -----------</IMG-Controls----------
+
+                                  # -----------<CME-Controls----------
+                                  html.Div(className='col-xl-3 card bg-light',
+                                           style={'display': 'flex'},
+                                           children=[
+                                               html.Div(className='card-header text-center font-weight-bold',
+                                                        style={'text-align': 'left',
+                                                               'font-size': 'x-large'},
+                                                        children=['CME-CONTROLS']
+                                                        ),
+                                               html.Div(className='card-body',
+                                                        children=[
+
+                                                            html.Div(id='radial-text', style={'text-align': 'left',
+                                                                                              'font-size': 'x-large'}),
+
+                                                            html.Br(),
+
+                                                            html.Div(className="row",
+                                                                     children=[
+                                                                         html.Button(
+                                                                             id='left_rad_btn',
+                                                                             style={'margin-right': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-left')
+                                                                             ]),
+                                                                         dcc.Slider(
+                                                                             id='radial-slider',
+                                                                             className="col",
+                                                                             min=1,
+                                                                             max=45,
+                                                                             value=8,
+                                                                             step=.1,
+                                                                             marks={1: {'label': '1',
+                                                                                        'style': {'font-size': 'large'}},
+                                                                                    8: {'label': '8',
+                                                                                        'style': {'font-size': 'large'}},
+                                                                                    20: {'label': '20',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    45: {'label': '45',
+                                                                                         'style': {'font-size': 'large'}}},
+                                                                             updatemode='mouseup'
+                                                                         ),
+
+                                                                         html.Button(
+                                                                             id='right_rad_btn',
+                                                                             style={'margin-left': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-right')
+                                                                             ]),
+                                                                     ]),
+
+                                                            html.Br(),
+
+                                                            html.Div(id="lat-text", style={'text-align': 'left',
                                                                                            'font-size': 'x-large'}),
+                                                            html.Br(),
+                                                            html.Div(className="row",
+                                                                     children=[
+                                                                         html.Button(
+                                                                             id='left_lat_btn',
+                                                                             style={'margin-right': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-left')
+                                                                             ]),
+                                                                         dcc.Slider(
+                                                                             id='lat-slider',
+                                                                             className="col",
+                                                                             min=-90,
+                                                                             max=90,
+                                                                             value=0,
+                                                                             step=1,
+                                                                             marks={-90: {'label': '-90',
+                                                                                          'style': {'font-size': 'large'}},
+                                                                                    -45: {'label': '-45',
+                                                                                          'style': {'font-size': 'large'}},
+                                                                                    0: {'label': '0',
+                                                                                        'style': {'font-size': 'large'}},
+                                                                                    45: {'label': '45',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    90: {'label': '90',
+                                                                                         'style': {'font-size': 'large'}}},
+                                                                             updatemode='mouseup'
+                                                                         ),
+                                                                         html.Button(
+                                                                             id='right_lat_btn',
+                                                                             style={'margin-left': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-right')
+                                                                             ]),
+                                                                     ]),
+
+
+                                                            html.Br(),
+                                                            html.Div(id="long-text", style={'text-align': 'left',
+                                                                                            'font-size': 'x-large'}),
+
+                                                            html.Br(),
+
+                                                            html.Div(className="row",
+                                                                     children=[
+                                                                         html.Button(
+                                                                             id='left_long_btn',
+                                                                             style={'margin-right': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-left')
+                                                                             ]),
+                                                                         dcc.Slider(
+                                                                             id='long-slider',
+                                                                             className="col",
+                                                                             min=-180,
+                                                                             max=180,
+                                                                             value=0,
+                                                                             step=1,
+                                                                             marks={-180: {'label': '-180',
+                                                                                           'style': {'font-size': 'large'}},
+                                                                                    -90: {'label': '-90',
+                                                                                          'style': {'font-size': 'large'}},
+                                                                                    -45: {'label': '-45',
+                                                                                          'style': {'font-size': 'large'}},
+                                                                                    0: {'label': '0',
+                                                                                        'style': {'font-size': 'large'}},
+                                                                                    45: {'label': '45',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    90: {'label': '90',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    180: {'label': '180', 'style': {
+                                                                                        'font-size': 'large'}}, },
+                                                                             updatemode='mouseup'
+
+                                                                         ),
+                                                                         html.Button(
+                                                                             id='right_long_btn',
+                                                                             style={'margin-left': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-right')
+                                                                             ]),
+                                                                     ]),
+
+                                                            html.Br(),
+
+                                                            html.Div(id="angular-text", style={'text-align': 'left',
+                                                                                               'font-size': 'x-large'}),
+
+                                                            html.Br(),
+
+                                                            html.Div(className="row",
+                                                                     children=[
+                                                                         html.Button(
+                                                                             id='left_ang_btn',
+                                                                             style={'margin-right': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-left')
+                                                                             ]),
+                                                                         dcc.Slider(
+                                                                             id='angular-slider',
+                                                                             className="col",
+                                                                             min=20,
+                                                                             max=140,
+                                                                             value=90,
+                                                                             step=1,
+                                                                             marks={20: {'label': '20',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    40: {'label': '40',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    90: {'label': '90',
+                                                                                         'style': {'font-size': 'large'}},
+                                                                                    140: {'label': '140',
+                                                                                          'style': {'font-size': 'large'}}},
+                                                                             updatemode='mouseup'
+
+                                                                         ),
+                                                                         html.Button(
+                                                                             id='right_ang_btn',
+                                                                             style={'margin-left': '20px'},
+                                                                             type='button',
+                                                                             className='btn btn-primary col-sm-1',
+                                                                             n_clicks_timestamp=0,
+                                                                             children=[
+                                                                                 html.Span(className='fas fa-arrow-right')
+                                                                             ]),
+                                                                     ]),
+
+                                                            html.Br(),
+
+
+                                                            html.Div(
+                                                                className='text-center',
+                                                                children=[
+                                                                    html.Button(
+                                                                        id='CME-Reset',
+                                                                        type='button',
+                                                                        className='btn btn-primary btn-lg',
+                                                                        n_clicks_timestamp=0,
+                                                                        title="Reset CME control sliders",
+                                                                        children=[
+                                                                            'Reset'])]),
+                                                            html.Br(),
+                                                        ])
+                                           ]),
+
+                                  # -----------</CME-Controls----------
+
+                                  # -----------</Velocity Graph----------
+
+                                  html.Div(className='col-xl-4 card bg-light',
+                                           style={'display': 'flex'},
+                                           children=[
+                                               html.Div(className='card-header text-center font-weight-bold',
+                                                        style={'text-align': 'left',
+                                                               'font-size': 'x-large'},
+                                                        children=['Velocity Graph']
+                                                        ),
+                                               html.Div(className='card-body text-center',
+                                                        children=[
+                                                            dcc.Loading(id="vel_graph_load",
+                                                                        type='circle',
+                                                                        children=[
+                                                                            dcc.Graph(id='velocity-graph',
+                                                                                      config={
+                                                                                          'modeBarButtonsToRemove': [
+                                                                                              'sendDataToCloud', 'zoom2d',
+                                                                                              'pan2d',
+                                                                                              'select2d',
+                                                                                              'lasso2d', 'zoomIn2d',
+                                                                                              'zoomOut2d',
+                                                                                              'hoverCompareCartesian',
+                                                                                              'hoverClosestCartesian',
+                                                                                              'toggleSpikelines'],
+
+                                                                                          'displaylogo':False})])
+                                                        ])
+                                           ]),
+                                  # -----------</Velocity Graph----------
+
+                                  # -----------<Results----------
+                                  html.Div(className='col-xl-2 card bg-light',
+                                           style={'display': 'flex'},
+                                           children=[
+                                               html.Div(className='card-header text-center font-weight-bold',
+                                                        style={'text-align': 'left',
+                                                               'font-size': 'x-large'},
+                                                        children=['Results']
+                                                        ),
+                                               html.Div(className='card-body',
+                                                        children=[
+                                                            dcc.Loading(id="results_load",
+                                                                        type='circle',
+                                                                        children=[
+                                                                            html.Ul(className='list-group',
+                                                                                    id='result-block',
+                                                                                    children=[
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='lat-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='long-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='half-width-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='velocity-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='time-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='velocity-spread-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='time-spread-result'),
+                                                                                        html.Li(className='list-group-item',
+                                                                                                style={'text-align': 'left',
+                                                                                                       'font-size': 'x-large'},
+                                                                                                id='ensemble-result',
+                                                                                                hidden=True)
+                                                                                    ])]),
+                                                            html.Div(
+                                                                className='text-center',
+                                                                children=[
+                                                                    html.Br(),
+                                                                    html.Div(className='btn-group',
+                                                                             role='group',
+                                                                             **{
+                                                                                 'aria-label': 'button-group-results'},
+                                                                             children=[
+                                                                                 html.Button(
+                                                                                     id='calculate-btn',
+                                                                                     style={'margin-right': '20px'},
+                                                                                     type='button',
+                                                                                     n_clicks_timestamp=0,
+                                                                                     className='btn btn-primary btn-lg',
+                                                                                     children=['Calculate']),
+
+                                                                                 html.Button(
+                                                                                     id='reset-all-btn',
+                                                                                     style={'margin-right': '20px'},
+                                                                                     type='button',
+                                                                                     className='btn btn-primary btn-lg',
+                                                                                     n_clicks_timestamp=0,
+                                                                                     title="resets all of the previous matches and the velocity graph",
+                                                                                     children=['Reset Matches']),
+
+                                                                                 html.Button(
+                                                                                     id='ensemble-btn',
+                                                                                     style={'margin-right': '20px'},
+                                                                                     type='button',
+                                                                                     className='btn btn-primary btn-lg',
+                                                                                     disabled=True,
+                                                                                     title="samples perturbed cone parameters around the fit and exports the accepted ones",
+                                                                                     children=['Ensemble']),
+                                                                             ]),
+
+                                                                    html.Button(
+                                                                        id='export-btn',
+                                                                        type='button',
+                                                                        style={'display': 'None'},
+                                                                        className='btn btn-primary btn-lg',
+                                                                        children=[html.A(id='my-link',
+                                                                                         href='',
+                                                                                         style={'color': 'white'},
+                                                                                         children=['Export Data'])]),
+
+                                                                    html.Button(
+                                                                        id='export-stack-btn',
+                                                                        type='button',
+                                                                        style={'display': 'None'},
+                                                                        className='btn btn-primary btn-lg',
+                                                                        title="running difference stacks of the loaded windows with the lemniscate silhouette of every frame",
+                                                                        children=[html.A(id='stack-link',
+                                                                                         href='',
+                                                                                         style={'color': 'white'},
+                                                                                         children=['Export Stacks'])]),
+                                                                ])
+
+                                                        ])
+
+                                           ])
+                                  # -----------</Results>----------
+                              ]),
+                     # --------------<3D Visuals>-------------
+                     # html.Div(className='row',
+                     #          children=[
+                     #              html.Div(className='card col-xl-12 bg-dark',
+                     #                       children=[
+                     #                           html.Div(className='card-header text-center text-white font-weight-bold',
+                     #                                    style={'text-align': 'left',
+                     #                                           'font-size': 'x-large'},
+                     #                                    children=['3D Visuals']),
+                     #                           html.Div(className='card-body',
+                     #                                    children=[dcc.Graph(id='lemniscate-graph',
+                     #                                                        config={
+                     #                                                            'displayModeBar': False}),
+                     #                                              ])
+                     #
+                     #                       ])
+                     #          ]),
+                     # --------------</3D Visuals>-------------
+
+                     # hidden divs for image data and header transport accross methods
+                     html.Div(id='stereo-a-hidden',
+                              style={'display': 'none'},
+                              children=EMPTY_IMAGE_JSON),
+                     html.Div(id='soho-c3-hidden',
+                              style={'display': 'none'},
+                              children=EMPTY_IMAGE_JSON),
+                     html.Div(id='stereo-b-hidden',
+                              style={'display': 'none'},
+                              children=EMPTY_IMAGE_JSON),
+                     html.Div(id='load-jobs-hidden',
+                              style={'display': 'none'}),
+                     dcc.Interval(id='load-job-interval',
+                                  interval=JOB_POLL_INTERVAL,
+                                  disabled=True),
+                     dcc.Interval(id='hull-refine-interval',
+                                  interval=HULL_REFINE_INTERVAL,
+                                  disabled=True),
+                     html.Div(id='full-matches-hidden',
+                              style={'display': 'none'},
+                              children=[]),
+                     html.Div(id='instrument-matches-hidden',
+                              style={'display': 'none'},
+                              children=[]),
+                     html.Div(id='radial-velocity-hidden',
+                              style={'display': 'none'},
+                              children=[]),
+                     html.Div(id='time-hidden',
+                              style={'display': 'none'},
+                              children=[]),
+                 ]),
+        # --------------<Footer>-------------
+        html.Footer(className='footer bg-dark text-white',
+                    children=[html.Div(className='footer-copyright text-center',
+                                       children=[html.A(className='text-white',
+                                                        href='mailto:ccmc-iswa-support@lists.nasa.gov',
+                                                        children='Curator: Juan A. Figueroa '),
+                                                 '| ',
+                                                 html.A(className='text-white',
+                                                        href='mailto:ccmc-iswa-support@lists.nasa.gov',
+                                                        children='NASA Official: Dr. Masha Kuznetsova '),
+                                                 '| ',
+                                                 html.A(className='text-white',
+                                                        href='https://www.nasa.gov/about/highlights/HP_Privacy.html',
+                                                        children=['Privacy and Security Notice ']),
+                                                 '| ',
+                                                 html.A(className='text-white',
+                                                        href="https://icons8.com",
+                                                        children=['Icons8'])
+                                                 ])
+                              ])
+        # --------------</Footer>-------------
+    ])
+
+
+# serves the layout with a fresh session id on every page load
+# the session id keys the server side state of one browser page
+# a browser with a saved session gets a copy of it under the fresh id, with its windows, matches and control
+# values restored; the saved or shared session is only read, so two pages opened from it never save over it
+def serve_layout():
+    source_id = flask.request.cookies.get(SESSION_COOKIE) if flask.has_request_context() else None
+    document = swpc_persist.load(source_id) if source_id else None
+    session_id = swpc_session.new_session_id()
+
+    if document is None:
+        layout = main_layout()
+    else:
+        swpc_persist.save(session_id, document)
+        layout = restored_layout(session_id, document)
 
-                                                        html.Br(),
+    if flask.has_request_context():
+        flask.after_this_request(functools.partial(session_cookie, session_id=session_id))
+
+    return html.Div([layout,
+                     html.Div(id='session-id',
+                              style={'display': 'none'},
+                              children=session_id)])
 
-                                                        html.Div(className="row",
-                                                                 children=[
-                                                                     html.Button(
-                                                                         id='left_ang_btn',
-                                                                         style={'margin-right': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-left')
-                                                                         ]),
-                                                                     dcc.Slider(
-                                                                         id='angular-slider',
-                                                                         className="col",
-                                                                         min=20,
-                                                                         max=140,
-                                                                         value=90,
-                                                                         step=1,
-                                                                         marks={20: {'label': '20',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                40: {'label': '40',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                90: {'label': '90',
-                                                                                     'style': {'font-size': 'large'}},
-                                                                                140: {'label': '140',
-                                                                                      'style': {'font-size': 'large'}}},
-                                                                         updatemode='mouseup'
-
-                                                                     ),
-                                                                     html.Button(
-                                                                         id='right_ang_btn',
-                                                                         style={'margin-left': '20px'},
-                                                                         type='button',
-                                                                         className='btn btn-primary col-sm-1',
-                                                                         n_clicks_timestamp=0,
-                                                                         children=[
-                                                                             html.Span(className='fas fa-arrow-right')
-                                                                         ]),
-                                                                 ]),
-
-                                                        html.Br(),
-
-
-                                                        html.Div(
-                                                            className='text-center',
-                                                            children=[
-                                                                html.Button(
-                                                                    id='CME-Reset',
-                                                                    type='button',
-                                                                    className='btn btn-primary btn-lg',
-                                                                    n_clicks_timestamp=0,
-                                                                    title="Reset CME control sliders",
-                                                                    children=[
-                                                                        'Reset'])]),
-                                                        html.Br(),
-                                                    ])
-                                       ]),
-
-                              # -----------</CME-Controls----------
-
-                              # -----------</Velocity Graph----------
-
-                              html.Div(className='col-xl-4 card bg-light',
-                                       style={'display': 'flex'},
-                                       children=[
-                                           html.Div(className='card-header text-center font-weight-bold',
-                                                    style={'text-align': 'left',
-                                                           'font-size': 'x-large'},
-                                                    children=['Velocity Graph']
-                                                    ),
-                                           html.Div(className='card-body text-center',
-                                                    children=[
-                                                        dcc.Loading(id="vel_graph_load",
-                                                                    type='circle',
-                                                                    children=[
-                                                                        dcc.Graph(id='velocity-graph',
-                                                                                  config={
-                                                                                      'modeBarButtonsToRemove': [
-                                                                                          'sendDataToCloud', 'zoom2d',
-                                                                                          'pan2d',
-                                                                                          'select2d',
-                                                                                          'lasso2d', 'zoomIn2d',
-                                                                                          'zoomOut2d',
-                                                                                          'hoverCompareCartesian',
-                                                                                          'hoverClosestCartesian',
-                                                                                          'toggleSpikelines'],
-
-                                                                                      'displaylogo':False})])
-                                                    ])
-                                       ]),
-                              # -----------</Velocity Graph----------
-
-                              # -----------<Results----------
-                              html.Div(className='col-xl-2 card bg-light',
-                                       style={'display': 'flex'},
-                                       children=[
-                                           html.Div(className='card-header text-center font-weight-bold',
-                                                    style={'text-align': 'left',
-                                                           'font-size': 'x-large'},
-                                                    children=['Results']
-                                                    ),
-                                           html.Div(className='card-body',
-                                                    children=[
-                                                        dcc.Loading(id="results_load",
-                                                                    type='circle',
-                                                                    children=[
-                                                                        html.Ul(className='list-group',
-                                                                                id='result-block',
-                                                                                children=[
-                                                                                    html.Li(className='list-group-item',
-                                                                                            style={'text-align': 'left',
-                                                                                                   'font-size': 'x-large'},
-                                                                                            id='lat-result'),
-                                                                                    html.Li(className='list-group-item',
-                                                                                            style={'text-align': 'left',
-                                                                                                   'font-size': 'x-large'},
-                                                                                            id='long-result'),
-                                                                                    html.Li(className='list-group-item',
-                                                                                            style={'text-align': 'left',
-                                                                                                   'font-size': 'x-large'},
-                                                                                            id='half-width-result'),
-                                                                                    html.Li(className='list-group-item',
-                                                                                            style={'text-align': 'left',
-                                                                                                   'font-size': 'x-large'},
-                                                                                            id='velocity-result'),
-                                                                                    html.Li(className='list-group-item',
-                                                                                            style={'text-align': 'left',
-                                                                                                   'font-size': 'x-large'},
-                                                                                            id='time-result')
-                                                                                ])]),
-                                                        html.Div(
-                                                            className='text-center',
-                                                            children=[
-                                                                html.Br(),
-                                                                html.Div(className='btn-group',
-                                                                         role='group',
-                                                                         **{
-                                                                             'aria-label': 'button-group-results'},
-                                                                         children=[
-                                                                             html.Button(
-                                                                                 id='calculate-btn',
-                                                                                 style={'margin-right': '20px'},
-                                                                                 type='button',
-                                                                                 n_clicks_timestamp=0,
-                                                                                 className='btn btn-primary btn-lg',
-                                                                                 children=['Calculate']),
-
-                                                                             html.Button(
-                                                                                 id='reset-all-btn',
-                                                                                 style={'margin-right': '20px'},
-                                                                                 type='button',
-                                                                                 className='btn btn-primary btn-lg',
-                                                                                 n_clicks_timestamp=0,
-                                                                                 title="resets all of the previous matches and the velocity graph",
-                                                                                 children=['Reset Matches']),
-                                                                         ]),
-
-                                                                html.Button(
-                                                                    id='export-btn',
-                                                                    type='button',
-                                                                    style={'display': 'None'},
-                                                                    className='btn btn-primary btn-lg',
-                                                                    children=[html.A(id='my-link',
-                                                                                     href='',
-                                                                                     style={'color': 'white'},
-                                                                                     children=['Export Data'])]),
-                                                            ])
-
-                                                    ])
-
-                                       ])
-                              # -----------</Results>----------
-                          ]),
-                 # --------------<3D Visuals>-------------
-                 # html.Div(className='row',
-                 #          children=[
-                 #              html.Div(className='card col-xl-12 bg-dark',
-                 #                       children=[
-                 #                           html.Div(className='card-header text-center text-white font-weight-bold',
-                 #                                    style={'text-align': 'left',
-                 #                                           'font-size': 'x-large'},
-                 #                                    children=['3D Visuals']),
-                 #                           html.Div(className='card-body',
-                 #                                    children=[dcc.Graph(id='lemniscate-graph',
-                 #                                                        config={
-                 #                                                            'displayModeBar': False}),
-                 #                                              ])
-                 #
-                 #                       ])
-                 #          ]),
-                 # --------------</3D Visuals>-------------
-
-                 # hidden divs for image data and header transport accross methods
-                 html.Div(id='stereo-a-hidden',
-                          style={'display': 'none'}),
-                 html.Div(id='soho-c3-hidden',
-                          style={'display': 'none'}),
-                 html.Div(id='stereo-b-hidden',
-                          style={'display': 'none'}),
-                 html.Div(id='full-matches-hidden',
-                          style={'display': 'none'},
-                          children=[]),
-                 html.Div(id='instrument-matches-hidden',
-                          style={'display': 'none'},
-                          children=[]),
-                 html.Div(id='radial-velocity-hidden',
-                          style={'display': 'none'},
-                          children=[]),
-                 html.Div(id='time-hidden',
-                          style={'display': 'none'},
-                          children=[]),
-             ]),
-    # --------------<Footer>-------------
-    html.Footer(className='footer bg-dark text-white',
-                children=[html.Div(className='footer-copyright text-center',
-                                   children=[html.A(className='text-white',
-                                                    href='mailto:ccmc-iswa-support@lists.nasa.gov',
-                                                    children='Curator: Juan A. Figueroa '),
-                                             '| ',
-                                             html.A(className='text-white',
-                                                    href='mailto:ccmc-iswa-support@lists.nasa.gov',
-                                                    children='NASA Official: Dr. Masha Kuznetsova '),
-                                             '| ',
-                                             html.A(className='text-white',
-                                                    href='https://www.nasa.gov/about/highlights/HP_Privacy.html',
-                                                    children=['Privacy and Security Notice ']),
-                                             '| ',
-                                             html.A(className='text-white',
-                                                    href="https://icons8.com",
-                                                    children=['Icons8'])
-                                             ])
-                          ])
-    # --------------</Footer>-------------
-])
 
+app.layout = serve_layout
 
 # --------------------------------------------------------------</html section>----------------------------------
 
@@ -1483,18 +1828,18 @@ def get_lem_layout(x_lim, y_lim, z_lim):
 
 
 # defines function for layout extraction of lemniscate figure
+# the panels can be zoomed, uirevision keeps the zoom of the user across figure updates
 def get_2d_lem_layout(x_lim, y_lim):
     return dict(
         xaxis=dict(range=x_lim,
                    autorange=False,
                    showticklabels=False,
-                   showbackground=True,
-                   fixedrange=True),
+                   showbackground=True),
         yaxis=dict(range=y_lim,
                    autorange=False,
                    showticklabels=False,
-                   showbackground=True,
-                   fixedrange=True),
+                   showbackground=True),
+        uirevision='true',
         margin=dict(
             l=0,
             r=0,
@@ -1536,7 +1881,7 @@ def get_empty_layout(x_lim, y_lim):
 
 # defines function for layout extraction of velocity graph
 def get_velocity_layout():
-    return go.Layout(
+    return dict(
         xaxis=dict(title='Time',
                    tickfont=dict(size=14),
                    titlefont=dict(size=16)),
@@ -1579,6 +1924,235 @@ def load_btn_disable(matches_json, time_value, pattern):
 
 # ----------</download btn>--------------------
 
+# ---------<Load-Images-Job section>-------
+
+# hidden divs filled by the load images jobs, in output order
+CATALOGUE_HIDDEN = ['stereo-b-hidden', 'soho-c3-hidden', 'stereo-a-hidden']
+
+# hidden divs reloaded when only an image dropdown changes
+CATALOGUE_DROPDOWNS = {'l-image-dropdown': ['stereo-b-hidden', 'stereo-a-hidden'],
+                       'c-image-dropdown': ['soho-c3-hidden']}
+
+
+# runs one catalogue query on the job executor and publishes the image array json to the session store
+def catalogue_job(report, session_id, key, date, start_time, end_time, satellite):
+    report(0.1, 'querying')
+
+    image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time, end_time, satellite)
+
+    # LASCO observer headers of the whole window are filled in one ephemeris pass
+    if satellite in (2, 3):
+        swpc_frames.index_window(image_dir)
+
+    if len(image_dir) != 0:
+        image_json = json.dumps(image_dir.tolist())
+    else:
+        image_json = EMPTY_IMAGE_JSON
+
+    swpc_session.publish(session_id, 'catalogue', key, image_json)
+    swpc_session.publish(session_id, 'catalogue-rows', key,
+                         [(str(row[0]), row[1]) for row in image_dir.tolist()] if image_dir.ndim == 2 else [])
+
+
+# builds the difference stack of a loaded window at a saturation and publishes it to the session store under its
+# hidden div, unless its panel has asked for another window or saturation in the meantime
+def stack_job(report, session_id, hidden_id, links, sat):
+    stack = swpc_utils.difference_stack(links, sat, report=report)
+
+    if swpc_session.published(session_id, 'stack-wanted', hidden_id) == (links, sat):
+        swpc_session.publish_stack(session_id, hidden_id, stack)
+
+
+# asks for the difference stack of a panel's window at the panel's saturation, every render passes both
+# the stack is built in its own job when there is none for that window and saturation yet, so the first render
+# of a window or saturation is not held up; a restored session builds its stacks after restore_job has warmed
+# the matched frames, restore_job then asks again without links
+def request_stack(session_id, hidden_id, links=None, sat=None):
+    if links is not None:
+        swpc_session.publish(session_id, 'stack-wanted', hidden_id, (links, sat))
+
+    wanted = swpc_session.published(session_id, 'stack-wanted', hidden_id)
+    stack = swpc_session.published(session_id, 'stacks', hidden_id)
+    restoring = swpc_session.published(session_id, 'restored', 'job')
+
+    if wanted is None or not 1 < len(wanted[0]) <= swpc_utils.STACK_MAX_FRAMES:
+        return
+
+    if (restoring is not None and not swpc_jobs.all_finished([restoring])) or \
+            (stack is not None and (stack['links'], stack['sat']) == wanted):
+        return
+
+    links, sat = wanted
+    swpc_jobs.submit(session_id, ('stack', hidden_id, sat, links[0], links[-1], len(links)), stack_job, session_id,
+                     hidden_id, links, sat)
+
+
+# submits the catalogue queries as background jobs and stores their ids for the progress callback
+@app.callback(dcd.Output('load-jobs-hidden', 'children'),
+              [dcd.Input('btn-load-images', 'n_clicks'),
+               dcd.Input('l-image-dropdown', 'value'),
+               dcd.Input('c-image-dropdown', 'value')],
+              [dcd.State('date-picker', 'date'),
+               dcd.State('date-time', 'value'),
+               dcd.State('end-time', 'value'),
+               dcd.State('session-id', 'children')])
+def load_images_submit(n_clicks, l_type_im, c_type_im, date, start_time, end_time, session_id):
+    ctx = dash.callback_context
+
+    button_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered and len(ctx.triggered) == 1 else None
+
+    # 1:STEREO B, 2:SOHO LASCO C2, 3:SOHO LASCO C3, 4:STEREO A
+    satellites = {'stereo-b-hidden': 1,
+                  'soho-c3-hidden': 3 if c_type_im == 'C3' else 2,
+                  'stereo-a-hidden': 4}
+
+    # a restored session has its windows from the session document, the initial query is not needed
+    if button_id is None and swpc_session.published(session_id, 'restored', 'windows', False):
+        swpc_session.publish(session_id, 'restored', 'windows', False)
+        return dash.no_update
+
+    jobs = dict()
+
+    for hidden_id in CATALOGUE_DROPDOWNS.get(button_id, CATALOGUE_HIDDEN):
+        key = (hidden_id, satellites[hidden_id], date, start_time, end_time)
+
+        jobs[hidden_id] = swpc_jobs.submit(session_id, key, catalogue_job, session_id, key, date, start_time,
+                                           end_time, satellites[hidden_id])
+
+    return json.dumps(jobs)
+
+
+# polls the load images jobs, delivering each image array once its job is done
+# a done job whose catalogue is gone from the session store belongs to a session the store has dropped
+# (see swpc_session.SESSION_LIMIT), that is reported instead of delivering an empty window
+@app.callback([dcd.Output(hidden_id, 'children') for hidden_id in CATALOGUE_HIDDEN] +
+              [dcd.Output('load-progress', 'children'),
+               dcd.Output('load-job-interval', 'disabled')],
+              [dcd.Input('load-job-interval', 'n_intervals'),
+               dcd.Input('load-jobs-hidden', 'children')],
+              [dcd.State('session-id', 'children')])
+def load_images_poll(n_intervals, jobs_json, session_id):
+    jobs = json.loads(jobs_json) if jobs_json else dict()
+
+    outputs = []
+    failed = False
+
+    for hidden_id in CATALOGUE_HIDDEN:
+        job = swpc_jobs.status(jobs[hidden_id]) if hidden_id in jobs else None
+
+        if job is not None and job['state'] == swpc_jobs.DONE and not swpc_session.published(
+                session_id, 'delivered', jobs[hidden_id], False):
+
+            image_json = swpc_session.published(session_id, 'catalogue', job['key'])
+
+            if image_json is None:
+                return [dash.no_update] * len(CATALOGUE_HIDDEN) + ['Session expired, reload the page', True]
+
+            swpc_session.publish(session_id, 'delivered', jobs[hidden_id], True)
+            swpc_session.publish(session_id, 'rows', hidden_id,
+                                 swpc_session.published(session_id, 'catalogue-rows', job['key']))
+            outputs.append(image_json)
+
+        else:
+            failed = failed or (job is not None and job['state'] == swpc_jobs.FAILED)
+            outputs.append(dash.no_update)
+
+    if swpc_jobs.all_finished(jobs.values()):
+        return outputs + ['Image query failed' if failed else '', True]
+
+    return outputs + ['Loading images: {:.0f}%'.format(100 * swpc_jobs.overall_progress(jobs.values())), False]
+
+
+# ---------</Load-Images-Job section>-------
+
+# ---------<Session-Persistence section>-------
+
+# layout of a saved session: its control values, windows and matches, published to the session store as the
+# load images and match callbacks would have; the frame cache is warmed in the background
+def restored_layout(session_id, document):
+    layout = copy.deepcopy(main_layout())
+
+    for name, value in document['controls'].items():
+        component_id, prop = name.rsplit('.', 1)
+        setattr(layout[component_id], prop, value)
+
+    for hidden_id, rows in document['windows'].items():
+        rows = [(str(timestamp), link) for timestamp, link in rows]
+        layout[hidden_id].children = json.dumps([list(row) for row in rows]) if rows else EMPTY_IMAGE_JSON
+        swpc_session.publish(session_id, 'rows', hidden_id, rows)
+
+    store = swpc_matches.MatchStore.from_json(document['matches'])
+    layout['full-matches-hidden'].children = store.to_json()
+    swpc_session.publish(session_id, 'matches', 'store', store)
+    swpc_session.publish(session_id, 'restored', 'windows', True)
+
+    # LASCO observer headers are indexed before the first render needs them, a single ephemeris pass
+    if document['windows'].get('soho-c3-hidden'):
+        swpc_frames.index_window(document['windows']['soho-c3-hidden'])
+
+    swpc_session.publish(session_id, 'restored', 'job', swpc_jobs.submit(session_id, ('restore',), restore_job,
+                                                                          session_id, document['windows'],
+                                                                          store.matches()))
+
+    return layout
+
+
+# warms the frame cache of a restored session: every matched frame and the frame before it first, as the
+# matched differences are looked at first, then asks for the difference stacks the panels want
+def restore_job(report, session_id, windows, matches):
+    links = []
+
+    for rows in windows.values():
+        index = dict((row[1], idx) for idx, row in enumerate(rows))
+
+        for match in matches:
+            idx = index.get(match['link'])
+
+            if idx:
+                links.extend([rows[idx - 1][1], rows[idx][1]])
+
+    links = list(dict.fromkeys(links))
+
+    for start in range(0, len(links), RESTORE_CHUNK):
+        swpc_utils.normalised_frames(links[start:start + RESTORE_CHUNK])
+        report(min((start + RESTORE_CHUNK) / len(links), 1.0), 'warming matched frames')
+
+    swpc_session.publish(session_id, 'restored', 'job', None)
+
+    for hidden_id in windows:
+        request_stack(session_id, hidden_id)
+
+
+# saves the session document whenever a control, the matches or the loaded windows change, swpc_persist
+# gathers the saves of a few seconds into one write
+# windows and matches are taken from the session store, a page with neither is not saved
+@app.callback(dcd.Output('session-saved', 'children'),
+              [dcd.Input(component_id, prop) for component_id, prop in PERSISTED_CONTROLS] +
+              [dcd.Input('full-matches-hidden', 'children'),
+               dcd.Input('load-progress', 'children')],
+              [dcd.State('session-id', 'children')],
+              prevent_initial_call=True)
+def save_session(*values):
+    session_id = values[-1]
+    windows = dict((hidden_id, swpc_session.published(session_id, 'rows', hidden_id)) for hidden_id in CATALOGUE_HIDDEN)
+    windows = dict((hidden_id, rows) for hidden_id, rows in windows.items() if rows)
+    store = swpc_session.published(session_id, 'matches', 'store')
+
+    if not windows and not store:
+        return dash.no_update
+
+    swpc_persist.save(session_id, {'controls': dict(('{}.{}'.format(*control), value) for control, value
+                                                    in zip(PERSISTED_CONTROLS, values)),
+                                   'windows': windows,
+                                   'matches': store.to_json() if store is not None else None})
+
+    return ['saved {} UTC '.format(datetime.utcnow().strftime('%H:%M:%S')),
+            html.A(href='{}session/{}'.format(app.config.requests_pathname_prefix, session_id),
+                   className='text-white',
+                   children=['share link'])]
+
+# ---------</Session-Persistence section>-------
+
 # ---------<IMG-Match-Callback section>-------
 
 # callback for long slider disable
@@ -1615,7 +2189,8 @@ def l_stretch_bot_text_update(stretch):
 # callback for L-stretch-bot value reset
 @app.callback(
     dcd.Output('L-stretch-bot-slider', 'value'),
-    [dcd.Input('L-Reset', 'n_clicks')]
+    [dcd.Input('L-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def l_stretch_bot_reset(n_clicks):
     return 255
@@ -1633,7 +2208,8 @@ def l_stretch_top_text_update(stretch):
 # callback for L-stretch-top value reset
 @app.callback(
     dcd.Output('L-stretch-top-slider', 'value'),
-    [dcd.Input('L-Reset', 'n_clicks')]
+    [dcd.Input('L-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def l_stretch_top_reset(n_clicks):
     return 0
@@ -1651,7 +2227,8 @@ def l_gamma_text_update(stretch):
 # callback for L-gamma value reset
 @app.callback(
     dcd.Output('L-gamma-slider', 'value'),
-    [dcd.Input('L-Reset', 'n_clicks')]
+    [dcd.Input('L-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def l_gamma_reset(n_clicks):
     return 1
@@ -1669,10 +2246,21 @@ def l_saturation_text_update(stretch):
 # callback for L-saturation value reset
 @app.callback(
     dcd.Output('L-saturation-slider', 'value'),
-    [dcd.Input('L-Reset', 'n_clicks')]
+    [dcd.Input('L-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def l_saturation_reset(n_clicks):
-    return 1
+    return swpc_api.SATURATIONS['Stereo-B']
+
+
+# callback for L-difference-mode value reset
+@app.callback(
+    dcd.Output('L-difference-mode', 'value'),
+    [dcd.Input('L-Reset', 'n_clicks')],
+    prevent_initial_call=True
+)
+def l_difference_mode_reset(n_clicks):
+    return 'running'
 
 
 # ---------</L-tab-callback section>-------
@@ -1692,7 +2280,8 @@ def c_stretch_bot_text_update(stretch):
 # callback for C-stretch-bot value reset
 @app.callback(
     dcd.Output('C-stretch-bot-slider', 'value'),
-    [dcd.Input('C-Reset', 'n_clicks')]
+    [dcd.Input('C-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def c_stretch_bot_reset(n_clicks):
     return 255
@@ -1710,7 +2299,8 @@ def c_stretch_top_text_update(stretch):
 # callback for C-stretch-top value reset
 @app.callback(
     dcd.Output('C-stretch-top-slider', 'value'),
-    [dcd.Input('C-Reset', 'n_clicks')]
+    [dcd.Input('C-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def c_stretch_top_reset(n_clicks):
     return 0
@@ -1728,7 +2318,8 @@ def c_gamma_text_update(stretch):
 # callback for C-gamma value reset
 @app.callback(
     dcd.Output('C-gamma-slider', 'value'),
-    [dcd.Input('C-Reset', 'n_clicks')]
+    [dcd.Input('C-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def c_gamma_reset(n_clicks):
     return 1
@@ -1746,10 +2337,21 @@ def c_saturation_text_update(stretch):
 # callback for C-saturation value reset
 @app.callback(
     dcd.Output('C-saturation-slider', 'value'),
-    [dcd.Input('C-Reset', 'n_clicks')]
+    [dcd.Input('C-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def c_saturation_reset(n_clicks):
-    return 3
+    return swpc_api.SATURATIONS['SOHO C3']
+
+
+# callback for C-difference-mode value reset
+@app.callback(
+    dcd.Output('C-difference-mode', 'value'),
+    [dcd.Input('C-Reset', 'n_clicks')],
+    prevent_initial_call=True
+)
+def c_difference_mode_reset(n_clicks):
+    return 'running'
 
 
 # ---------</C-tab-callback section>-------
@@ -1769,7 +2371,8 @@ def r_stretch_bot_text_update(stretch):
 # callback for R-stretch-bot value reset
 @app.callback(
     dcd.Output('R-stretch-bot-slider', 'value'),
-    [dcd.Input('R-Reset', 'n_clicks')]
+    [dcd.Input('R-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def r_stretch_bot_reset(n_clicks):
     return 255
@@ -1787,7 +2390,8 @@ def r_stretch_top_text_update(stretch):
 # callback for R-stretch-top value reset
 @app.callback(
     dcd.Output('R-stretch-top-slider', 'value'),
-    [dcd.Input('R-Reset', 'n_clicks')]
+    [dcd.Input('R-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def r_stretch_top_reset(n_clicks):
     return 0
@@ -1805,7 +2409,8 @@ def r_gamma_text_update(stretch):
 # callback for R-gamma value reset
 @app.callback(
     dcd.Output('R-gamma-slider', 'value'),
-    [dcd.Input('R-Reset', 'n_clicks')]
+    [dcd.Input('R-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def r_gamma_reset(n_clicks):
     return 1
@@ -1823,10 +2428,21 @@ def r_saturation_text_update(stretch):
 # callback for R-saturation value reset
 @app.callback(
     dcd.Output('R-saturation-slider', 'value'),
-    [dcd.Input('R-Reset', 'n_clicks')]
+    [dcd.Input('R-Reset', 'n_clicks')],
+    prevent_initial_call=True
 )
 def r_saturation_reset(n_clicks):
-    return 1
+    return swpc_api.SATURATIONS['Stereo-A']
+
+
+# callback for R-difference-mode value reset
+@app.callback(
+    dcd.Output('R-difference-mode', 'value'),
+    [dcd.Input('R-Reset', 'n_clicks')],
+    prevent_initial_call=True
+)
+def r_difference_mode_reset(n_clicks):
+    return 'running'
 
 
 # ---------</R-tab-callback section>-------
@@ -1851,7 +2467,8 @@ def rad_text_update(radial_v):
     [dcd.Input('CME-Reset', 'n_clicks_timestamp'),
      dcd.Input('left_rad_btn', 'n_clicks_timestamp'),
      dcd.Input('right_rad_btn', 'n_clicks_timestamp')],
-    [dcd.State('radial-slider', 'value')]
+    [dcd.State('radial-slider', 'value')],
+    prevent_initial_call=True
 )
 def radial_reset(reset, left_btn, right_btn, slider_val):
     if right_btn > left_btn and right_btn > reset:
@@ -1905,7 +2522,8 @@ def angular_text_update(angular_v):
     [dcd.Input('CME-Reset', 'n_clicks_timestamp'),
      dcd.Input('left_ang_btn', 'n_clicks_timestamp'),
      dcd.Input('right_ang_btn', 'n_clicks_timestamp')],
-    [dcd.State('angular-slider', 'value')]
+    [dcd.State('angular-slider', 'value')],
+    prevent_initial_call=True
 )
 def angular_reset(reset, left_btn, right_btn, slider_val):
     if right_btn > left_btn and right_btn > reset:
@@ -1959,7 +2577,8 @@ def lat_text_update(lat):
     [dcd.Input('CME-Reset', 'n_clicks_timestamp'),
      dcd.Input('left_lat_btn', 'n_clicks_timestamp'),
      dcd.Input('right_lat_btn', 'n_clicks_timestamp')],
-    [dcd.State('lat-slider', 'value')]
+    [dcd.State('lat-slider', 'value')],
+    prevent_initial_call=True
 )
 def lat_reset(reset, left_btn, right_btn, slider_val):
     if right_btn > left_btn and right_btn > reset:
@@ -2013,7 +2632,8 @@ def rad_text_update(long):
     [dcd.Input('CME-Reset', 'n_clicks_timestamp'),
      dcd.Input('left_long_btn', 'n_clicks_timestamp'),
      dcd.Input('right_long_btn', 'n_clicks_timestamp')],
-    [dcd.State('long-slider', 'value')]
+    [dcd.State('long-slider', 'value')],
+    prevent_initial_call=True
 )
 def long_reset(reset, left_btn, right_btn, slider_val):
     if right_btn > left_btn and right_btn > reset:
@@ -2215,7 +2835,8 @@ def show_hide_stereo_b(disabled):
      dcd.State('stereo-a-hidden', 'children'),
      dcd.State('soho-c3-hidden', 'children'),
      dcd.State('r-image-slider', 'value'),
-     dcd.State('c-image-slider', 'value')]
+     dcd.State('c-image-slider', 'value')],
+    prevent_initial_call=True
 )
 def l_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_r, time_import_btn_c, slider_val, stereo_b_json,
                       stereo_a_json, soho_json, r_slider, c_slider):
@@ -2281,26 +2902,6 @@ def l_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_r, time_imp
         return 1
 
 
-# loads header data to intermediate hidden div for later extraction in each of the callbacks
-@app.callback(dcd.Output('stereo-b-hidden', 'children'),
-              [dcd.Input('btn-load-images', 'n_clicks'),
-               dcd.Input('l-image-dropdown', 'value')],
-              [dcd.State('date-picker', 'date'),
-               dcd.State('date-time', 'value'),
-               dcd.State('end-time', 'value')])
-def stereo_b_img_arr_load(n_clicks, type_im, date, start_time, end_time):
-    # test directory link to stereo B
-
-    image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time, end_time, 1)
-
-    if len(image_dir) != 0:
-
-        return json.dumps(image_dir.tolist())
-
-    else:
-        return json.dumps(np.empty(1).tolist())
-
-
 # callback for image  value text
 @app.callback(
     dcd.Output('l-image-text', 'children'),
@@ -2321,57 +2922,6 @@ def l_image_text_update(trigger, slider_val, image_json):
         return ''
 
 
-# callback for 2d-l-lemniscate plot
-@app.callback(
-    dcd.Output('2d-l-lemniscate', 'figure'),
-    [dcd.Input('radial-slider', 'value'),
-     dcd.Input('angular-slider', 'value'),
-     dcd.Input('long-slider', 'value'),
-     dcd.Input('lat-slider', 'value'),
-     dcd.Input('L-stretch-bot-slider', 'value'),
-     dcd.Input('L-stretch-top-slider', 'value'),
-     dcd.Input('L-gamma-slider', 'value'),
-     dcd.Input('L-saturation-slider', 'value'),
-     dcd.Input('stereo-b-hidden', 'children'),
-     dcd.Input('l-image-slider', 'value')
-     ])
-# function for graph update when sliders are changed
-def left_lemniscate_update(radial, angular, long, lat, stretch_bot, stretch_top, gamma, saturation, image_json,
-                           slider_val):
-    global n
-
-    # extract jsonified image array
-    image_dir = np.array(pd.read_json(image_json)).tolist()
-
-    if len(image_dir) != 1:
-
-
-        observer, current_map, previous_map = swpc_utils.new_map(image_dir[slider_val][1], image_dir[slider_val - 1][1],
-                                                                 saturation)
-
-        hull = swpc_utils.return_plot(observer, -1, radial, angular, long, lat)
-
-        image_data = swpc_utils.return_image(observer.data, gamma, stretch_top, stretch_bot)
-
-        trace = go.Scatter(x=hull[0, :], y=hull[1, :], mode='lines',
-                           line=dict(color='rgb(255, 255, 0)'))
-        trace1 = go.Scatter(x=[hull[0, 0], hull[0, - 1]],
-                            y=[hull[1, 0], hull[1, - 1]], mode='lines',
-                            line=dict(color='rgb(255, 255, 0)'))
-
-        trace2 = go.Heatmap(z=image_data,
-                            x=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            y=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            colorscale='Greys',
-                            showscale=False,
-                            )
-        return dict(data=[trace, trace1, trace2], layout=layout_two_d_lemniscate)
-
-    else:
-
-        return dict(layout=empty_layout)
-
-
 # ---------</2D-L-Plot-Callback section>-------
 
 
@@ -2497,7 +3047,8 @@ def show_hide_soho(disabled):
      dcd.State('r-image-slider', 'value'),
      dcd.State('soho-c3-hidden', 'children'),
      dcd.State('stereo-a-hidden', 'children'),
-     dcd.State('stereo-b-hidden', 'children')]
+     dcd.State('stereo-b-hidden', 'children')],
+    prevent_initial_call=True
 )
 def c_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_r, time_import_btn_l, slider_val, l_slider,
                       r_slider, soho_json, stereo_a_json, stereo_b_json):
@@ -2557,30 +3108,6 @@ def c_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_r, time_imp
         return 1
 
 
-# loads header data to intermediate hidden div for later extraction in each of the callbacks
-@app.callback(dcd.Output('soho-c3-hidden', 'children'),
-              [dcd.Input('btn-load-images', 'n_clicks'),
-               dcd.Input('c-image-dropdown', 'value')],
-              [dcd.State('date-picker', 'date'),
-               dcd.State('date-time', 'value'),
-               dcd.State('end-time', 'value')])
-def soho_img_arr_load(n_clicks, type_im, date, start_time, end_time):
-
-    if type_im == 'C3':
-
-        image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time,end_time, 3)
-    else:
-
-        image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time,end_time, 2)
-
-    if len(image_dir) != 0:
-
-        return json.dumps(image_dir.tolist())
-
-    else:
-        return json.dumps(np.empty(1).tolist())
-
-
 # callback for image  value text
 @app.callback(
     dcd.Output('c-image-text', 'children'),
@@ -2601,56 +3128,6 @@ def c_image_text_update(trigger, slider_val, image_json):
         return ''
 
 
-# callback for 2d-c-lemniscate plot
-@app.callback(
-    dcd.Output('2d-c-lemniscate', 'figure'),
-    [dcd.Input('radial-slider', 'value'),
-     dcd.Input('angular-slider', 'value'),
-     dcd.Input('long-slider', 'value'),
-     dcd.Input('lat-slider', 'value'),
-     dcd.Input('C-stretch-bot-slider', 'value'),
-     dcd.Input('C-stretch-top-slider', 'value'),
-     dcd.Input('C-gamma-slider', 'value'),
-     dcd.Input('C-saturation-slider', 'value'),
-     dcd.Input('soho-c3-hidden', 'children'),
-     dcd.Input('c-image-slider', 'value')
-     ])
-# function for graph update when slider is changed
-def center_lemniscate_update(radial, angular, long, lat, stretch_bot, stretch_top, gamma, saturation, image_json,
-                             slider_val):
-
-    # extract jsonified image array
-    image_dir = np.array(pd.read_json(image_json)).tolist()
-
-    if len(image_dir) != 1:
-
-        observer, current_map, previous_map = swpc_utils.new_map(image_dir[slider_val][1], image_dir[slider_val - 1][1],
-                                                                 saturation)
-
-        hull = swpc_utils.return_plot(observer, 0, radial, angular, long, lat)
-
-        image_data = swpc_utils.return_image(observer.data, gamma, stretch_top, stretch_bot)
-
-        trace = go.Scatter(x=hull[0, :], y=hull[1, :], mode='lines',
-                           line=dict(color='rgb(255, 255, 0)'))
-        trace1 = go.Scatter(x=[hull[0, 0], hull[0, - 1]],
-                            y=[hull[1, 0], hull[1, - 1]], mode='lines',
-                            line=dict(color='rgb(255, 255, 0)'))
-
-        trace2 = go.Heatmap(z=image_data,
-                            x=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            y=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            colorscale='Greys',
-                            showscale=False,
-                            )
-
-        return dict(data=[trace, trace1, trace2], layout=layout_two_d_lemniscate)
-
-    else:
-
-        return dict(layout=empty_layout)
-
-
 # ---------</2D-C-Plot-Callback section>-------
 
 
@@ -2776,7 +3253,8 @@ def show_hide_stereo_a(disabled):
      dcd.State('c-image-slider', 'value'),
      dcd.State('soho-c3-hidden', 'children'),
      dcd.State('stereo-a-hidden', 'children'),
-     dcd.State('stereo-b-hidden', 'children')]
+     dcd.State('stereo-b-hidden', 'children')],
+    prevent_initial_call=True
 )
 def r_image_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_l, time_import_btn_c, slider_val, l_slider,
                             c_slider, soho_json, stereo_a_json, stereo_b_json):
@@ -2842,25 +3320,6 @@ def r_image_slider_btn_move(load_btn, right_btn, left_btn, time_import_btn_l, ti
         return 1
 
 
-# loads header data to intermediate hidden div for later extraction in each of the callbacks
-@app.callback(dcd.Output('stereo-a-hidden', 'children'),
-              [dcd.Input('btn-load-images', 'n_clicks'),
-               dcd.Input('l-image-dropdown', 'value')],
-              [dcd.State('date-picker', 'date'),
-               dcd.State('date-time', 'value'),
-               dcd.State('end-time', 'value')])
-def stereo_a_img_arr_load(n_clicks, type_im, date, start_time, end_time):
-
-    image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time, end_time, 4)
-
-    if len(image_dir) != 0:
-
-        return json.dumps(image_dir.tolist())
-
-    else:
-        return json.dumps(np.empty(1).tolist())
-
-
 # callback for image  value text
 @app.callback(
     dcd.Output('r-image-text', 'children'),
@@ -2881,57 +3340,342 @@ def r_image_text_update(trigger, slider_val, image_json):
         return ''
 
 
-# callback for 2d-r-lemniscate plot
-@app.callback(
-    dcd.Output('2d-r-lemniscate', 'figure'),
-    [dcd.Input('radial-slider', 'value'),
-     dcd.Input('angular-slider', 'value'),
-     dcd.Input('long-slider', 'value'),
-     dcd.Input('lat-slider', 'value'),
-     dcd.Input('R-stretch-bot-slider', 'value'),
-     dcd.Input('R-stretch-top-slider', 'value'),
-     dcd.Input('R-gamma-slider', 'value'),
-     dcd.Input('R-saturation-slider', 'value'),
-     dcd.Input('stereo-a-hidden', 'children'),
-     dcd.Input('r-image-slider', 'value')])
-# function for graph update when slider is changed
-def right_lemniscate_update(radial, angular, long, lat, stretch_bot, stretch_top, gamma, saturation, image_json,
-                            slider_val):
-    global n
+# ---------</2D-R-Plot-Callback section>-------
+
+# ---------<2D-Plot-Callback section>-------
+
+# panel definitions shared by the 2d lemniscate plots
+# sat_id is the observer id used by swpc_utils.observer_geometry
+PANELS = [
+    {'graph': '2d-l-lemniscate', 'tab': 'L', 'slider': 'l-image-slider', 'hidden': 'stereo-b-hidden', 'sat_id': -1,
+     'instrument': 'Stereo-B'},
+    {'graph': '2d-c-lemniscate', 'tab': 'C', 'slider': 'c-image-slider', 'hidden': 'soho-c3-hidden', 'sat_id': 0,
+     'instrument': 'SOHO C3'},
+    {'graph': '2d-r-lemniscate', 'tab': 'R', 'slider': 'r-image-slider', 'hidden': 'stereo-a-hidden', 'sat_id': 1,
+     'instrument': 'Stereo-A'},
+]
 
-    # extract jsonified image array
-    image_dir = np.array(pd.read_json(image_json)).tolist()
+# sliders shared by all of the 2d lemniscate plots
+GEOMETRY_INPUTS = ['radial-slider', 'angular-slider', 'long-slider', 'lat-slider']
 
-    if len(image_dir) != 1:
 
-        observer, current_map, previous_map = swpc_utils.new_map(image_dir[slider_val][1], image_dir[slider_val - 1][1],
-                                                                 saturation)
+# axis ranges of a 2d panel after a relayout event: a dict with 'x' and 'y' ranges (grid units), None for the
+# full view, or dash.no_update when the event does not move the view (autosize, drag mode changes)
+def panel_viewport(relayout, viewport):
+    if not relayout:
+        return dash.no_update
 
-        hull = swpc_utils.return_plot(observer, 1, radial, angular, long, lat)
+    if relayout.get('xaxis.autorange') or relayout.get('yaxis.autorange'):
+        return None
 
-        image_data = swpc_utils.return_image(observer.data, gamma, stretch_top, stretch_bot)
+    ranges = dict()
 
-        trace = go.Scatter(x=hull[0, :], y=hull[1, :], mode='lines',
-                           line=dict(color='rgb(255, 255, 0)'))
-        trace1 = go.Scatter(x=[hull[0, 0], hull[0, - 1]],
-                            y=[hull[1, 0], hull[1, - 1]], mode='lines',
-                            line=dict(color='rgb(255, 255, 0)'))
+    for axis in ['x', 'y']:
+        if axis + 'axis.range[0]' in relayout:
+            ranges[axis] = [relayout[axis + 'axis.range[0]'], relayout[axis + 'axis.range[1]']]
+        elif axis + 'axis.range' in relayout:
+            ranges[axis] = list(relayout[axis + 'axis.range'])
 
-        trace2 = go.Heatmap(z=image_data,
-                            x=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            y=np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, 256),
-                            colorscale='Greys',
-                            showscale=False,
-                            )
+    if not ranges:
+        return dash.no_update
 
-        return dict(data=[trace, trace1, trace2], layout=layout_two_d_lemniscate)
+    full_range = [-GRID_HALF_WIDTH, GRID_HALF_WIDTH]
+    new_viewport = dict(viewport or {'x': full_range, 'y': full_range})
+    new_viewport.update(ranges)
 
-    else:
+    return new_viewport
 
-        return dict(layout=empty_layout)
 
+# pyramid level a viewport is shown at
+def viewport_level(viewport):
+    if viewport is None:
+        return swpc_utils.FRAME_SHAPE[0]
 
-# ---------</2D-R-Plot-Callback section>-------
+    return swpc_utils.pyramid_level(min(abs(viewport['x'][1] - viewport['x'][0]),
+                                        abs(viewport['y'][1] - viewport['y'][0])))
+
+
+# whether one of the triggered inputs is a control, the catalogue or the image slider of a panel
+def panel_triggered(panel, triggered):
+    return any(trigger.startswith(panel['tab'] + '-') or trigger in (panel['hidden'], panel['slider'])
+               for trigger in triggered)
+
+
+# stores the viewport of a panel after a relayout event
+# returns True when the panel has to be redrawn, i.e. the view is or was shown above the overview level
+def update_viewport(session_id, graph_id, relayout):
+    viewport = swpc_session.published(session_id, 'viewport', graph_id)
+    new_viewport = panel_viewport(relayout, viewport)
+
+    if new_viewport is dash.no_update:
+        return False
+
+    swpc_session.publish(session_id, 'viewport', graph_id, new_viewport)
+
+    return max(viewport_level(viewport), viewport_level(new_viewport)) > swpc_utils.FRAME_SHAPE[0]
+
+
+# builds the 2d lemniscate figure from a difference image and its silhouette
+# grid holds the x and y coordinates of a zoomed crop, the overview spans the whole grid
+def two_d_lemniscate_figure(image_data, hull, grid=None):
+    trace = go.Scatter(x=hull[0, :], y=hull[1, :], mode='lines',
+                       line=dict(color='rgb(255, 255, 0)'))
+    trace1 = go.Scatter(x=[hull[0, 0], hull[0, - 1]],
+                        y=[hull[1, 0], hull[1, - 1]], mode='lines',
+                        line=dict(color='rgb(255, 255, 0)'))
+
+    if grid is None:
+        grid = (np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, np.shape(image_data)[1]),
+                np.linspace(-GRID_HALF_WIDTH, GRID_HALF_WIDTH, np.shape(image_data)[0]))
+
+    trace2 = go.Heatmap(z=image_data,
+                        x=grid[0],
+                        y=grid[1],
+                        colorscale='Greys',
+                        showscale=False,
+                        )
+
+    return dict(data=[trace, trace1, trace2], layout=layout_two_d_lemniscate)
+
+
+# callback for all of the 2d lemniscate plots
+# a geometry change projects the lemniscate into every observer with one batched solve,
+# a panel control change only redraws that panel
+@app.callback(
+    [dcd.Output(panel['graph'], 'figure') for panel in PANELS] +
+    [dcd.Output('hull-refine-interval', 'disabled')],
+    [dcd.Input(slider_id, 'value') for slider_id in GEOMETRY_INPUTS] +
+    [dcd.Input(component_id, prop)
+     for panel in PANELS
+     for component_id, prop in [(panel['tab'] + '-stretch-bot-slider', 'value'),
+                                (panel['tab'] + '-stretch-top-slider', 'value'),
+                                (panel['tab'] + '-gamma-slider', 'value'),
+                                (panel['tab'] + '-saturation-slider', 'value'),
+                                (panel['tab'] + '-difference-mode', 'value'),
+                                (panel['hidden'], 'children'),
+                                (panel['slider'], 'value'),
+                                (panel['graph'], 'relayoutData')]] +
+    [dcd.Input('hull-refine-interval', 'n_intervals')],
+    [dcd.State('session-id', 'children')])
+# function for graph update when sliders are changed
+# every redrawn panel gets a render token, a render overtaken by a newer one for the same panel
+# is dropped at the next stage boundary and leaves its figure untouched
+# a zoomed panel shows the visible region from the resolution pyramid level the zoom needs
+# the difference stack of a window serves running differences only, base and ratio differences are built from
+# the frame cache
+# with the hull lattice on, silhouettes come from the nearest lattice point first and the panels are redrawn
+# with the exact silhouette once the refine interval fires
+def lemniscate_update(radial, angular, long, lat, *panel_values):
+    panel_values, session_id = panel_values[:-2], panel_values[-1]
+
+    ctx = dash.callback_context
+
+    triggered = set(trigger['prop_id'].split('.')[0] for trigger in ctx.triggered) if ctx.triggered else set()
+
+    redraw_all = not ctx.triggered or any(slider_id in triggered for slider_id in GEOMETRY_INPUTS)
+
+    refining = 'hull-refine-interval' in triggered
+
+    figures = [dash.no_update] * len(PANELS)
+    geometries = [None] * len(PANELS)
+    images = [None] * len(PANELS)
+    grids = [None] * len(PANELS)
+    tokens = [None] * len(PANELS)
+
+    # a render that raises still forgets its token, so no panel is left registered for an expired session
+    try:
+        for idx, panel in enumerate(PANELS):
+            stretch_bot, stretch_top, gamma, saturation, mode, image_json, slider_val, relayout = \
+                panel_values[idx * 8:idx * 8 + 8]
+
+            zoomed = panel['graph'] in triggered and update_viewport(session_id, panel['graph'], relayout)
+
+            refine = refining and swpc_session.published(session_id, 'approximate', panel['graph'], False)
+
+            if not (redraw_all or zoomed or refine or panel_triggered(panel, triggered)):
+                continue
+
+            # extract jsonified image array
+            image_dir = np.array(pd.read_json(image_json)).tolist()
+
+            if len(image_dir) != 1:
+
+                tokens[idx] = swpc_session.begin_render(session_id, panel['graph'])
+                checkpoint = swpc_session.render_checkpoint(session_id, panel['graph'], tokens[idx])
+
+                links = (image_dir[slider_val][1], image_dir[0 if mode == 'base' else slider_val - 1][1])
+                request_stack(session_id, panel['hidden'], [row[1] for row in image_dir], saturation)
+
+                # scrubbing through a window with a built difference stack is an array lookup
+                stacked = swpc_utils.stack_map(swpc_session.published(session_id, 'stacks', panel['hidden']),
+                                               links[0], links[1], saturation) if mode == 'running' else None
+
+                try:
+                    if stacked is not None:
+                        image = swpc_api.DifferenceImage.from_map(stacked, panel['sat_id'], links, saturation)
+                    else:
+                        image = swpc_api.DifferenceImage.from_links(links[0], links[1], panel['sat_id'], saturation,
+                                                                    mode, checkpoint=checkpoint)
+
+                    geometries[idx] = image.observer.geometry
+
+                    viewport = swpc_session.published(session_id, 'viewport', panel['graph'])
+                    zoom = image.zoom(viewport['x'], viewport['y'], checkpoint) if viewport is not None else None
+                except swpc_session.RenderCancelled:
+                    tokens[idx] = None
+                    continue
+
+                if zoom is not None:
+                    image_data, grid_x, grid_y = zoom
+                    grids[idx] = (grid_x, grid_y)
+                    images[idx] = swpc_utils.return_image(image_data, gamma, stretch_top, stretch_bot)
+                else:
+                    images[idx] = swpc_utils.return_image(image.data, gamma, stretch_top, stretch_bot,
+                                                          panel=panel['graph'])
+
+            else:
+
+                figures[idx] = dict(layout=empty_layout)
+                swpc_session.publish(session_id, 'geometry', panel['graph'], None)
+
+        radial, angular, long, lat = swpc_utils.quantise_sliders(radial, angular, long, lat)
+        hulls, from_lattice = swpc_hulls.observer_hulls(geometries, radial, angular, long, lat,
+                                                        approximate=swpc_hulls.HULL_LATTICE and not refining)
+
+        for idx, geometry in enumerate(geometries):
+            if geometry is not None:
+                swpc_hulls.request_lattice(geometry)
+                swpc_session.publish(session_id, 'geometry', PANELS[idx]['graph'], geometry)
+                swpc_session.publish(session_id, 'approximate', PANELS[idx]['graph'], from_lattice[idx])
+
+        for idx, hull in enumerate(hulls):
+            if hull is None:
+                continue
+
+            try:
+                swpc_session.check_render(session_id, PANELS[idx]['graph'], tokens[idx], 'serialise')
+            except swpc_session.RenderCancelled:
+                continue
+
+            figures[idx] = two_d_lemniscate_figure(images[idx], hull, grids[idx])
+            swpc_session.end_render(session_id, PANELS[idx]['graph'], tokens[idx])
+
+        return figures + [not any(from_lattice)]
+    finally:
+        for idx, token in enumerate(tokens):
+            if token is not None:
+                swpc_session.forget_render(session_id, PANELS[idx]['graph'], token)
+
+
+# ---------</2D-Plot-Callback section>-------
+
+# ---------<Playback-Callback section>-------
+
+# starts and stops the movie playback of a panel in the browser (assets/playback.js)
+# the decoded difference stack is kept per panel and only fetched again once the stack changed, the frames and
+# the silhouette of the current figure are then drawn client side without any further server request
+def playback_callback(panel):
+    app.clientside_callback(
+        dcd.ClientsideFunction(namespace='swpc_cat', function_name='toggle_playback'),
+        [dcd.Output('play-canvas-' + panel['tab'].lower(), 'style'),
+         dcd.Output('play-btn-' + panel['tab'].lower(), 'children')],
+        [dcd.Input('play-btn-' + panel['tab'].lower(), 'n_clicks'),
+         dcd.Input('play-speed-' + panel['tab'].lower(), 'value')],
+        [dcd.State(panel['graph'], 'figure'),
+         dcd.State('session-id', 'children'),
+         dcd.State(panel['tab'] + '-stretch-top-slider', 'value'),
+         dcd.State(panel['tab'] + '-stretch-bot-slider', 'value'),
+         dcd.State(panel['tab'] + '-gamma-slider', 'value'),
+         dcd.State('play-canvas-' + panel['tab'].lower(), 'id'),
+         dcd.State(panel['hidden'], 'id')])
+
+
+# link to a movie in the movie cache
+def movie_link(key, fmt):
+    return html.A(href='{}movie/{}/{}'.format(app.config.requests_pathname_prefix, key, fmt),
+                  children=['movie'])
+
+
+# renders the loaded window of a panel as a movie with the current silhouette and display, as a background job
+# whose progress is polled; a movie rendered before from the same inputs is linked straight away
+# the movie is made from the difference stack at the panel saturation, a stack of another window or saturation
+# is rebuilt first and the movie asked for again once it is there
+def movie_callback(panel):
+    tab = panel['tab'].lower()
+
+    @app.callback([dcd.Output('movie-job-' + tab, 'children'),
+                   dcd.Output('movie-result-' + tab, 'children'),
+                   dcd.Output('movie-interval-' + tab, 'disabled')],
+                  [dcd.Input('movie-btn-' + tab, 'n_clicks'),
+                   dcd.Input('movie-interval-' + tab, 'n_intervals')],
+                  [dcd.State('radial-slider', 'value'),
+                   dcd.State('angular-slider', 'value'),
+                   dcd.State('long-slider', 'value'),
+                   dcd.State('lat-slider', 'value'),
+                   dcd.State(panel['tab'] + '-gamma-slider', 'value'),
+                   dcd.State(panel['tab'] + '-stretch-top-slider', 'value'),
+                   dcd.State(panel['tab'] + '-stretch-bot-slider', 'value'),
+                   dcd.State(panel['tab'] + '-saturation-slider', 'value'),
+                   dcd.State('play-speed-' + tab, 'value'),
+                   dcd.State('movie-format-' + tab, 'value'),
+                   dcd.State('movie-job-' + tab, 'children'),
+                   dcd.State('session-id', 'children')])
+    def movie_update(n_clicks, n_intervals, radial, angular, long, lat, gamma, stretch_top, stretch_bot, saturation,
+                     fps, fmt, job_id, session_id):
+        ctx = dash.callback_context
+
+        if ctx.triggered and ctx.triggered[0]['prop_id'] == 'movie-btn-{}.n_clicks'.format(tab) and n_clicks:
+            stack = swpc_session.published(session_id, 'stacks', panel['hidden'])
+            rows = swpc_session.published(session_id, 'rows', panel['hidden'])
+
+            if rows is None or not 1 < len(rows) <= swpc_utils.STACK_MAX_FRAMES:
+                return '', 'no difference stack loaded', True
+
+            links = [row[1] for row in rows]
+
+            if stack is None or stack['sat'] != saturation or list(stack['links']) != links:
+                request_stack(session_id, panel['hidden'], links, saturation)
+                return '', 'building the stack at saturation {}, ask again shortly'.format(saturation), True
+
+            parameters = (radial, angular, long, lat)
+            display = (gamma, stretch_top, stretch_bot)
+            key = swpc_movie.movie_key(links, saturation, panel['sat_id'], parameters, display, fps, fmt)
+
+            if swpc_movie.cached_movie(key, fmt) is not None:
+                return '', movie_link(key, fmt), True
+
+            titles = ['{} {}'.format(panel['instrument'], row[0]) for row in rows[1:len(stack['links'])]]
+            job_id = swpc_jobs.submit(session_id, ('movie', key), swpc_movie.render_movie, key, stack,
+                                      panel['sat_id'], titles, swpc_api.Lemniscate(*parameters), display, fps, fmt)
+
+            return job_id, 'rendering movie', False
+
+        job = swpc_jobs.status(job_id) if job_id else None
+
+        if job is None:
+            return '', dash.no_update, True
+
+        if job['state'] == swpc_jobs.FAILED:
+            return '', 'movie failed: ' + job['error'], True
+
+        if job['state'] == swpc_jobs.DONE:
+            return '', movie_link(*job['result']), True
+
+        return job_id, 'rendering movie {:.0%}'.format(job['progress']), False
+
+    return movie_update
+
+
+# registered in a function, so no panel is left behind at module level
+def panel_playback_callbacks():
+    for panel in PANELS:
+        playback_callback(panel)
+        movie_callback(panel)
+
+
+panel_playback_callbacks()
+
+# ---------</Playback-Callback section>-------
 
 # ---------<Velocity Graph section>-------
 
@@ -2939,105 +3683,118 @@ def right_lemniscate_update(radial, angular, long, lat, stretch_bot, stretch_top
 
 @app.callback(dcd.Output('velocity-graph', 'figure'),
               [dcd.Input('full-matches-hidden','children')],
+              [dcd.State('session-id', 'children')]
               )
-def velocity_graph_update(match_list):
+def velocity_graph_update(match_list, session_id):
+
+    fit = session_fit(session_id, match_list)
+
+    if fit.result is None:
+        return dict(data=[], layout=empty_layout)
+
+    # matches of each instrument
+    timestamps = np.array(fit.timestamps)
+    stereo_b = fit.instruments == "Stereo-B"
+    soho = fit.instruments == "SOHO C3"
+    stereo_a = fit.instruments == "Stereo-A"
+
+    trace = go.Scatter(x=timestamps[stereo_b], y=fit.radial[stereo_b], mode='markers', name='Stereo B',
+                       marker=dict(
+        size=20,
+        color='rgba(0,0,255,1)',
+        symbol='square',
+        line=dict(
+            width=2)))
+    trace1 = go.Scatter(x=timestamps[soho], y=fit.radial[soho], mode='markers', name='SOHO', marker=dict(
+        size=20,
+        color='rgba(0,128,0,1)',
+        symbol='square',
+        line=dict(
+            width=2)))
+    trace2 = go.Scatter(x=timestamps[stereo_a], y=fit.radial[stereo_a], mode='markers', name='Stereo A',
+                        marker=dict(
+        size=20,
+        color='rgba( 255, 0, 0,1)',
+        symbol='square',
+        line=dict(
+            width=2)))
+
+    if fit.valid:
+        # Generated linear fit
+        trace3 = go.Scatter(x=fit.timestamps, y=fit.line, mode='lines', name='Linear fit', marker=dict(
+            size=2,
+            color='rgba(242, 38, 19, 1)',
+            line=dict(
+                width=2)))
 
-    matches = json.loads(match_list)
+        return dict(data=[trace, trace1, trace2, trace3], layout=layout_velocity)
 
-    if len(matches["matches"]) > 0:
-        full_match_list = []
-        stereo_b_list = []
-        soho_list = []
-        stereo_a_list = []
+    return dict(data=[trace, trace1, trace2], layout=layout_velocity)
 
-        for d in matches["matches"]:
 
-            if d['instrument'] == "Stereo-B":
-                stereo_b_list.append(d['timestamp'])
-                stereo_b_list.append(d['radial'])
+# ---------</Velocity Graph section>-------
 
-            if d['instrument'] == "SOHO C3":
-                soho_list.append(d['timestamp'])
-                soho_list.append(d['radial'])
 
-            if d['instrument'] == "Stereo-A":
-                stereo_a_list.append(d['timestamp'])
-                stereo_a_list.append(d['radial'])
+# ---------<Matching section>-------
 
-        trace = go.Scatter(x=stereo_b_list[0::2], y=stereo_b_list[1::2], mode='markers', name='Stereo B', marker=dict(
-            size=20,
-            color='rgba(0,0,255,1)',
-            symbol='square',
-            line=dict(
-                width=2)))
-        trace1 = go.Scatter(x=soho_list[0::2], y=soho_list[1::2], mode='markers', name='SOHO', marker=dict(
-            size=20,
-            color='rgba(0,128,0,1)',
-            symbol='square',
-            line=dict(
-                width=2)))
-        trace2 = go.Scatter(x=stereo_a_list[0::2], y=stereo_a_list[1::2], mode='markers', name='Stereo A', marker=dict(
-            size=20,
-            color='rgba( 255, 0, 0,1)',
-            symbol='square',
-            line=dict(
-                width=2)))
+# (timestamp, link) of the image at a slider position of a panel, None if there is no such image
+# taken from the delivered catalogue, the image array json is only parsed when the server has no copy of it
+def catalogue_row(session_id, hidden_id, image_json, slider_val):
+    rows = swpc_session.published(session_id, 'rows', hidden_id)
 
-        if len(matches["matches"]) > 1:
-            # Generated linear fit
-            time_series_seconds = np.zeros(len(matches["matches"]))
-            rad_matches = []
+    if rows is None:
+        rows = [(str(row[0]), row[1]) for row in np.array(pd.read_json(image_json)).tolist() if len(row) > 1]
+        swpc_session.publish(session_id, 'rows', hidden_id, rows)
 
-            for i in range(0, len(matches["matches"])):
+    if slider_val is None or not 0 <= slider_val < len(rows):
+        return None
 
-                full_match_list.append(matches["matches"][i]['timestamp'])
-                time_series_seconds[i] = datetime.strptime(matches["matches"][i]['timestamp'],
-                                                           '%Y-%m-%d %H:%M:%S').timestamp()
-                rad_matches.append(matches["matches"][i]['radial'])
+    return rows[slider_val]
 
-            slope, intercept, r_value, p_value, std_err = stats.linregress(time_series_seconds, rad_matches)
-            line = slope * time_series_seconds + intercept
 
-            trace3 = go.Scatter(x=full_match_list, y=line, mode='lines', name='Linear fit', marker=dict(
-                size=2,
-                color='rgba(242, 38, 19, 1)',
-                line=dict(
-                    width=2)))
+# match store of a session, rebuilt from the match json of the page when the server has no copy of it
+def session_matches(session_id, match_json):
+    store = swpc_session.published(session_id, 'matches', 'store')
 
-            return dict(data=[trace, trace1, trace2, trace3], layout=layout_velocity)
+    if store is None:
+        store = swpc_matches.MatchStore.from_json(match_json)
+        swpc_session.publish(session_id, 'matches', 'store', store)
 
-        else:
+    return store
 
-            return dict(data=[trace, trace1, trace2], layout=layout_velocity)
 
-    return dict(data=[], layout=empty_layout)
+# kinematic fit of the matches of a session, computed once per match list revision and shared by the
+# result, graph and ensemble callbacks
+def session_fit(session_id, match_json):
+    store = session_matches(session_id, match_json)
 
+    return swpc_api.KinematicFit(swpc_kinematics.session_kinematics(session_id, store))
 
-# ---------</Velocity Graph section>-------
 
+# True if the image at a slider position of a panel is matched, a single set lookup
+def slider_matched(session_id, match_json, hidden_id, image_json, slider_val):
+    row = catalogue_row(session_id, hidden_id, image_json, slider_val)
+
+    return row is not None and row[1] in session_matches(session_id, match_json)
+
+
+# match button colour: green if the image was matched before, blue otherwise
+def match_button_class(session_id, match_json, hidden_id, image_json, slider_val):
+    if slider_matched(session_id, match_json, hidden_id, image_json, slider_val):
+        return 'btn btn-success btn-lg'
+
+    return 'btn btn-primary btn-lg'
 
-# ---------<Matching section>-------
 
 # changes the color of the left match button to green if the image was matched before
 # if that's not the case it stays blue
 @app.callback(dcd.Output('l-btn-match', 'className'),
               [dcd.Input('l-image-slider', 'value'),
                dcd.Input('full-matches-hidden', 'children')],
-              [dcd.State('stereo-b-hidden', 'children')])
-def l_matched_button_check(slider_val, match_list, image_list):
-
-    matches = json.loads(match_list)
-
-    if any(d["instrument"] == 'Stereo-B' for d in matches["matches"]):
-
-        image_dir = np.array(pd.read_json(image_list)).tolist()
-
-        if any(d["link"] == image_dir[slider_val][1] for d in matches["matches"]):
-            return 'btn btn-success btn-lg'
-        else:
-            return 'btn btn-primary btn-lg'
-    else:
-        return 'btn btn-primary btn-lg'
+              [dcd.State('stereo-b-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def l_matched_button_check(slider_val, match_list, image_list, session_id):
+    return match_button_class(session_id, match_list, 'stereo-b-hidden', image_list, slider_val)
 
 
 # changes the color of the center match button to green if the image was matched before
@@ -3045,21 +3802,10 @@ def l_matched_button_check(slider_val, match_list, image_list):
 @app.callback(dcd.Output('c-btn-match', 'className'),
               [dcd.Input('c-image-slider', 'value'),
                dcd.Input('full-matches-hidden', 'children')],
-              [dcd.State('soho-c3-hidden', 'children')])
-def c_matched_button_check(slider_val, match_list, image_list):
-
-    matches = json.loads(match_list)
-
-    if any(d["instrument"] == 'SOHO C3' for d in matches["matches"]):
-
-        image_dir = np.array(pd.read_json(image_list)).tolist()
-
-        if any(d["link"] == image_dir[slider_val][1] for d in matches["matches"]):
-            return 'btn btn-success btn-lg'
-        else:
-            return 'btn btn-primary btn-lg'
-    else:
-        return 'btn btn-primary btn-lg'
+              [dcd.State('soho-c3-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def c_matched_button_check(slider_val, match_list, image_list, session_id):
+    return match_button_class(session_id, match_list, 'soho-c3-hidden', image_list, slider_val)
 
 
 # changes the color of the right match button to green if the image was matched before
@@ -3067,24 +3813,14 @@ def c_matched_button_check(slider_val, match_list, image_list):
 @app.callback(dcd.Output('r-btn-match', 'className'),
               [dcd.Input('r-image-slider', 'value'),
                dcd.Input('full-matches-hidden', 'children')],
-              [dcd.State('stereo-a-hidden', 'children')])
-def r_matched_button_check(slider_val, match_list, image_list):
-
-    matches = json.loads(match_list)
-
-    if any(d["instrument"] == 'Stereo-A' for d in matches["matches"]):
-
-        image_dir = np.array(pd.read_json(image_list)).tolist()
-
-        if any(d["link"] == image_dir[slider_val][1] for d in matches["matches"]):
-            return 'btn btn-success btn-lg'
-        else:
-            return 'btn btn-primary btn-lg'
-    else:
-        return 'btn btn-primary btn-lg'
+              [dcd.State('stereo-a-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def r_matched_button_check(slider_val, match_list, image_list, session_id):
+    return match_button_class(session_id, match_list, 'stereo-a-hidden', image_list, slider_val)
 
 
 # save full matched image array
+# the matches are kept in the session match store, the json holds its matches and revision for the page
 @app.callback(dcd.Output('full-matches-hidden', 'children'),
               [dcd.Input('l-btn-match', 'n_clicks'),
                dcd.Input('c-btn-match', 'n_clicks'),
@@ -3100,59 +3836,48 @@ def r_matched_button_check(slider_val, match_list, image_list):
                dcd.State('l-image-slider', 'value'),
                dcd.State('c-image-slider', 'value'),
                dcd.State('r-image-slider', 'value'),
-               dcd.State('radial-slider', 'value')]
+               dcd.State('radial-slider', 'value'),
+               dcd.State('session-id', 'children')]
               )
 def match_arr_calc(match_btn1, match_btn2, match_btn3, unmatch_btn1, unmatch_btn2, unmatch_btn3, reset_all_btn,
-                   stereo_b_json, soho_json, stereo_a_json, matches, l_slider, c_slider, r_slider, radial):
+                   stereo_b_json, soho_json, stereo_a_json, matches, l_slider, c_slider, r_slider, radial,
+                   session_id):
     ctx = dash.callback_context
 
+    store = session_matches(session_id, matches)
+
+    # a restored page starts out with the matches of its session, a new one with none
     if not ctx.triggered:
-        return json.dumps({"matches": []})
+        if not matches:
+            store.clear()
+
+        return store.to_json()
     else:
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
-    matches = json.loads(matches)
-
-    if button_id == 'l-btn-match':
-        image_dir = np.array(pd.read_json(stereo_b_json)).tolist()
-        matches["matches"].append({"instrument": "Stereo-B", "timestamp": str(image_dir[l_slider][0]),
-                                   "link" :image_dir[l_slider][1], "radial": radial})
-
-    if button_id == 'c-btn-match':
-        image_dir = np.array(pd.read_json(soho_json)).tolist()
-        matches["matches"].append({"instrument": "SOHO C3", "timestamp": str(image_dir[c_slider][0]),
-                                   "link": image_dir[c_slider][1],"radial": radial})
-
-    if button_id == 'r-btn-match':
-        image_dir = np.array(pd.read_json(stereo_a_json)).tolist()
-        matches["matches"].append({"instrument": "Stereo-A", "timestamp": str(image_dir[r_slider][0]),
-                                   "link":image_dir[r_slider][1], "radial": radial})
-
-    if button_id == 'unmatch-btn-l':
-        image_dir = np.array(pd.read_json(stereo_b_json)).tolist()
-        for idx in range(0, len(matches["matches"])):
-            if matches["matches"][idx]["link"] == image_dir[l_slider][1]:
-                del matches["matches"][idx]
-                break
-
-    if button_id == 'unmatch-btn-c':
-        image_dir = np.array(pd.read_json(soho_json)).tolist()
-        for idx in range(0, len(matches["matches"])):
-            if matches["matches"][idx]["link"] == image_dir[c_slider][1]:
-                del matches["matches"][idx]
-                break
-
-    if button_id == 'unmatch-btn-r':
-        image_dir = np.array(pd.read_json(stereo_a_json)).tolist()
-        for idx in range(0, len(matches["matches"])):
-            if matches["matches"][idx]["link"] == image_dir[r_slider][1]:
-                del matches["matches"][idx]
-                break
+    # button -> (instrument, hidden div, slider value)
+    panels = {'l': ('Stereo-B', 'stereo-b-hidden', stereo_b_json, l_slider),
+              'c': ('SOHO C3', 'soho-c3-hidden', soho_json, c_slider),
+              'r': ('Stereo-A', 'stereo-a-hidden', stereo_a_json, r_slider)}
+
+    if button_id in ('l-btn-match', 'c-btn-match', 'r-btn-match'):
+        instrument, hidden_id, image_json, slider_val = panels[button_id[0]]
+        row = catalogue_row(session_id, hidden_id, image_json, slider_val)
+
+        if row is not None:
+            store.add(instrument, row[0], row[1], radial)
+
+    if button_id in ('unmatch-btn-l', 'unmatch-btn-c', 'unmatch-btn-r'):
+        instrument, hidden_id, image_json, slider_val = panels[button_id[-1]]
+        row = catalogue_row(session_id, hidden_id, image_json, slider_val)
+
+        if row is not None:
+            store.remove(row[1])
 
     if button_id == 'reset-all-btn':
-        return json.dumps({"matches": []})
+        store.clear()
 
-    return json.dumps(matches)
+    return store.to_json()
 
 
 # ---------</Matching section>-------
@@ -3163,62 +3888,38 @@ def match_arr_calc(match_btn1, match_btn2, match_btn3, unmatch_btn1, unmatch_btn
               [dcd.Input('full-matches-hidden', 'children'),
                dcd.Input('l-image-slider', 'disabled'),
                dcd.Input('l-image-slider', 'value')],
-              [dcd.State('stereo-b-hidden', 'children')]
-              )
-def disable_unmatch_l(match_list, image_slider, l_slider, stereo_b_json):
-
+              [dcd.State('stereo-b-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def disable_unmatch_l(match_list, image_slider, l_slider, stereo_b_json, session_id):
     if image_slider:
         return True
 
-    matches = json.loads(match_list)
-
-    image_dir = np.array(pd.read_json(stereo_b_json)).tolist()
-
-    for idx in range(0, len(matches["matches"])):
-        if matches["matches"][idx]["link"] == image_dir[l_slider][1]:
-            return False
-
-    return True
+    return not slider_matched(session_id, match_list, 'stereo-b-hidden', stereo_b_json, l_slider)
 
 
 @app.callback(dcd.Output('unmatch-btn-c', 'disabled'),
               [dcd.Input('full-matches-hidden', 'children'),
                dcd.Input('c-image-slider', 'disabled'),
                dcd.Input('c-image-slider', 'value')],
-              [dcd.State('soho-c3-hidden', 'children')]
-              )
-def disable_unmatch_c(match_list, image_slider, c_slider, soho_json):
+              [dcd.State('soho-c3-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def disable_unmatch_c(match_list, image_slider, c_slider, soho_json, session_id):
     if image_slider:
         return True
 
-    matches = json.loads(match_list)
-
-    image_dir = np.array(pd.read_json(soho_json)).tolist()
-
-    for idx in range(0, len(matches["matches"])):
-        if matches["matches"][idx]["link"] == image_dir[c_slider][1]:
-            return False
-
-    return True
+    return not slider_matched(session_id, match_list, 'soho-c3-hidden', soho_json, c_slider)
 
 @app.callback(dcd.Output('unmatch-btn-r', 'disabled'),
               [dcd.Input('full-matches-hidden', 'children'),
                dcd.Input('r-image-slider', 'disabled'),
                dcd.Input('r-image-slider', 'value')],
-              [dcd.State('stereo-a-hidden', 'children')])
-def disable_unmatch_r(match_list, image_slider, r_slider, stereo_a_json):
+              [dcd.State('stereo-a-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def disable_unmatch_r(match_list, image_slider, r_slider, stereo_a_json, session_id):
     if image_slider:
         return True
 
-    matches = json.loads(match_list)
-
-    image_dir = np.array(pd.read_json(stereo_a_json)).tolist()
-
-    for idx in range(0, len(matches["matches"])):
-        if matches["matches"][idx]["link"] == image_dir[r_slider][1]:
-            return False
-
-    return True
+    return not slider_matched(session_id, match_list, 'stereo-a-hidden', stereo_a_json, r_slider)
 
 
 # ---------</Un-matching section>-------
@@ -3280,6 +3981,28 @@ def hide_time(n_clicks, reset, trigger):
         return True
 
 
+@app.callback(dcd.Output('velocity-spread-result', 'hidden'),
+              [dcd.Input('calculate-btn', 'n_clicks_timestamp'),
+               dcd.Input('reset-all-btn', 'n_clicks_timestamp'),
+               dcd.Input('time-hidden', 'children')])
+def hide_velocity_spread(n_clicks, reset, trigger):
+    if n_clicks > reset and trigger != '0':
+        return False
+    else:
+        return True
+
+
+@app.callback(dcd.Output('time-spread-result', 'hidden'),
+              [dcd.Input('calculate-btn', 'n_clicks_timestamp'),
+               dcd.Input('reset-all-btn', 'n_clicks_timestamp'),
+               dcd.Input('time-hidden', 'children')])
+def hide_time_spread(n_clicks, reset, trigger):
+    if n_clicks > reset and trigger != '0':
+        return False
+    else:
+        return True
+
+
 # prints the latitude to the results section
 @app.callback(dcd.Output('lat-result', 'children'),
               [dcd.Input('velocity-result', 'children')],
@@ -3305,32 +4028,18 @@ def print_width_result(json, angular_val):
 
 
 # calculate velocity to the results section
+# the fit is shared with the time result and the velocity graph, see session_fit
 @app.callback(dcd.Output('radial-velocity-hidden', 'children'),
-              [dcd.Input('full-matches-hidden', 'children')])
-def calc_velocity_result( match_list):
+              [dcd.Input('full-matches-hidden', 'children')],
+              [dcd.State('session-id', 'children')])
+def calc_velocity_result(match_list, session_id):
 
-    matches = json.loads(match_list)
+    fit = session_fit(session_id, match_list)
 
-    if len(matches["matches"]) < 2:
+    if not fit.valid:
         return "0"
 
-    time_arr = []
-    rad_arr = []
-
-    for idx in range(0, len(matches["matches"])):
-        time_arr.append(datetime.strptime(matches["matches"][idx]["timestamp"], '%Y-%m-%d %H:%M:%S'))
-        rad_arr.append(matches["matches"][idx]["radial"])
-
-    start_time = julian.to_jd(time_arr[0], fmt='jd')
-
-    for idx in range(0, len(time_arr)):
-        time_arr[idx] = julian.to_jd(time_arr[idx], fmt='jd') - start_time
-
-    results = np.polyfit(time_arr, rad_arr, 1)
-
-    radial_velocity = results[0] * u.solRad.to(u.km) / u.day.to(u.s)
-
-    return json.dumps(radial_velocity)
+    return json.dumps(fit.velocity)
 
 
 # prints radial velocity
@@ -3348,52 +4057,112 @@ def print_velocity(velocity_json):
 
 # calculate time at 21.5Rs to the results section
 @app.callback(dcd.Output('time-hidden', 'children'),
-              [dcd.Input('full-matches-hidden', 'children')])
-def calc_time_result(match_list):
+              [dcd.Input('full-matches-hidden', 'children')],
+              [dcd.State('session-id', 'children')])
+def calc_time_result(match_list, session_id):
 
-    matches = json.loads(match_list)
+    fit = session_fit(session_id, match_list)
 
-    if len(matches["matches"]) < 2:
+    if not fit.valid or fit.arrival_jd is None:
         return "0"
 
-    time_arr = []
-    rad_arr = []
+    return json.dumps(fit.arrival_jd)
+
+
+# prints time at 21.5R
+@app.callback(dcd.Output('time-result', 'children'),
+              [dcd.Input('time-hidden', 'children')])
+def print_time(time_json):
+
+    if time_json == '0':
+        return ""
+
+    time_val = json.loads(time_json)
 
-    for idx in range(0, len(matches["matches"])):
-        time_arr.append(datetime.strptime(matches["matches"][idx]["timestamp"], '%Y-%m-%d %H:%M:%S'))
-        rad_arr.append(matches["matches"][idx]["radial"])
+    datetime_at21 = julian.from_jd(time_val, fmt='jd').strftime("%Y-%m-%d %H:%M:%SZ")
 
-    start_time = julian.to_jd(time_arr[0], fmt='jd')
+    return 'Time at 21.5 Rsun: \n {0}'.format(datetime_at21)
 
-    for idx in range(0, len(time_arr)):
-        time_arr[idx] = julian.to_jd(time_arr[idx], fmt='jd') - start_time
 
-    results = np.polyfit(time_arr, rad_arr, 1)
+# prints the percentiles of the Monte Carlo velocity distribution, see swpc_kinematics.uncertainty
+@app.callback(dcd.Output('velocity-spread-result', 'children'),
+              [dcd.Input('radial-velocity-hidden', 'children')],
+              [dcd.State('full-matches-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def print_velocity_spread(velocity_json, match_list, session_id):
 
-    radial_velocity = results[0] * u.solRad.to(u.km) / u.day.to(u.s)
+    fit = session_fit(session_id, match_list)
 
-    intercept = results[1] * u.solRad.to(u.km)
+    if velocity_json == '0' or not fit.valid or fit.uncertainty['velocity_percentiles'] is None:
+        return ""
 
-    time_at21 = (21.5 * u.solRad.to(u.km) - intercept) / radial_velocity + start_time * u.day.to(u.s)
+    spread = fit.uncertainty
+    labels = '/'.join('P{}'.format(percentile) for percentile in spread['percentiles'])
 
-    time_at21_jd = time_at21 * u.s.to(u.day)
+    return 'Radial Velocity {}: {}'.format(labels, ' / '.join('{:.2f}'.format(velocity)
+                                                               for velocity in spread['velocity_percentiles']))
 
-    return json.dumps(time_at21_jd)
 
+# prints the percentiles of the Monte Carlo arrival time distribution
+@app.callback(dcd.Output('time-spread-result', 'children'),
+              [dcd.Input('time-hidden', 'children')],
+              [dcd.State('full-matches-hidden', 'children'),
+               dcd.State('session-id', 'children')])
+def print_time_spread(time_json, match_list, session_id):
 
-# prints time at 21.5R
-@app.callback(dcd.Output('time-result', 'children'),
-              [dcd.Input('time-hidden', 'children')])
-def print_time(time_json):
+    fit = session_fit(session_id, match_list)
 
-    if time_json == '0':
+    if time_json == '0' or not fit.valid or fit.uncertainty['arrival_percentiles'] is None:
         return ""
 
-    time_val = json.loads(time_json)
+    spread = fit.uncertainty
+    labels = '/'.join('P{}'.format(percentile) for percentile in spread['percentiles'])
 
-    datetime_at21 = julian.from_jd(time_val, fmt='jd').strftime("%Y-%m-%d %H:%M:%SZ")
+    return 'Time at 21.5 Rsun {}: \n {}'.format(labels, ' / '.join(
+        julian.from_jd(time_val, fmt='jd').strftime("%Y-%m-%d %H:%MZ") for time_val in spread['arrival_percentiles']))
 
-    return 'Time at 21.5 Rsun: \n {0}'.format(datetime_at21)
+
+# disables the ensemble button if theres less than 2 matches
+@app.callback(dcd.Output('ensemble-btn', 'disabled'),
+              [dcd.Input('calculate-btn', 'disabled')])
+def disable_ensemble(disabled):
+    return disabled
+
+
+# samples a cone parameter ensemble around the fit, scores every member against the fitted silhouettes of the
+# loaded panels and links the cone file of the accepted members; a changed match list hides the result
+@app.callback([dcd.Output('ensemble-result', 'children'),
+               dcd.Output('ensemble-result', 'hidden')],
+              [dcd.Input('ensemble-btn', 'n_clicks'),
+               dcd.Input('full-matches-hidden', 'children')],
+              [dcd.State('radial-slider', 'value'),
+               dcd.State('angular-slider', 'value'),
+               dcd.State('long-slider', 'value'),
+               dcd.State('lat-slider', 'value'),
+               dcd.State('session-id', 'children')])
+def ensemble_result(n_clicks, match_list, radial, angular, long, lat, session_id):
+    ctx = dash.callback_context
+
+    if not n_clicks or not ctx.triggered or ctx.triggered[0]['prop_id'] != 'ensemble-btn.n_clicks':
+        return "", True
+
+    fit = session_fit(session_id, match_list)
+
+    if not fit.valid or fit.arrival_jd is None:
+        return "", True
+
+    geometries = [swpc_session.published(session_id, 'geometry', panel['graph']) for panel in PANELS]
+    hulls = swpc_api.Lemniscate(radial, angular, long, lat).silhouettes(geometries)
+
+    ensemble = swpc_ensemble.sample_members(lat, long, angular, fit.velocity, fit.arrival_jd,
+                                            fit.uncertainty)
+    swpc_ensemble.score_ensemble(ensemble, geometries, hulls, radial)
+
+    swpc_session.publish(session_id, 'ensemble', 'members', ensemble)
+
+    return ['Ensemble: {} / {} members accepted '.format(int(ensemble['accepted'].sum()), len(ensemble['accepted'])),
+            html.A(href='{}ensemble/{}'.format(app.config.requests_pathname_prefix, session_id),
+                   children=['cone file'])], False
 
 
 # disables reset all button if theres less than 2 matches
@@ -3419,84 +4188,36 @@ def calculate_disable(match_list):
         return True
 
 
-# @app.callback(dcd.Output('export-btn', 'hidden'),
-#               [dcd.Input('calculate-btn', 'disabled'),
-#                dcd.Input('calculate-btn', 'n_clicks'),
-#                dcd.Input('velocity-result', 'children')])
-# def export_hidden(disabled, n_clicks, json_test):
-#
-#     if disabled or (n_clicks is None and json_test == 'Radial Velocity: 0.00'):
-#         return True
-#     else:
-#         return False
-
-
-# # callback creates all of the relevant measurement information for URL transfer
-# @app.callback(dcd.Output('my-link', 'href'),
-#               [dcd.Input('full-matches-hidden', 'children'),
-#                dcd.Input('radial-velocity-hidden', 'children')],
-#               [dcd.State('radial-matches-hidden', 'children'),
-#                dcd.State('instrument-matches-hidden', 'children'),
-#                dcd.State('lat-slider', 'value'),
-#                dcd.State('long-slider', 'value'),
-#                dcd.State('angular-slider', 'value')])
-# def update_link(full_json, radial_val, radial_json, instrument_json, lat_val, long_val, angular_val):
-#     try:
-#         time_arr = json.loads(full_json)
-#         radial_arr = json.loads(radial_json)
-#         instrument_arr = json.loads(instrument_json)
-#         radial_vel = json.loads(radial_val)
-#         for idx in range(0, len(time_arr)):
-#             time_arr[idx] = time_arr[idx]
-#
-#         time_results = ','.join(time_arr)
-#         radial_results = ','.join(str(x) for x in radial_arr)
-#         instrument_results = ','.join(str(x) for x in instrument_arr)
-#         return '/dash/urlToDownload?value={}'.format(
-#             time_results + ' | ' + radial_results + '|' + instrument_results + '|'
-#             + str(angular_val) + '|' + str(lat_val) + '|' + str(long_val) + '|'
-#             + str(radial_vel))
-#     except TypeError:
-#
-#         return '/dash/urlToDownload?value=0 | 0 | 0 | 0 | 0 | 0 | 0 '
-#
-#
-# # dynamic file creation method for export of measurement data
-# @app.server.route('/dash/urlToDownload')
-# def download_txt():
-#     # allow for divs to be populated
-#     # create a dynamic csv or file here using `StringIO`
-#     # (instead of writing to the file system)
-#     value = flask.request.args.get('value')
-#     time_arr, radial, instruments, angular_val, lat, long, radial_vel = value.split('|')
-#     time_arr = time_arr.split(',')
-#     radial = radial.split(',')
-#     instruments = instruments.split(',')
-#
-#     str_io = io.StringIO()
-#
-#     str_io.write('Date: ' + datetime.strftime(datetime.today(), '%Y-%m-%d %H:%M:%S') + '\n')
-#     str_io.write('Date of CME measured: ' + time_arr[0] + '\n \n')
-#     str_io.write('Timestamp of CME measurement \t Radial Distance \t Instrument \n')
-#
-#     for i in range(0, len(time_arr)):
-#         str_io.write(time_arr[i] + '\t' + radial[i] + '\t\t' + instruments[i] + '\n')
-#
-#     str_io.write('\nLatitude:{:.3f}'.format(float(lat)) + '\n')
-#     str_io.write('Longitude: {:.3f}'.format(float(long)) + '\n')
-#     str_io.write('CME Half-width: {:.3f}'.format(float(angular_val) / 2) + '\n')
-#     str_io.write('Radial Velocity: {:.3f} '.format(float(radial_vel)) + '\n')
-#
-#     mem = io.BytesIO()
-#     mem.write(str_io.getvalue().encode('utf-8'))
-#     mem.seek(0)
-#     str_io.close()
-#     return flask.send_file(mem,
-#                            mimetype='text/*',
-#                            attachment_filename='MeasurementResults' + datetime.strftime(datetime.today(),
-#                                                                                         '%Y-%m-%d %H:%M:%S') + '.txt',
-#                            as_attachment=True)
-#
+# shows the export buttons once there are enough matches for a fit
+@app.callback([dcd.Output('export-btn', 'style'),
+               dcd.Output('export-stack-btn', 'style')],
+              [dcd.Input('calculate-btn', 'disabled')])
+def export_hidden(disabled):
+    style = {'display': 'None'} if disabled else {'margin-right': '20px'}
+
+    return style, style
+
+
+# export links of a session, the matches and loaded windows stay on the server and are streamed from there,
+# the links only carry the slider values
+@app.callback([dcd.Output('my-link', 'href'),
+               dcd.Output('stack-link', 'href')],
+              [dcd.Input('full-matches-hidden', 'children'),
+               dcd.Input('radial-slider', 'value'),
+               dcd.Input('angular-slider', 'value'),
+               dcd.Input('long-slider', 'value'),
+               dcd.Input('lat-slider', 'value')] +
+              [dcd.Input(panel['tab'] + '-saturation-slider', 'value') for panel in PANELS],
+              [dcd.State('session-id', 'children')])
+def update_link(match_list, radial, angular, long, lat, l_saturation, c_saturation, r_saturation, session_id):
+    prefix = app.config.requests_pathname_prefix
+
+    return ('{}export/measurements/{}?format=csv&lat={}&long={}&angular={}'.format(prefix, session_id, lat, long,
+                                                                                  angular),
+            '{}export/stacks/{}?format=npz&radial={}&angular={}&long={}&lat={}'
+            '&l_saturation={}&c_saturation={}&r_saturation={}'.format(prefix, session_id, radial, angular, long, lat,
+                                                                      l_saturation, c_saturation, r_saturation))
+
 
 # ---------</Results Section>--------
 
@@ -3505,6 +4226,4 @@ if __name__ == '__main__':
         app.run_server(debug=False)
     else:
         app.run_server(debug=False, host="0.0.0.0", port=8000)
-        
 
-server = app.server
@@ -0,0 +1,179 @@
+//
+// Copyright © 2018 United States Government as represented by the Administrator of the 
+// National Aeronautics and Space Administration. All Rights Reserved.
+//
+
+// client side movie playback of the difference stacks
+// the decoded stack is kept per canvas and sent back as its ETag, the server answers 304 while the stack is unchanged,
+// so a stack is only fetched again once it changed; every frame is drawn in the browser
+
+(function () {
+
+    // playback state per canvas id
+    var players = {};
+
+    // prefix the app is served under, '/' in dev mode
+    function requestsPrefix() {
+        var config = document.getElementById('_dash-config');
+        return config ? JSON.parse(config.textContent).requests_pathname_prefix : '/';
+    }
+
+    // grey level lookup table matching the server side stretch and gamma correction of the figure
+    function greyTable(stretchTop, stretchBot, gamma) {
+        var table = new Uint8ClampedArray(256);
+        var low = Math.pow(Math.min(stretchTop, stretchBot), gamma);
+        var high = Math.pow(Math.max(stretchTop, stretchBot), gamma);
+
+        for (var value = 0; value < 256; value++) {
+            var level = Math.pow(Math.min(Math.max(value, stretchTop), stretchBot), gamma);
+            table[value] = high > low ? 255 * (level - low) / (high - low) : 0;
+        }
+
+        return table;
+    }
+
+    // silhouette of the current figure in canvas pixels, the stack spans the full axis ranges of the layout
+    function hullPixels(figure, width, height) {
+        if (!figure || !figure.data || figure.data.length < 3) {
+            return [];
+        }
+
+        var hull = figure.data[0];
+        var xRange = figure.layout.xaxis.range;
+        var yRange = figure.layout.yaxis.range;
+        var xMin = xRange[0], xSpan = xRange[1] - xRange[0];
+        var yMin = yRange[0], ySpan = yRange[1] - yRange[0];
+        var points = [];
+
+        for (var i = 0; i < hull.x.length; i++) {
+            points.push([(hull.x[i] - xMin) / xSpan * width, height - (hull.y[i] - yMin) / ySpan * height]);
+        }
+
+        return points;
+    }
+
+    function drawFrame(player) {
+        var size = player.width * player.height;
+        var frame = player.frames.subarray(player.index * size, (player.index + 1) * size);
+        var pixels = player.image.data;
+
+        // frames are stored bottom row first, the canvas is drawn top row first
+        for (var row = 0; row < player.height; row++) {
+            var source = (player.height - 1 - row) * player.width;
+            var target = row * player.width * 4;
+
+            for (var column = 0; column < player.width; column++) {
+                var grey = player.table[frame[source + column]];
+                pixels[target++] = grey;
+                pixels[target++] = grey;
+                pixels[target++] = grey;
+                pixels[target++] = 255;
+            }
+        }
+
+        player.context.putImageData(player.image, 0, 0);
+
+        if (player.hull.length > 1) {
+            player.context.strokeStyle = 'rgb(255, 255, 0)';
+            player.context.beginPath();
+            player.context.moveTo(player.hull[0][0], player.hull[0][1]);
+
+            for (var i = 1; i < player.hull.length; i++) {
+                player.context.lineTo(player.hull[i][0], player.hull[i][1]);
+            }
+
+            player.context.closePath();
+            player.context.stroke();
+        }
+
+        player.index = (player.index + 1) % player.count;
+    }
+
+    function startTimer(player) {
+        clearInterval(player.timer);
+        player.timer = setInterval(function () { drawFrame(player); }, 1000 / Math.max(player.fps, 1));
+    }
+
+    function stop(player) {
+        clearInterval(player.timer);
+        player.timer = null;
+        player.playing = false;
+        player.generation++;
+    }
+
+    function start(player, canvasId, url) {
+        var generation = player.generation;
+        var cached = player.stack && player.stack.url === url ? player.stack : null;
+        var headers = cached ? {'If-None-Match': cached.etag} : {};
+
+        fetch(url, {credentials: 'same-origin', cache: 'no-store', headers: headers}).then(function (response) {
+            if (cached && response.status === 304) {
+                return cached;
+            }
+
+            if (!response.ok) {
+                throw new Error('no difference stack');
+            }
+
+            var shape = response.headers.get('X-Stack-Shape').split(',').map(Number);
+            var etag = response.headers.get('ETag');
+
+            return response.arrayBuffer().then(function (buffer) {
+                return {url: url, etag: etag, shape: shape, frames: new Uint8Array(buffer)};
+            });
+        }).then(function (stack) {
+            player.stack = stack.etag ? stack : null;
+
+            // stopped while the stack was loading
+            if (generation !== player.generation) {
+                return;
+            }
+
+            var canvas = document.getElementById(canvasId);
+            canvas.width = stack.shape[2];
+            canvas.height = stack.shape[1];
+
+            player.count = stack.shape[0];
+            player.height = stack.shape[1];
+            player.width = stack.shape[2];
+            player.frames = stack.frames;
+            player.index = 0;
+            player.context = canvas.getContext('2d');
+            player.image = player.context.createImageData(player.width, player.height);
+            player.hull = hullPixels(player.figure, player.width, player.height);
+
+            startTimer(player);
+        }).catch(function () {
+            stop(player);
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        swpc_cat: {
+
+            // play button clicks toggle the playback, speed changes retime a running one
+            toggle_playback: function (nClicks, fps, figure, sessionId, stretchTop, stretchBot, gamma,
+                                       canvasId, hiddenId) {
+                var player = players[canvasId] || (players[canvasId] = {clicks: 0, timer: null, playing: false,
+                                                                       generation: 0});
+                var toggled = (nClicks || 0) !== player.clicks;
+
+                player.clicks = nClicks || 0;
+                player.fps = fps;
+
+                if (toggled && player.playing) {
+                    stop(player);
+                } else if (toggled) {
+                    player.playing = true;
+                    player.figure = figure;
+                    player.table = greyTable(stretchTop, stretchBot, gamma);
+                    start(player, canvasId, requestsPrefix() + 'difference-stack/' + sessionId + '/' + hiddenId);
+                } else if (player.timer !== null) {
+                    startTimer(player);
+                }
+
+                return player.playing ? [{display: 'block'}, 'Pause'] : [{display: 'none'}, 'Play'];
+            }
+        }
+    });
+})();
@@ -0,0 +1,6 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# the SWPC_CAT modules are flat modules next to this file, pytest puts this directory on sys.path for them
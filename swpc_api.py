@@ -0,0 +1,270 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# measurement pipeline of SWPC_CAT as plain Python objects, for notebooks, scripts and the web app alike
+# everything works on numpy arrays, nothing here imports dash or plotly
+#
+#   source = FrameSource.query('SOHO C3', '2012-07-12', '16:00', 12)
+#   image = source.difference(source.nearest('2012-07-12 18:05:00'))
+#   hull = image.observer.silhouette(Lemniscate(9.5, 90, 10, -5))
+#   fit = KinematicFit.from_matches([('SOHO C3', '2012-07-12 18:05:00', link, 9.5), ...])
+
+from datetime import datetime
+
+import numpy as np
+import swpc_frames
+import swpc_kinematics
+import swpc_matches
+import swpc_utils
+from swpc_lazy import LazyModule
+
+sunpy = LazyModule('sunpy', ['sunpy.map'])
+
+# instrument name -> (satellite number of swpc_utils.extract_images, sat_id of swpc_utils.observer_geometry)
+INSTRUMENTS = {'Stereo-B': (1, -1), 'SOHO C2': (2, 0), 'SOHO C3': (3, 0), 'Stereo-A': (4, 1)}
+
+# default saturation of the difference images of an instrument, the panel saturation sliders of the app start out
+# and reset to it
+SATURATIONS = {'Stereo-B': 1, 'SOHO C2': 3, 'SOHO C3': 3, 'Stereo-A': 1}
+
+
+# default saturation of the difference images seen from an observer (sat_id), SOHO C2 and C3 share theirs
+def default_saturation(sat_id):
+    return next(SATURATIONS[instrument] for instrument, ids in INSTRUMENTS.items() if ids[1] == sat_id)
+
+
+# frame catalogue of one instrument over a time window, frames in time order as (timestamp, link)
+class FrameSource(object):
+
+    def __init__(self, instrument, rows):
+        self.instrument = instrument
+        self.sat_id = INSTRUMENTS[instrument][1]
+        self.rows = [(str(timestamp), link) for timestamp, link in rows]
+
+    # queries the catalogue of an instrument, date is 'YYYY-MM-DD', start_time 'HH:MM' and hours the window length
+    # LASCO observer headers of the whole window are filled in one ephemeris pass
+    @classmethod
+    def query(cls, instrument, date, start_time, hours):
+        satellite = INSTRUMENTS[instrument][0]
+        image_dir = swpc_utils.extract_images(datetime.strptime(date, '%Y-%m-%d'), start_time, hours, satellite)
+
+        if image_dir.ndim != 2:
+            return cls(instrument, [])
+
+        if satellite in (2, 3):
+            swpc_frames.index_window(image_dir)
+
+        return cls(instrument, image_dir.tolist())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    @property
+    def timestamps(self):
+        return np.array([timestamp.replace(' ', 'T') for timestamp, _ in self.rows], dtype='datetime64[s]')
+
+    @property
+    def links(self):
+        return [link for _, link in self.rows]
+
+    # index of the frame nearest to a timestamp, never the first one as it has no previous frame
+    def nearest(self, timestamp):
+        offsets = np.abs(self.timestamps - np.datetime64(str(timestamp).replace(' ', 'T'), 's'))
+
+        return max(int(np.argmin(offsets)), 1)
+
+    # difference of the frame at index against the frame before it, or against the frame at reference
+    # in base mode, at the default saturation of the instrument unless one is given
+    def difference(self, index, saturation=None, mode='running', reference=None, checkpoint=None):
+        previous = index - 1 if reference is None else reference
+
+        return DifferenceImage.from_links(self.rows[index][1], self.rows[previous][1], self.sat_id, saturation,
+                                          mode, checkpoint, timestamp=self.rows[index][0])
+
+    # running difference stack of the whole window, see swpc_utils.difference_stack
+    def stack(self, saturation=None, report=None):
+        saturation = SATURATIONS[self.instrument] if saturation is None else saturation
+
+        return swpc_utils.difference_stack(self.links, saturation, report=report)
+
+
+# difference of two normalised frames, with the header of the current frame
+# saturation None stands for the default saturation of the observer
+class DifferenceImage(object):
+
+    def __init__(self, data, meta, sat_id, timestamp=None, links=None, saturation=None, mode='running'):
+        self.data = data
+        self.meta = meta
+        self.sat_id = sat_id
+        self.timestamp = timestamp
+        self.links = links
+        self.saturation = default_saturation(sat_id) if saturation is None else saturation
+        self.mode = mode
+        self._map = None
+        self._observer = None
+
+    # fetches, preprocesses and differences two frames, both are taken from the frame cache when they are in it
+    # checkpoint, if given, is called at the stage boundaries as in swpc_utils.new_map
+    @classmethod
+    def from_links(cls, current_link, previous_link, sat_id, saturation=None, mode='running', checkpoint=None,
+                   timestamp=None):
+        (current, meta), (previous, _) = swpc_utils.normalised_frames([current_link, previous_link], checkpoint)
+        saturation = default_saturation(sat_id) if saturation is None else saturation
+
+        return cls(swpc_utils.difference_frames(current, previous, saturation, mode), meta, sat_id, timestamp,
+                   (current_link, previous_link), saturation, mode)
+
+    # wraps a difference that already is a sunpy map, e.g. one taken from a difference stack
+    @classmethod
+    def from_map(cls, difference_map, sat_id, links=None, saturation=None):
+        image = cls(difference_map.data, difference_map.meta, sat_id, links=links, saturation=saturation)
+        image._map = difference_map
+
+        return image
+
+    # the difference as a sunpy map, only built when it is needed
+    @property
+    def map(self):
+        if self._map is None:
+            self._map = sunpy.map.Map(self.data, self.meta)
+
+        return self._map
+
+    @property
+    def observer(self):
+        if self._observer is None:
+            self._observer = Observer.from_map(self.map, self.sat_id)
+
+        return self._observer
+
+    # stretched and gamma corrected image for display, into out when given
+    def display(self, gamma, stretch_top, stretch_bot, out=None):
+        return swpc_utils.display_image(self.data, gamma, stretch_top, stretch_bot, out=out)
+
+    # difference of the region x_range, y_range (grid units) at the resolution pyramid level the region needs
+    # returns (crop, grid x, grid y), or None when the overview is fine enough or the links are not known
+    def zoom(self, x_range, y_range, checkpoint=None):
+        if self.links is None:
+            return None
+
+        return swpc_utils.zoomed_difference(self.links[0], self.links[1], self.saturation, x_range, y_range,
+                                            checkpoint=checkpoint, mode=self.mode)
+
+
+# viewpoint of a frame: where a lemniscate silhouette lands in its pixels
+class Observer(object):
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+    @classmethod
+    def from_map(cls, observer_map, sat_id):
+        return cls(swpc_utils.observer_geometry(observer_map, sat_id))
+
+    @property
+    def lon(self):
+        return self.geometry['lon']
+
+    @property
+    def lat(self):
+        return self.geometry['lat']
+
+    # silhouette of a lemniscate in the pixels of this observer, (2, n) hull vertices
+    def silhouette(self, lemniscate):
+        return lemniscate.silhouettes([self])[0]
+
+
+# lemniscate model of a CME front: radial distance (solar radii), angular width, longitude and latitude (degrees)
+class Lemniscate(object):
+
+    def __init__(self, radial, angular, long, lat):
+        self.radial = radial
+        self.angular = angular
+        self.long = long
+        self.lat = lat
+
+    # lemniscate surface as an (n * n, 3) point cloud in plot pixels, rotated to its longitude and latitude
+    def points(self):
+        return swpc_utils.lemniscate_mesh(self.radial, self.angular) @ \
+            swpc_utils.rotation_matrix(-self.long, self.lat)
+
+    # silhouettes in several observers with one batched projection, None observers give a None silhouette
+    # observers may be Observer objects or their geometry dicts
+    def silhouettes(self, observers):
+        geometries = [observer.geometry if isinstance(observer, Observer) else observer for observer in observers]
+
+        return swpc_utils.calc_plot_batch(geometries, self.radial, self.angular, self.long, self.lat)
+
+
+# read only attribute of a KinematicFit taken from its kinematics result
+def _result_value(name):
+    return property(lambda self: self.result.get(name) if self.result is not None else None)
+
+
+# linear fit of the radial distance of matched frames over time, with its Monte Carlo uncertainty
+# wraps the result of swpc_kinematics.kinematics, None where a value is not defined
+class KinematicFit(object):
+
+    timestamps = _result_value('timestamps')
+    instruments = _result_value('instruments')
+    radial = _result_value('radial')
+    days = _result_value('days')
+    origin_jd = _result_value('origin_jd')
+    slope = _result_value('slope')
+    intercept = _result_value('intercept')
+    velocity = _result_value('velocity')
+    line = _result_value('line')
+    residuals = _result_value('residuals')
+    arrival = _result_value('arrival')
+    arrival_jd = _result_value('arrival_jd')
+    uncertainty = _result_value('uncertainty')
+
+    def __init__(self, result):
+        self.result = result
+
+    # fit of a match store
+    @classmethod
+    def from_store(cls, store):
+        return cls(swpc_kinematics.kinematics(store))
+
+    # fit of matches given as (instrument, timestamp, link, radial) tuples
+    @classmethod
+    def from_matches(cls, matches):
+        store = swpc_matches.MatchStore()
+
+        for instrument, timestamp, link, radial in matches:
+            store.add(instrument, timestamp, link, radial)
+
+        return cls.from_store(store)
+
+    # True for two or more matches at distinct times
+    @property
+    def valid(self):
+        return self.result is not None and self.result['fit'] is not None
+
+    # JSON serialisable values of the fit, None when it is not valid
+    def summary(self):
+        if not self.valid:
+            return None
+
+        spread = self.uncertainty
+
+        return {'velocity': float(self.velocity),
+                'slope': float(self.slope),
+                'intercept': float(self.intercept),
+                'origin_jd': float(self.origin_jd),
+                'arrival': str(self.arrival) if self.arrival is not None else None,
+                'arrival_jd': float(self.arrival_jd) if self.arrival_jd is not None else None,
+                'residuals': self.residuals.tolist(),
+                'percentiles': list(spread['percentiles']),
+                'velocity_percentiles': _listed(spread['velocity_percentiles']),
+                'arrival_percentiles': _listed(spread['arrival_percentiles'])}
+
+
+def _listed(values):
+    return None if values is None else [float(value) for value in values]
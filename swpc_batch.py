@@ -0,0 +1,186 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# headless batch analysis of historical events, without the Dash server
+# usage: python swpc_batch.py EVENTS OUT_DIR [--workers N] [--force]
+#
+# EVENTS holds one JSON event per line, blank lines and lines starting with # are skipped:
+#   {"id": "2012-07-12", "date": "2012-07-12", "start_time": "16:00", "hours": 12,
+#    "angular": 90, "long": 10, "lat": -5, "saturation": 1,
+#    "matches": [{"instrument": "SOHO C3", "timestamp": "2012-07-12 18:05:00", "radial": 9.5}, ...]}
+# saturation is optional, without it every instrument is differenced at its default (swpc_api.SATURATIONS)
+# every match is placed on the catalogue frame nearest to its timestamp, an event with two matches on the same
+# frame fails before any frame is downloaded, as a frame holds one match in the app as well
+#
+# each event gets OUT_DIR/<id>/ with an overlay PNG per match and result.json, written last, so an
+# interrupted run is resumed by running it again: events with a result.json are skipped
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import swpc_api
+import swpc_movie
+import swpc_preprocess
+from swpc_lazy import LazyModule
+
+pyplot = LazyModule('matplotlib.pyplot')
+
+# display defaults of the overlays, as the panel sliders of the app start out
+GAMMA = 1
+STRETCH_TOP = 0
+STRETCH_BOT = 255
+
+# name of the per event result, its presence marks the event as done
+RESULT_FILE = 'result.json'
+
+
+def read_events(path):
+    with open(path) as events_file:
+        return [json.loads(line) for line in events_file if line.strip() and not line.lstrip().startswith('#')]
+
+
+def event_dir(out_dir, event):
+    return os.path.join(out_dir, str(event['id']))
+
+
+def is_done(out_dir, event):
+    return os.path.isfile(os.path.join(event_dir(out_dir, event), RESULT_FILE))
+
+
+# running difference of a matched frame with the lemniscate silhouette drawn over it
+def write_overlay(path, image_data, hull, title):
+    figure = swpc_movie.overlay_figure(image_data, hull, title)
+    figure.savefig(path)
+    pyplot.close(figure)
+
+
+# runs one event: catalogues, difference maps, silhouettes and overlays of its matches, then the kinematics
+# returns the event result, also written to OUT_DIR/<id>/result.json
+def run_event(event, out_dir):
+    directory = event_dir(out_dir, event)
+    os.makedirs(directory, exist_ok=True)
+
+    saturation = event.get('saturation')
+    sources = dict()
+    frames = []
+    frame_matches = dict()
+    matched = []
+    matches = []
+
+    for number, match in enumerate(event['matches']):
+        if match['instrument'] not in sources:
+            sources[match['instrument']] = swpc_api.FrameSource.query(match['instrument'], event['date'],
+                                                                      event['start_time'], event['hours'])
+
+        source = sources[match['instrument']]
+
+        if len(source) < 2:
+            raise ValueError('no {} frames in the event window'.format(match['instrument']))
+
+        index = source.nearest(match['timestamp'])
+        timestamp, link = source[index]
+
+        if link in frame_matches:
+            raise ValueError('matches {} and {} are both nearest to the {} frame of {}'.format(
+                frame_matches[link], number, match['instrument'], timestamp))
+
+        frame_matches[link] = number
+        frames.append((source, index, timestamp, link))
+
+    for number, (match, (source, index, timestamp, link)) in enumerate(zip(event['matches'], frames)):
+        image = source.difference(index, saturation)
+        hull = image.observer.silhouette(swpc_api.Lemniscate(match['radial'], event['angular'], event['long'],
+                                                             event['lat']))
+
+        overlay = '{:02d}_{}.png'.format(number, match['instrument'].replace(' ', '_'))
+        write_overlay(os.path.join(directory, overlay), image.display(GAMMA, STRETCH_TOP, STRETCH_BOT), hull,
+                      '{} {} {} Rs'.format(match['instrument'], timestamp, match['radial']))
+
+        matched.append((match['instrument'], timestamp, link, match['radial']))
+        matches.append({'instrument': match['instrument'], 'timestamp': match['timestamp'],
+                        'frame_timestamp': timestamp, 'link': link, 'radial': match['radial'], 'overlay': overlay})
+
+    fit = swpc_api.KinematicFit.from_matches(matched)
+    result = {'id': event['id'], 'angular': event['angular'], 'long': event['long'], 'lat': event['lat'],
+              'matches': matches, 'kinematics': fit.summary()}
+
+    # written under a temporary name first, a result file is always complete
+    partial = os.path.join(directory, RESULT_FILE + '.part')
+
+    with open(partial, 'w') as result_file:
+        json.dump(result, result_file, indent=2)
+
+    os.replace(partial, os.path.join(directory, RESULT_FILE))
+
+    return result
+
+
+# every worker process runs its events one at a time, so it preprocesses frames in its own thread
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+    swpc_preprocess.configure(0)
+
+
+# runs an event in a worker, failures are returned rather than raised so the other events carry on
+def _run(event, out_dir):
+    start = time.perf_counter()
+
+    try:
+        run_event(event, out_dir)
+        return event['id'], None, time.perf_counter() - start
+    except Exception as error:
+        return event['id'], '{}: {}'.format(type(error).__name__, error), time.perf_counter() - start
+
+
+# runs the events not done yet over a pool of worker processes and reports the throughput
+# returns the number of failed events
+def run_batch(events, out_dir, workers, force=False):
+    pending = [event for event in events if force or not is_done(out_dir, event)]
+
+    print('{} events, {} done, {} to run on {} workers'.format(len(events), len(events) - len(pending),
+                                                                len(pending), workers))
+
+    start = time.perf_counter()
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_run, event, out_dir) for event in pending]
+
+        for future in as_completed(futures):
+            event_id, error, elapsed = future.result()
+            failures += error is not None
+            print('{:<24} {:>8.1f} s   {}'.format(str(event_id), elapsed, error or 'ok'))
+
+    elapsed = time.perf_counter() - start
+
+    if pending:
+        print('{} events in {:.1f} s, {:.1f} events per hour, {} failed'.format(
+            len(pending), elapsed, len(pending) * 3600 / elapsed, failures))
+
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SWPC_CAT headless batch event analysis')
+    parser.add_argument('events', help='event list, one JSON event per line')
+    parser.add_argument('out_dir', help='directory of the per event results and overlays')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help='rerun events that already have a result')
+
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    sys.exit(1 if run_batch(read_events(args.events), args.out_dir, args.workers, args.force) else 0)
+
+
+if __name__ == '__main__':
+    main()
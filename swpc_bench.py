@@ -0,0 +1,510 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# performance benchmarks for SWPC_CAT, the correctness checks of the optimisations are in tests/
+# usage: python swpc_bench.py startup [--runs N]
+#        python swpc_bench.py warp FITS [FITS ...] [--repeat N]
+#        python swpc_bench.py dtype [--size N] [--width N] [--mode MODE] [--repeat N]
+#        python swpc_bench.py kinematics [--matches N] [--samples N] [--repeat N]
+#        python swpc_bench.py ensemble [--members N] [--repeat N]
+#        python swpc_bench.py api
+#        python swpc_bench.py rest [--parameters N] [--repeat N]
+#        python swpc_bench.py export [--frames N] [--size N] [--matches N]
+#        python swpc_bench.py movie [--frames N] [--format FORMAT]
+#        python swpc_bench.py session [--rows N] [--matches N] [--repeat N]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# longest time allowed for the Monte Carlo uncertainty of one match list (seconds)
+UNCERTAINTY_BUDGET = 1.0
+
+# longest time allowed for projecting and scoring a 1000 member ensemble (seconds)
+ENSEMBLE_BUDGET = 1.0
+
+# longest time allowed for saving or loading a session document (seconds)
+SESSION_BUDGET = 0.05
+
+# modules that should not be imported until the first request needs them
+HEAVY_MODULES = ['sunpy', 'astropy', 'scipy', 'pandas', 'plotly.graph_objs']
+
+# imports the library layer in a fresh interpreter
+API_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import swpc_api
+print(json.dumps({'import_s': time.perf_counter() - start, 'modules': len(sys.modules)}))
+'''
+
+# measured in a fresh interpreter so nothing is already imported or cached
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import __SWPC_CAT__
+imported = time.perf_counter()
+heavy = [module for module in HEAVY_MODULES if module in sys.modules]
+client = __SWPC_CAT__.server.test_client()
+index = client.get('/')
+index_done = time.perf_counter()
+layout = client.get('/_dash-layout')
+layout_done = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - start,
+    'first_index_s': index_done - imported,
+    'first_layout_s': layout_done - index_done,
+    'status': [index.status_code, layout.status_code],
+    'heavy_loaded_at_import': heavy,
+}))
+'''
+
+
+# times the import of the app and its first requests over several cold starts
+def bench_startup(runs):
+    script = STARTUP_SCRIPT.replace('HEAVY_MODULES', repr(HEAVY_MODULES))
+
+    results = []
+
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    for key in ['import_s', 'first_index_s', 'first_layout_s']:
+        values = sorted(result[key] for result in results)
+        print('{:<16} min {:8.3f} s   median {:8.3f} s'.format(key, values[0], values[len(values) // 2]))
+
+    print('status codes     {}'.format(results[-1]['status']))
+    print('heavy modules imported at import time: {}'.format(results[-1]['heavy_loaded_at_import'] or 'none'))
+
+
+# runs fn once under tracemalloc for its peak allocation, then repeat times for its best time
+def measure(fn, repeat):
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return result, min(timings), peak
+
+
+# compares the single pass warp with the two step rotate + resample on real frames
+# reports accuracy of the pixel data and header, time and peak memory of both
+def bench_warp(paths, repeat):
+    import astropy.units as u
+    import numpy as np
+    import swpc_utils
+
+    for path in paths:
+        frame = swpc_utils.read_frame(path)
+
+        two_step, two_step_time, two_step_peak = measure(
+            lambda: frame.rotate(order=3, recenter=True).resample(swpc_utils.FRAME_SHAPE * u.pix, 'linear'), repeat)
+        single, single_time, single_peak = measure(lambda: swpc_utils.warp_frame(frame), repeat)
+
+        diff = single.data - two_step.data
+        data_range = float(np.ptp(two_step.data)) or 1.0
+
+        print(path)
+        print('  {:<10} {:>10} {:>12}'.format('', 'time s', 'peak MiB'))
+        print('  {:<10} {:>10.4f} {:>12.1f}'.format('two step', two_step_time, two_step_peak / 2 ** 20))
+        print('  {:<10} {:>10.4f} {:>12.1f}'.format('one pass', single_time, single_peak / 2 ** 20))
+        print('  max |diff| / range {:.3e}   rms diff / range {:.3e}'.format(
+            float(np.max(np.abs(diff))) / data_range, float(np.sqrt(np.mean(diff ** 2))) / data_range))
+
+        for key in ['crpix1', 'crpix2', 'cdelt1', 'cdelt2', 'crval1', 'crval2']:
+            print('  {:<7} two step {:<22} one pass {}'.format(key, two_step.meta[key], single.meta[key]))
+
+
+# exposure corrected copies of two raw frames, as the frame cache holds them
+def normalised_pair(current, previous, dtype):
+    import swpc_utils
+
+    return [swpc_utils.normalise_frame(frame.astype(dtype), exposure, offset, 'SECCHI')
+            for frame, exposure, offset in [(current, 2.0, 10.0), (previous, 1.5, 12.0)]]
+
+
+# runs the difference and display steps of a panel render on two normalised frames, as
+# DifferenceImage.from_links and the 2d panel callback do
+def render_steps(current, previous, mode='running', panel='bench'):
+    import swpc_utils
+
+    diff = swpc_utils.difference_frames(current, previous, 50, mode)
+    return swpc_utils.return_image(diff, 0.8, 20, 230, panel=panel)
+
+
+# times the float32 pipeline against the float64 one and measures the allocations of a warm render
+def bench_dtype(size, width, mode, repeat):
+    import numpy as np
+
+    random = np.random.RandomState(0)
+    frames = [random.gamma(2.0, 400.0, (size, width or size)) for _ in range(2)]
+
+    print('  {:<8} {:>10} {:>12}'.format('dtype', 'time s', 'peak KiB'))
+
+    for dtype in [np.float64, np.float32]:
+        current, previous = normalised_pair(frames[0], frames[1], dtype)
+
+        # first render allocates the work buffers, the measured ones reuse them
+        render_steps(current, previous, mode)
+        _, best, peak = measure(lambda: render_steps(current, previous, mode), repeat)
+
+        print('  {:<8} {:>10.5f} {:>12.1f}'.format(np.dtype(dtype).name, best, peak / 2 ** 10))
+
+
+# the velocity and arrival time as the result callbacks computed them before the shared fit
+def polyfit_kinematics(matches):
+    from datetime import datetime
+
+    import astropy.units as u
+    import julian
+    import numpy as np
+
+    time_arr = [julian.to_jd(datetime.strptime(match['timestamp'], '%Y-%m-%d %H:%M:%S'), fmt='jd')
+                for match in matches]
+    time_arr = [time - time_arr[0] for time in time_arr]
+    slope, intercept = np.polyfit(time_arr, [match['radial'] for match in matches], 1)
+    velocity = slope * u.solRad.to(u.km) / u.day.to(u.s)
+    start_time = julian.to_jd(datetime.strptime(matches[0]['timestamp'], '%Y-%m-%d %H:%M:%S'), fmt='jd')
+
+    return velocity, start_time + (21.5 - intercept) / slope
+
+
+# times the shared kinematics fit against the per match polyfit on a synthetic match list
+# and the Monte Carlo uncertainty of the match list
+# exits non zero when the uncertainty takes longer than UNCERTAINTY_BUDGET
+def bench_kinematics(count, samples, repeat):
+    from datetime import datetime, timedelta
+
+    import numpy as np
+    import swpc_kinematics
+    import swpc_matches
+
+    random = np.random.RandomState(0)
+    start = datetime(2019, 5, 1, 12)
+    store = swpc_matches.MatchStore()
+
+    for idx in range(count):
+        timestamp = start + timedelta(minutes=12 * idx + int(random.randint(0, 6)))
+        store.add(['Stereo-B', 'SOHO C3', 'Stereo-A'][idx % 3], timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                  'frame-{}'.format(idx), 3.0 + 0.4 * idx + random.normal(0, 0.1))
+
+    _, polyfit_time, _ = measure(lambda: polyfit_kinematics(store.matches()), repeat)
+    fit, shared_time, _ = measure(lambda: swpc_kinematics.kinematics(store), repeat)
+    spread, spread_time, spread_peak = measure(
+        lambda: swpc_kinematics.uncertainty(fit['days'], fit['radial'], fit['origin_jd'], samples), repeat)
+
+    print('  {:<10} {:>10}'.format('', 'time s'))
+    print('  {:<10} {:>10.6f}'.format('polyfit', polyfit_time))
+    print('  {:<10} {:>10.6f}   (includes the default uncertainty)'.format('shared', shared_time))
+    print('  {:<10} {:>10.6f}   {} samples, peak {:.1f} MiB'.format('uncertainty', spread_time, samples,
+                                                                   spread_peak / 2 ** 20))
+    print('  velocity P{}/P{}/P{} {}'.format(*(spread['percentiles'] + (spread['velocity_percentiles'],))))
+    print('  velocity {:.6f} km/s   arrival {}   rms residual {:.3e} Rs'.format(
+        fit['velocity'], fit['arrival'], float(np.sqrt(np.mean(fit['residuals'] ** 2)))))
+
+    failures = []
+
+    if spread_time > UNCERTAINTY_BUDGET:
+        failures.append('uncertainty {:.3f} s > {:.1f} s'.format(spread_time, UNCERTAINTY_BUDGET))
+
+    for failure in failures:
+        print('FAIL ' + failure)
+
+    return 1 if failures else 0
+
+
+# times the projection and scoring of a full ensemble
+# the observers are synthetic, spread in longitude like STEREO-B, SOHO and STEREO-A
+# exits non zero when the ensemble takes longer than its budget
+def bench_ensemble(members, repeat):
+    import swpc_ensemble
+    import swpc_utils
+
+    radial, angular, long, lat = 12.0, 70.0, 20.0, -10.0
+    geometries = [{'lon': lon, 'lat': obs_lat, 'x_translate': 0.0, 'y_translate': 0.0, 'scale': 1.0}
+                  for lon, obs_lat in [(-110.0, 3.0), (0.0, -5.0), (95.0, 7.0)]]
+    hulls = swpc_utils.calc_plot_batch(geometries, radial, angular, long, lat)
+
+    def run():
+        ensemble = swpc_ensemble.sample_members(lat, long, angular, 800.0, 2458800.0, members=members)
+        return swpc_ensemble.score_ensemble(ensemble, geometries, hulls, radial)
+
+    ensemble, best, peak = measure(run, repeat)
+
+    print('  {} members over {} observers: {:.4f} s, peak {:.1f} MiB'.format(members, len(geometries), best,
+                                                                              peak / 2 ** 20))
+    print('  accepted {}'.format(int(ensemble['accepted'].sum())))
+
+    failures = []
+
+    if best > ENSEMBLE_BUDGET * members / 1000:
+        failures.append('ensemble {:.3f} s > {:.1f} s per 1000 members'.format(best, ENSEMBLE_BUDGET))
+
+    for failure in failures:
+        print('FAIL ' + failure)
+
+    return 1 if failures else 0
+
+
+# times the import of the library layer
+def bench_api():
+    output = subprocess.check_output([sys.executable, '-c', API_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)))
+    result = json.loads(output.decode().strip().splitlines()[-1])
+
+    print('swpc_api import {:.3f} s, {} modules loaded'.format(result['import_s'], result['modules']))
+
+
+# drives the /api/v1 routes through the flask test client: a batch of silhouettes in both formats, a batch of
+# kinematic fits and an oversized request, then prints the route metrics
+def bench_rest(parameters, repeat):
+    import __SWPC_CAT__
+    import numpy as np
+
+    client = __SWPC_CAT__.server.test_client()
+    observers = [{'geometry': {'lon': lon, 'lat': 0.0, 'x_translate': 0.0, 'y_translate': 0.0, 'scale': 1.0}}
+                 for lon in (-110.0, 0.0, 95.0)]
+    values = [[8.0 + idx % 30, 40 + idx % 80, idx % 360 - 180, idx % 60 - 30] for idx in range(parameters)]
+    match_lists = [[{'instrument': 'SOHO C3', 'timestamp': '2019-05-01 {:02d}:{:02d}:00'.format(hour, minute),
+                     'radial': 3.0 + hour + minute / 60.0 + offset} for hour, minute in [(1, 0), (2, 12), (3, 36)]]
+                   for offset in np.linspace(0, 1, 50)]
+
+    requests = [('silhouettes json', '/api/v1/silhouettes', {'parameters': values, 'observers': observers}),
+                ('silhouettes npz', '/api/v1/silhouettes',
+                 {'parameters': values, 'observers': observers, 'format': 'npz'}),
+                ('kinematics', '/api/v1/kinematics', {'match_lists': match_lists}),
+                ('oversized', '/api/v1/silhouettes', {'parameters': [[8, 90, 0, 0]] * 200000, 'observers': observers})]
+
+    for name, url, body in requests:
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.post(url, data=json.dumps(body), content_type='application/json')
+            timings.append(time.perf_counter() - start)
+
+        print('  {:<18} status {}   best {:.4f} s   {} bytes'.format(name, response.status_code, min(timings),
+                                                                     len(response.data)))
+
+    print(json.dumps(json.loads(client.get('/api/v1/metrics').data.decode()), indent=2))
+
+
+# streams a stack archive of synthetic frames and a measurement table, with the memory peak of the archive
+def bench_export(frames, size, matches):
+    import tempfile
+    import numpy as np
+    import swpc_api
+    import swpc_export
+    import swpc_matches
+
+    random = np.random.RandomState(0)
+    stack = random.normal(0, 1, (3, size, size)).astype(np.float32)
+    hull = random.normal(0, 100, (2, 40))
+
+    # one shared frame per instrument is yielded again and again, so only the archive itself allocates
+    def synthetic(count):
+        for index in range(count):
+            yield '2019-05-01 {:02d}:{:02d}:00'.format(index // 60 % 24, index % 60), stack[index % 3], hull
+
+    with tempfile.TemporaryFile() as archive_file:
+        tracemalloc.start()
+        start = time.perf_counter()
+
+        for chunk in swpc_export.stack_archive([('SOHO C3', frames, synthetic(frames)),
+                                                ('Stereo-A', frames, synthetic(frames))]):
+            archive_file.write(chunk)
+
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        total = 2 * frames * stack[0].nbytes
+        print('  stack archive   {:.3f} s   {} bytes   peak {:.1f} KiB for {:.1f} KiB of frames'.format(
+            elapsed, archive_file.tell(), peak / 2 ** 10, total / 2 ** 10))
+
+    store = swpc_matches.MatchStore()
+
+    for index in range(matches):
+        store.add('SOHO C3', '2019-05-01 {:02d}:{:02d}:00'.format(index // 60 % 24, index % 60), str(index),
+                  3.0 + index / 60.0)
+
+    fit = swpc_api.KinematicFit.from_store(store)
+    start = time.perf_counter()
+    ''.join(swpc_export.measurement_json(store, fit, -5.0, 10.0, 90.0))
+    ''.join(swpc_export.measurement_csv(store, fit, -5.0, 10.0, 90.0))
+    print('  measurements    {:.3f} s   {} matches'.format(time.perf_counter() - start, matches))
+
+
+# rasterises a synthetic stack one frame at a time and then over the worker pool into a movie
+def bench_movie(frames, fmt):
+    import tempfile
+    import numpy as np
+    import swpc_movie
+
+    random = np.random.RandomState(0)
+    stack = random.randint(0, 256, (frames, 256, 256)).astype(np.uint8)
+    angles = np.linspace(0, 2 * np.pi, 60, endpoint=False)
+    hulls = [np.vstack([(100 + 2 * index) * np.cos(angles), 60 * np.sin(angles)]) for index in range(frames)]
+    titles = ['SOHO C3 frame {}'.format(index) for index in range(frames)]
+    display = (1, 0, 255)
+
+    swpc_movie._init_worker()
+    serial = min(frames, 8)
+    start = time.perf_counter()
+
+    for index in range(serial):
+        swpc_movie.render_frame(stack[index], hulls[index], titles[index], *display)
+
+    per_frame = (time.perf_counter() - start) / serial
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        swpc_movie.MOVIE_CACHE_DIR = cache_dir
+        key = swpc_movie.movie_key(titles, 0.5, 0, (10, 90, 0, 0), display, 8, fmt)
+
+        start = time.perf_counter()
+        swpc_movie.encode_movie(lambda progress, message='': None, key, stack, hulls, titles, display, 8, fmt)
+        elapsed = time.perf_counter() - start
+
+        path = swpc_movie.cached_movie(key, fmt)
+
+        print('  serial {:.1f} frames/s   pool of {} {:.1f} frames/s   {} {} bytes'.format(
+            1 / per_frame, swpc_movie.MOVIE_WORKERS, frames / elapsed, fmt,
+            os.path.getsize(path) if path is not None else 0))
+
+
+# saves and loads a session document of three loaded windows and their matches in a scratch database,
+# every save is written straight away
+# exits non zero when a save or load exceeds SESSION_BUDGET
+def bench_session(rows, matches, repeat):
+    import tempfile
+    import swpc_matches
+    import swpc_persist
+
+    windows = dict((hidden_id, [('2019-05-01 {:02d}:{:02d}:00'.format(idx // 60 % 24, idx % 60),
+                                 'https://iswa.gsfc.nasa.gov/iswa_data_tree/{}/{:05d}.fts'.format(hidden_id, idx))
+                                for idx in range(rows)])
+                   for hidden_id in ('stereo-b-hidden', 'soho-c3-hidden', 'stereo-a-hidden'))
+    store = swpc_matches.MatchStore()
+
+    for idx in range(matches):
+        timestamp, link = windows['soho-c3-hidden'][idx * rows // matches]
+        store.add('SOHO C3', timestamp, link, 3.0 + idx)
+
+    document = {'controls': {'radial-slider.value': 9.5, 'date-picker.date': '2019-05-01'},
+                'windows': windows, 'matches': store.to_json()}
+    failures = []
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        swpc_persist.SESSION_DB = os.path.join(db_dir, 'sessions.sqlite')
+        saves, loads = [], []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            swpc_persist.save('0' * 32, document)
+            swpc_persist.flush()
+            saves.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            swpc_persist.load('0' * 32)
+            loads.append(time.perf_counter() - start)
+
+        size = os.path.getsize(swpc_persist.SESSION_DB)
+
+    print('  save best {:.4f} s   load best {:.4f} s   database {} bytes'.format(min(saves), min(loads), size))
+
+    if min(saves) > SESSION_BUDGET or min(loads) > SESSION_BUDGET:
+        failures.append('save or load over {} s'.format(SESSION_BUDGET))
+
+    for failure in failures:
+        print('FAIL ' + failure)
+
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SWPC_CAT performance benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    startup = commands.add_parser('startup', help='import and first request latency of the app')
+    startup.add_argument('--runs', type=int, default=5)
+
+    warp = commands.add_parser('warp', help='single pass warp against rotate + resample')
+    warp.add_argument('paths', nargs='+', help='FITS files')
+    warp.add_argument('--repeat', type=int, default=5)
+
+    dtype = commands.add_parser('dtype', help='float32 against float64 image pipeline, allocations per render')
+    dtype.add_argument('--size', type=int, default=256)
+    dtype.add_argument('--width', type=int, default=None, help='frame width, defaults to --size')
+    dtype.add_argument('--mode', default='running', help='running, base or ratio')
+    dtype.add_argument('--repeat', type=int, default=20)
+
+    kinematics = commands.add_parser('kinematics', help='shared kinematics fit against the per match polyfit')
+    kinematics.add_argument('--matches', type=int, default=30)
+    kinematics.add_argument('--samples', type=int, default=10000, help='Monte Carlo samples of the uncertainty')
+    kinematics.add_argument('--repeat', type=int, default=100)
+
+    ensemble = commands.add_parser('ensemble', help='batched ensemble projection and scoring')
+    ensemble.add_argument('--members', type=int, default=1000)
+    ensemble.add_argument('--repeat', type=int, default=5)
+
+    commands.add_parser('api', help='import of the library layer without the web stack')
+
+    rest = commands.add_parser('rest', help='latency and limits of the /api/v1 routes')
+    rest.add_argument('--parameters', type=int, default=500, help='parameter sets per silhouette request')
+    rest.add_argument('--repeat', type=int, default=5)
+
+    export = commands.add_parser('export', help='memory peak of the streamed stack archive and measurement table')
+    export.add_argument('--frames', type=int, default=200, help='frames per instrument')
+    export.add_argument('--size', type=int, default=256)
+    export.add_argument('--matches', type=int, default=500)
+
+    movie = commands.add_parser('movie', help='frame rasterisation and encoding of the movie export')
+    movie.add_argument('--frames', type=int, default=48)
+    movie.add_argument('--format', default='apng', help='gif, apng or mp4')
+
+    session = commands.add_parser('session', help='save and load of a session document')
+    session.add_argument('--rows', type=int, default=500, help='frames per loaded window')
+    session.add_argument('--matches', type=int, default=30)
+    session.add_argument('--repeat', type=int, default=20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'startup':
+        bench_startup(args.runs)
+    elif args.command == 'warp':
+        bench_warp(args.paths, args.repeat)
+    elif args.command == 'dtype':
+        bench_dtype(args.size, args.width, args.mode, args.repeat)
+    elif args.command == 'kinematics':
+        sys.exit(bench_kinematics(args.matches, args.samples, args.repeat))
+    elif args.command == 'ensemble':
+        sys.exit(bench_ensemble(args.members, args.repeat))
+    elif args.command == 'api':
+        bench_api()
+    elif args.command == 'rest':
+        bench_rest(args.parameters, args.repeat)
+    elif args.command == 'export':
+        bench_export(args.frames, args.size, args.matches)
+    elif args.command == 'movie':
+        bench_movie(args.frames, args.format)
+    elif args.command == 'session':
+        sys.exit(bench_session(args.rows, args.matches, args.repeat))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+
+import numpy as np
+import swpc_utils
+from swpc_lazy import LazyModule
+
+julian = LazyModule('julian')
+
+# number of members of an ensemble
+ENSEMBLE_MEMBERS = int(os.environ.get('SWPC_CAT_ENSEMBLE_MEMBERS', '1000'))
+
+# one sigma of the perturbation of the latitude, longitude and angular width of a member (degrees)
+ENSEMBLE_SIGMA = (5.0, 5.0, 10.0)
+
+# limits of the angular width, as on the angular width slider (degrees)
+ANGULAR_LIMITS = (20, 140)
+
+# a member is accepted when the rms distance of its silhouettes to the fitted ones is at most this (pixels)
+ENSEMBLE_ACCEPT = float(os.environ.get('SWPC_CAT_ENSEMBLE_ACCEPT', '6'))
+
+# number of directions the silhouettes are compared along
+SUPPORT_DIRECTIONS = 64
+
+# members projected at once, bounds the (members, observers, points, 2) projection array
+ENSEMBLE_CHUNK = 250
+
+
+# perturbed lemniscate parameters around the fitted ones
+# velocity and arrival come in pairs from the Monte Carlo samples of the kinematics (see
+# swpc_kinematics.uncertainty), members take the fitted values when there are no such samples
+# member 0 is the fit itself; the generator is seeded, so a fit always gets the same ensemble
+def sample_members(lat, long, angular, velocity, arrival_jd, spread=None, members=None, seed=0):
+    members = ENSEMBLE_MEMBERS if members is None else members
+    random = np.random.RandomState(seed)
+
+    ensemble = {'lat': np.clip(lat + random.normal(0.0, ENSEMBLE_SIGMA[0], members), -90, 90),
+                'long': (long + random.normal(0.0, ENSEMBLE_SIGMA[1], members) + 180) % 360 - 180,
+                'angular': np.clip(angular + random.normal(0.0, ENSEMBLE_SIGMA[2], members), *ANGULAR_LIMITS),
+                'velocity': np.full(members, velocity, dtype=np.float64),
+                'arrival_jd': np.full(members, arrival_jd, dtype=np.float64)}
+
+    if spread is not None:
+        paired = np.flatnonzero(np.isfinite(spread['arrival_jd']))
+
+        if len(paired):
+            picks = paired[random.randint(0, len(paired), members)]
+            ensemble['velocity'] = spread['velocity'][picks]
+            ensemble['arrival_jd'] = spread['arrival_jd'][picks]
+
+    ensemble['lat'][0], ensemble['long'][0], ensemble['angular'][0] = lat, long, angular
+    ensemble['velocity'][0], ensemble['arrival_jd'][0] = velocity, arrival_jd
+
+    return ensemble
+
+
+# projects the lemniscates of many members into every observer at once
+# a lemniscate is a unit mesh scaled by its radial distance and angular width, so all members share one mesh
+# and the projection of a chunk of members into all observers is a single einsum
+# returns the silhouette point clouds in observer pixels, (members, observers, points, 2)
+def project_members(geometries, radial, angular, long, lat):
+    mesh = swpc_utils.lemniscate_mesh(1.0, 90.0)
+
+    widths = np.tan(np.radians(np.asarray(angular, dtype=np.float64) / 2))
+    scales = radial * np.column_stack((np.ones_like(widths), widths, widths))
+
+    observers = np.array([swpc_utils.rotation_matrix(geometry['lon'] + 90, geometry['lat'])
+                          for geometry in geometries])
+    rotations = swpc_utils.rotation_matrices(-np.asarray(long), np.asarray(lat))
+
+    # x and z columns of member rotation @ observer rotation, (members, observers, 3, 2)
+    combined = np.einsum('mij,ojk->moik', rotations, observers[:, :, [0, 2]])
+    points = np.einsum('pi,mi,moik->mopk', mesh, scales, combined)
+
+    pixel_scale = np.array([geometry['scale'] for geometry in geometries])[:, np.newaxis, np.newaxis]
+    translate = np.array([[geometry['x_translate'], geometry['y_translate']] for geometry in geometries])
+
+    return points * pixel_scale + translate[:, np.newaxis, :]
+
+
+# support function of point clouds along the comparison directions, the furthest extent of each cloud
+# along each direction; for a convex silhouette it describes the outline completely
+def support(points):
+    angles = np.linspace(0, 2 * np.pi, SUPPORT_DIRECTIONS, endpoint=False)
+    directions = np.array([np.cos(angles), np.sin(angles)])
+
+    return (points @ directions).max(axis=-2)
+
+
+# ensemble around a fit, projected into every loaded observer and scored against the fitted silhouettes
+# geometries are the observer geometries of the loaded panels (None for empty panels), hulls their fitted
+# silhouettes as returned by swpc_utils.calc_plot_batch
+# adds to the members their score (rms support distance in pixels over all observers) and acceptance,
+# members without an arrival time are never accepted
+def score_ensemble(ensemble, geometries, hulls, radial):
+    observed = [idx for idx, geometry in enumerate(geometries) if geometry is not None and hulls[idx] is not None]
+    members = len(ensemble['lat'])
+
+    ensemble['score'] = np.zeros(members)
+
+    if observed:
+        references = np.array([support(np.asarray(hulls[idx]).T) for idx in observed])
+
+        for start in range(0, members, ENSEMBLE_CHUNK):
+            chunk = slice(start, start + ENSEMBLE_CHUNK)
+            points = project_members([geometries[idx] for idx in observed], radial, ensemble['angular'][chunk],
+                                     ensemble['long'][chunk], ensemble['lat'][chunk])
+
+            ensemble['score'][chunk] = np.sqrt(np.mean((support(points) - references) ** 2, axis=(1, 2)))
+
+    ensemble['observers'] = len(observed)
+    ensemble['accepted'] = (ensemble['score'] <= ENSEMBLE_ACCEPT) & np.isfinite(ensemble['arrival_jd'])
+
+    return ensemble
+
+
+# cone parameter file of the accepted members, one member per line:
+# time at 21.5 Rsun, latitude, longitude, half width (degrees), radial velocity (km/s) and score (pixels)
+def cone_file(ensemble):
+    lines = ['# SWPC_CAT cone parameter ensemble, {} of {} members accepted over {} observers'.format(
+                 int(ensemble['accepted'].sum()), len(ensemble['accepted']), ensemble['observers']),
+             '# {:<6} {:<17} {:>8} {:>8} {:>10} {:>10} {:>8}'.format(
+                 'member', 'time_21.5', 'lat', 'lon', 'half_width', 'velocity', 'score')]
+
+    for member in np.flatnonzero(ensemble['accepted']):
+        arrival = julian.from_jd(ensemble['arrival_jd'][member], fmt='jd').strftime('%Y-%m-%d %H:%M')
+
+        lines.append('  {:<6d} {:<17} {:>8.2f} {:>8.2f} {:>10.2f} {:>10.2f} {:>8.3f}'.format(
+            int(member), arrival, ensemble['lat'][member], ensemble['long'][member], ensemble['angular'][member] / 2,
+            ensemble['velocity'][member], ensemble['score'][member]))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,229 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# offline Earth ephemeris for SWPC_CAT
+#
+# a data pack is a directory holding
+#   manifest.json   pack version, table start, step and length, versions of the tools that built it
+#   earth_lat.npy   heliographic latitude of Earth in degrees, float32, one sample per step
+#   earth_dsun.npy  Sun-Earth distance in meters, float32, one sample per step
+#   iers_a.txt      optional IERS-A (finals2000A) table used instead of downloading one
+#
+# build one with: python swpc_ephemeris.py build <pack dir> [--start 2007-01-01] [--end 2031-01-01] [--step 60]
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+from swpc_lazy import LazyModule
+
+sunpy = LazyModule('sunpy', ['sunpy.coordinates'])
+u = LazyModule('astropy.units')
+astropy_time = LazyModule('astropy.time')
+iers = LazyModule('astropy.utils.iers')
+
+# version of the data pack layout, packs with another version are ignored
+PACK_VERSION = 1
+
+# location of the data pack
+EPHEMERIS_PACK = os.environ.get('SWPC_CAT_EPHEMERIS',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ephemeris'))
+
+# when False no ephemeris or IERS data is ever downloaded at runtime (air-gapped nodes)
+ALLOW_RUNTIME_DOWNLOADS = os.environ.get('SWPC_CAT_ALLOW_DOWNLOADS', '1') != '0'
+
+# default mission era covered by a built pack and its resolution in seconds
+PACK_START = '2007-01-01'
+PACK_END = '2031-01-01'
+PACK_STEP = 60
+
+_pack_lock = threading.Lock()
+_pack = None
+_pack_loaded = False
+_policy_applied = False
+
+
+# heliographic latitude (deg) and Sun-Earth distance (m) of Earth at the given times
+# times may be a datetime, a numpy datetime64, an astropy Time or an array of them
+# evaluated by linear interpolation of the data pack, falling back to sunpy for times it does not cover
+def earth_position(times):
+    apply_download_policy()
+
+    stamps = _as_datetime64(times)
+    scalar = stamps.ndim == 0
+    stamps = np.atleast_1d(stamps)
+
+    lat = np.empty(stamps.shape)
+    dsun = np.empty(stamps.shape)
+
+    pack = load_pack()
+    covered = np.zeros(stamps.shape, dtype=bool)
+
+    if pack is not None:
+        position = (stamps - pack['start']) / np.timedelta64(1, 's') / pack['step']
+        covered = (position >= 0) & (position <= len(pack['lat']) - 1)
+
+        index = np.minimum(position[covered].astype(np.int64), len(pack['lat']) - 2)
+        weight = position[covered] - index
+
+        lat[covered] = pack['lat'][index] * (1 - weight) + pack['lat'][index + 1] * weight
+        dsun[covered] = pack['dsun'][index] * (1 - weight) + pack['dsun'][index + 1] * weight
+
+    if not covered.all():
+        lat[~covered], dsun[~covered] = _sunpy_earth(stamps[~covered])
+
+    if scalar:
+        return float(lat[0]), float(dsun[0])
+
+    return lat, dsun
+
+
+# loads the data pack once per process, memory mapped so worker processes share its pages
+# returns None if there is no usable pack
+def load_pack():
+    global _pack, _pack_loaded
+
+    with _pack_lock:
+        if not _pack_loaded:
+            _pack_loaded = True
+            _pack = _read_pack(EPHEMERIS_PACK)
+
+        return _pack
+
+
+def _read_pack(pack_dir):
+    try:
+        with open(os.path.join(pack_dir, 'manifest.json')) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (IOError, ValueError):
+        return None
+
+    if manifest.get('version') != PACK_VERSION:
+        return None
+
+    lat = np.load(os.path.join(pack_dir, 'earth_lat.npy'), mmap_mode='r')
+    dsun = np.load(os.path.join(pack_dir, 'earth_dsun.npy'), mmap_mode='r')
+
+    if len(lat) < 2 or len(lat) != len(dsun):
+        return None
+
+    return {'start': np.datetime64(manifest['start'], 'ms'),
+            'step': float(manifest['step']),
+            'lat': lat,
+            'dsun': dsun,
+            'iers': os.path.join(pack_dir, 'iers_a.txt') if manifest.get('iers') else None,
+            'manifest': manifest}
+
+
+# applies the runtime download switch to astropy, once per process
+# with downloads forbidden the IERS table comes from the data pack or the IERS-B table bundled with astropy
+def apply_download_policy():
+    global _policy_applied
+
+    if _policy_applied or ALLOW_RUNTIME_DOWNLOADS:
+        return
+
+    _policy_applied = True
+
+    iers.conf.auto_download = False
+    iers.conf.auto_max_age = None
+
+    pack = load_pack()
+
+    if pack is not None and pack['iers'] is not None:
+        table = iers.IERS_A.open(pack['iers'])
+
+        if hasattr(iers, 'earth_orientation_table'):
+            iers.earth_orientation_table.set(table)
+        else:
+            iers.IERS.iers_table = table
+            iers.IERS_Auto.iers_table = table
+
+
+def _as_datetime64(times):
+    # astropy Time
+    if hasattr(times, 'isot'):
+        times = times.utc.isot
+
+    return np.asarray(times, dtype='datetime64[ms]')
+
+
+# evaluates the sunpy ephemeris for the given datetime64 array, in one vectorised call
+def _sunpy_earth(stamps):
+    if len(stamps) == 0:
+        return np.empty(0), np.empty(0)
+
+    earth = sunpy.coordinates.get_earth(time=astropy_time.Time(stamps.astype('datetime64[ms]').astype(str),
+                                                              scale='utc'))
+
+    return np.atleast_1d(earth.lat.to(u.deg).value), np.atleast_1d(earth.radius.to(u.m).value)
+
+
+# builds a data pack covering [start, end) with one sample every step seconds
+def build_pack(pack_dir, start=PACK_START, end=PACK_END, step=PACK_STEP, iers_file=None, chunk=100000):
+    start64 = np.datetime64(start, 'ms')
+    count = int((np.datetime64(end, 'ms') - start64) / np.timedelta64(step, 's'))
+
+    os.makedirs(pack_dir, exist_ok=True)
+
+    lat = np.lib.format.open_memmap(os.path.join(pack_dir, 'earth_lat.npy'), mode='w+', dtype=np.float32,
+                                    shape=(count,))
+    dsun = np.lib.format.open_memmap(os.path.join(pack_dir, 'earth_dsun.npy'), mode='w+', dtype=np.float32,
+                                     shape=(count,))
+
+    for first in range(0, count, chunk):
+        last = min(first + chunk, count)
+        stamps = start64 + np.arange(first, last) * np.timedelta64(step, 's')
+        lat[first:last], dsun[first:last] = _sunpy_earth(stamps)
+
+    lat.flush()
+    dsun.flush()
+
+    if iers_file is not None:
+        shutil.copyfile(iers_file, os.path.join(pack_dir, 'iers_a.txt'))
+
+    import astropy
+    import sunpy as sunpy_module
+
+    manifest = {'version': PACK_VERSION,
+                'start': str(start64),
+                'step': step,
+                'count': count,
+                'iers': iers_file is not None,
+                'astropy': astropy.__version__,
+                'sunpy': sunpy_module.__version__,
+                'created': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+    with open(os.path.join(pack_dir, 'manifest.json'), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SWPC_CAT offline ephemeris data pack')
+    commands = parser.add_subparsers(dest='command')
+
+    build = commands.add_parser('build', help='build a data pack')
+    build.add_argument('pack_dir', nargs='?', default=EPHEMERIS_PACK)
+    build.add_argument('--start', default=PACK_START)
+    build.add_argument('--end', default=PACK_END)
+    build.add_argument('--step', type=int, default=PACK_STEP, help='seconds between samples')
+    build.add_argument('--iers', default=None, help='IERS-A finals2000A file to bundle')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        print(json.dumps(build_pack(args.pack_dir, args.start, args.end, args.step, args.iers), indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# streamed exports: measurement tables as CSV or JSON, difference stacks with their hull overlays as a zip archive
+# every export is a generator of text or bytes chunks, so a web route can send it as it is produced and no export
+# is ever held in memory as a whole; a stack is written one difference frame at a time
+
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import numpy as np
+from swpc_lazy import LazyModule
+
+fits = LazyModule('astropy.io.fits')
+
+# columns of the measurement table
+MEASUREMENT_COLUMNS = ('timestamp', 'radial', 'instrument', 'link', 'residual')
+
+# stack archive formats: difference cubes as .npy entries or as FITS files
+STACK_FORMATS = ('npz', 'fits')
+
+# data type the difference frames are exported in
+STACK_DTYPE = np.dtype(np.float32)
+
+# size of a FITS block (bytes), headers and data are padded to it
+FITS_BLOCK = 2880
+
+
+# matches of a store with the residual of each against the fitted line, in match order
+def measurement_rows(store, fit):
+    residuals = fit.residuals if fit.valid else [None] * len(store)
+
+    for match, residual in zip(store.matches(), residuals):
+        yield (match['timestamp'], match['radial'], match['instrument'], match['link'],
+               None if residual is None else round(float(residual), 6))
+
+
+# summary values of a measurement: lemniscate parameters and the kinematic fit
+def measurement_summary(fit, lat, long, angular):
+    return {'exported': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            'latitude': lat,
+            'longitude': long,
+            'half_width': angular / 2,
+            'fit': fit.summary()}
+
+
+# measurement table as CSV lines, the summary values follow the table as # comment lines
+def measurement_csv(store, fit, lat, long, angular):
+    summary = measurement_summary(fit, lat, long, angular)
+
+    yield '# SWPC_CAT measurement results, exported {}\n'.format(summary['exported'])
+    yield ','.join(MEASUREMENT_COLUMNS) + '\n'
+
+    for row in measurement_rows(store, fit):
+        line = io.StringIO()
+        csv.writer(line, lineterminator='\n').writerow(['' if value is None else value for value in row])
+        yield line.getvalue()
+
+    yield '# latitude,{:.3f}\n'.format(lat)
+    yield '# longitude,{:.3f}\n'.format(long)
+    yield '# half_width,{:.3f}\n'.format(angular / 2)
+
+    if summary['fit'] is not None:
+        yield '# radial_velocity_km_s,{:.3f}\n'.format(summary['fit']['velocity'])
+        yield '# time_at_21.5_rsun,{}\n'.format(summary['fit']['arrival'])
+
+
+# measurement table as one JSON object, the matches are streamed one at a time
+def measurement_json(store, fit, lat, long, angular):
+    summary = json.dumps(measurement_summary(fit, lat, long, angular))
+
+    yield summary[:-1] + ', "matches": ['
+
+    for idx, row in enumerate(measurement_rows(store, fit)):
+        yield (', ' if idx else '') + json.dumps(dict(zip(MEASUREMENT_COLUMNS, row)))
+
+    yield ']}\n'
+
+
+# write only file object the archive is written into, drained by the export generator after every frame
+# it cannot seek, so zipfile writes every entry with a trailing data descriptor
+class _Chunks(object):
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# (timestamp, difference, silhouette) of every running difference of a frame source, one frame at a time,
+# at the default saturation of its instrument unless one is given
+def source_frames(source, lemniscate, saturation=None):
+    for index in range(1, len(source)):
+        image = source.difference(index, saturation)
+
+        yield source.rows[index][0], image.data, image.observer.silhouette(lemniscate)
+
+
+# zip archive of difference stacks with the lemniscate silhouette of every frame
+# stacks are (instrument, count, frames) with frames an iterator of count (timestamp, difference, silhouette),
+# e.g. source_frames; every frame is compressed and handed on before the next one is read
+# per instrument the archive holds, with fmt 'npz' (the archive then loads with numpy.load):
+#   <name>_differences.npy  (count, height, width) float32
+#   <name>_timestamps.npy   timestamps of the differences
+#   <name>_hull_vertices.npy, <name>_hull_offsets.npy  silhouette i is vertices[offsets[i]:offsets[i + 1]]
+# and with fmt 'fits' <name>.fits, a float32 cube, and <name>_hulls.csv (frame, timestamp, x, y)
+def stack_archive(stacks, fmt='npz'):
+    sink = _Chunks()
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for instrument, count, frames in stacks:
+            if count < 1:
+                continue
+
+            for chunk in _stack_entries(archive, sink, instrument, count, frames, fmt):
+                yield chunk
+
+    yield sink.drain()
+
+
+def _stack_entries(archive, sink, instrument, count, frames, fmt):
+    name = instrument.lower().replace(' ', '_').replace('-', '_')
+    timestamps = []
+    hulls = []
+    shape = None
+
+    with archive.open(name + ('_differences.npy' if fmt == 'npz' else '.fits'), 'w', force_zip64=True) as entry:
+        for timestamp, data, hull in frames:
+            if shape is None:
+                shape = (count,) + data.shape
+
+                if fmt == 'npz':
+                    np.lib.format.write_array_header_1_0(entry, {'descr': np.lib.format.dtype_to_descr(STACK_DTYPE),
+                                                                 'fortran_order': False, 'shape': shape})
+                else:
+                    entry.write(_fits_header(instrument, shape).tostring().encode('ascii'))
+
+            entry.write(np.ascontiguousarray(data, STACK_DTYPE if fmt == 'npz' else '>f4').tobytes())
+            timestamps.append(str(timestamp))
+            hulls.append(hull)
+
+            yield sink.drain()
+
+        if len(timestamps) != count:
+            raise ValueError('{} frames of {} expected for {}'.format(len(timestamps), count, instrument))
+
+        if fmt == 'fits':
+            entry.write(b'\0' * (-count * data.size * STACK_DTYPE.itemsize % FITS_BLOCK))
+
+    if fmt == 'npz':
+        _npy_entry(archive, name + '_timestamps.npy',
+                   np.array([timestamp.replace(' ', 'T') for timestamp in timestamps], dtype='datetime64[s]'))
+        _npy_entry(archive, name + '_hull_vertices.npy', np.concatenate([hull.T for hull in hulls]).astype(np.float32))
+        _npy_entry(archive, name + '_hull_offsets.npy', np.cumsum([0] + [hull.shape[1] for hull in hulls]))
+    else:
+        with archive.open(name + '_hulls.csv', 'w') as entry:
+            entry.write(b'frame,timestamp,x,y\n')
+
+            for frame, (timestamp, hull) in enumerate(zip(timestamps, hulls)):
+                entry.write(''.join('{},{},{:.3f},{:.3f}\n'.format(frame, timestamp, x, y)
+                                    for x, y in hull.T).encode('ascii'))
+
+    yield sink.drain()
+
+
+def _npy_entry(archive, name, values):
+    with archive.open(name, 'w') as entry:
+        np.lib.format.write_array(entry, values, allow_pickle=False)
+
+
+# primary header of a difference cube, written before its frames
+def _fits_header(instrument, shape):
+    return fits.Header([('SIMPLE', True), ('BITPIX', -32), ('NAXIS', 3),
+                        ('NAXIS1', shape[2]), ('NAXIS2', shape[1]), ('NAXIS3', shape[0]),
+                        ('INSTRUME', instrument), ('COMMENT', 'SWPC_CAT running differences')])
@@ -0,0 +1,125 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import swpc_ephemeris
+
+# maximum number of frames kept in the frame index, the least recently indexed are dropped first
+FRAME_INDEX_LIMIT = 100000
+
+# maximum number of normalised frames kept in memory (a 256 x 256 float32 frame is 256 KiB)
+NORMALISED_FRAME_LIMIT = 256
+
+# maximum number of normalised higher pyramid level frames kept in memory (a 1024 x 1024 float32 frame is 4 MiB)
+PYRAMID_FRAME_LIMIT = 24
+
+_index_lock = threading.Lock()
+
+# frame index, file link -> corrected header values, shared by every session of the process
+_frame_index = OrderedDict()
+
+_normalised_lock = threading.Lock()
+
+# normalised frames, file link -> (read only data, meta), shared by every session and difference mode
+_normalised_frames = OrderedDict()
+
+# normalised frames of the higher pyramid levels, (file link, level) -> (read only data, meta)
+_pyramid_frames = OrderedDict()
+
+
+# normalises the headers of every LASCO frame of a loaded window
+# image_dir rows are [timestamp, link] as returned by swpc_utils.extract_images
+# all observer positions come from a single vectorised ephemeris evaluation
+def index_window(image_dir):
+    image_dir = np.asarray(image_dir)
+
+    if image_dir.ndim != 2 or len(image_dir) == 0:
+        return
+
+    earth_lat, earth_dsun = swpc_ephemeris.earth_position(image_dir[:, 0].astype('datetime64[ms]'))
+
+    with _index_lock:
+        for link, lat, dsun in zip(image_dir[:, 1], earth_lat, earth_dsun):
+            _frame_index[link] = {'hgln_obs': 0.0, 'hglt_obs': float(lat), 'dsun_obs': float(dsun)}
+            _frame_index.move_to_end(link)
+
+        while len(_frame_index) > FRAME_INDEX_LIMIT:
+            _frame_index.popitem(last=False)
+
+
+# corrected header values of an indexed frame, or None
+def frame_header(link):
+    with _index_lock:
+        header = _frame_index.get(link)
+        return dict(header) if header is not None else None
+
+
+# normalised data and meta of a frame, or None if it is not cached
+# level is the pyramid level (frame size), None for the overview frames
+def normalised_frame(link, level=None):
+    frames, key = _normalised_store(link, level)
+
+    with _normalised_lock:
+        frame = frames.get(key)
+
+        if frame is not None:
+            frames.move_to_end(key)
+
+        return frame
+
+
+# caches the normalised data of a frame, the array is made read only as every difference mode shares it
+def store_normalised(link, data, meta, level=None):
+    frames, key = _normalised_store(link, level)
+    limit = NORMALISED_FRAME_LIMIT if level is None else PYRAMID_FRAME_LIMIT
+
+    data.flags.writeable = False
+
+    with _normalised_lock:
+        frames[key] = (data, meta)
+        frames.move_to_end(key)
+
+        while len(frames) > limit:
+            frames.popitem(last=False)
+
+    return data, meta
+
+
+def _normalised_store(link, level):
+    if level is None:
+        return _normalised_frames, link
+
+    return _pyramid_frames, (link, level)
+
+
+# turns a raw LASCO FITS header into map metadata that sunpy can use as is
+# this replaces the hand patch of sunpy/map/sources/soho.py: the observation time is written once in ISO
+# form and the map is built as a GenericMap, so LASCOMap never appends TIME-OBS to DATE-OBS again
+# corrections (from the frame index) supply the observer position, otherwise it is looked up per frame
+def normalise_lasco_header(header, corrections=None):
+    meta = dict((key.lower(), value) for key, value in header.items() if key)
+
+    date_obs = str(meta.get('date-obs', '')).replace('/', '-')
+
+    if 'T' not in date_obs and 'time-obs' in meta:
+        date_obs = date_obs + 'T' + str(meta['time-obs'])
+
+    meta['date-obs'] = date_obs
+
+    for key in ['cunit1', 'cunit2']:
+        if key in meta:
+            meta[key] = str(meta[key]).lower()
+
+    if 'hgln_obs' not in meta:
+        if corrections is None:
+            earth_lat, earth_dsun = swpc_ephemeris.earth_position(np.datetime64(date_obs, 'ms'))
+            corrections = {'hgln_obs': 0.0, 'hglt_obs': earth_lat, 'dsun_obs': earth_dsun}
+
+        meta.update(corrections)
+
+    return meta
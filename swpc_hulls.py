@@ -0,0 +1,147 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import swpc_utils
+from swpc_lazy import LazyModule
+
+spatial = LazyModule('scipy.spatial')
+
+# precompute silhouettes over a coarse slider lattice for every observer a frame is opened for
+# off by default, a lattice takes some seconds of background work and a few tens of MiB per observer
+HULL_LATTICE = os.environ.get('SWPC_CAT_HULL_LATTICE', '0') == '1'
+
+# lattice of the angular width, longitude and latitude sliders (degrees)
+# the radial distance only scales the lemniscate, so it needs no lattice axis
+LATTICE_ANGULAR = np.arange(20, 141, 5)
+LATTICE_LONG = np.arange(-180, 181, 5)
+LATTICE_LAT = np.arange(-90, 91, 5)
+
+# observer orientations are rounded to this many degrees, frames of a window share a lattice
+LATTICE_OBSERVER_STEP = 1
+
+# maximum number of observer lattices kept in memory
+HULL_LATTICE_LIMIT = 4
+
+# lattices are built one at a time, away from the request threads
+_executor = ThreadPoolExecutor(max_workers=1)
+
+_lattice_lock = threading.Lock()
+
+# observer key -> lattice, least recently used first
+_lattices = OrderedDict()
+
+# observer keys with a lattice queued or being built
+_building = set()
+
+
+# silhouettes of the lemniscate in every observer, as swpc_utils.calc_plot_batch
+# with approximate=True observers with a built lattice are answered from the nearest lattice point
+# returns the hulls and, per hull, whether it came from the lattice
+def observer_hulls(geometries, radial, angular, long, lat, approximate=False):
+    hulls = [None] * len(geometries)
+    from_lattice = [False] * len(geometries)
+
+    if approximate:
+        for idx, geometry in enumerate(geometries):
+            if geometry is not None:
+                hulls[idx] = lattice_hull(geometry, radial, angular, long, lat)
+                from_lattice[idx] = hulls[idx] is not None
+
+    exact = [geometry if not from_lattice[idx] else None for idx, geometry in enumerate(geometries)]
+
+    for idx, hull in enumerate(swpc_utils.calc_plot_batch(exact, radial, angular, long, lat)):
+        if hull is not None:
+            hulls[idx] = hull
+
+    return hulls, from_lattice
+
+
+# silhouette at the lattice point nearest to the slider values, or None if the observer has no lattice yet
+def lattice_hull(geometry, radial, angular, long, lat):
+    with _lattice_lock:
+        lattice = _lattices.get(observer_key(geometry))
+
+        if lattice is None:
+            return None
+
+        _lattices.move_to_end(observer_key(geometry))
+
+    index = (_nearest(LATTICE_ANGULAR, angular) * len(LATTICE_LONG) + _nearest(LATTICE_LONG, long)) * \
+        len(LATTICE_LAT) + _nearest(LATTICE_LAT, lat)
+
+    points = lattice['vertices'][lattice['offsets'][index]:lattice['offsets'][index + 1]] * radial
+
+    return np.array(((points[:, 0] * geometry['scale'] + geometry['x_translate']),
+                     (points[:, 1] * geometry['scale'] + geometry['y_translate'])))
+
+
+# queues the lattice of an observer for building, if the lattice mode is on and it is not built yet
+def request_lattice(geometry):
+    if not HULL_LATTICE or geometry is None:
+        return
+
+    key = observer_key(geometry)
+
+    with _lattice_lock:
+        if key in _lattices or key in _building:
+            return
+
+        _building.add(key)
+
+    _executor.submit(_build, key)
+
+
+# observer orientation a lattice is built for
+def observer_key(geometry):
+    return (int(round(geometry['lon'] / LATTICE_OBSERVER_STEP)) * LATTICE_OBSERVER_STEP,
+            int(round(geometry['lat'] / LATTICE_OBSERVER_STEP)) * LATTICE_OBSERVER_STEP)
+
+
+# projects a unit radial lemniscate for every lattice point of an observer and keeps the hull vertices
+# the projection is batched over every longitude/latitude pair of the lattice for each angular width
+# returns the vertices of all hulls concatenated and the offset of each hull in lattice order
+def build_lattice(key):
+    observer = swpc_utils.rotation_matrix(key[0] + 90, key[1])
+
+    # only the x and z columns of the projection are part of the silhouette
+    rotations = np.array([swpc_utils.rotation_matrix(-lon, lat) @ observer
+                          for lon in LATTICE_LONG for lat in LATTICE_LAT])[:, :, [0, 2]]
+
+    vertices = []
+    offsets = [0]
+
+    for angular in LATTICE_ANGULAR:
+        projected = swpc_utils.lemniscate_mesh(1.0, angular)[np.newaxis] @ rotations
+
+        for points in projected:
+            hull = spatial.ConvexHull(points, qhull_options='QbB')
+            vertices.append(points[hull.vertices])
+            offsets.append(offsets[-1] + len(hull.vertices))
+
+    return {'vertices': np.concatenate(vertices).astype(np.float32), 'offsets': np.array(offsets)}
+
+
+def _build(key):
+    try:
+        lattice = build_lattice(key)
+
+        with _lattice_lock:
+            _lattices[key] = lattice
+
+            while len(_lattices) > HULL_LATTICE_LIMIT:
+                _lattices.popitem(last=False)
+    finally:
+        with _lattice_lock:
+            _building.discard(key)
+
+
+def _nearest(axis, value):
+    return int(np.clip(np.round((value - axis[0]) / (axis[1] - axis[0])), 0, len(axis) - 1))
@@ -0,0 +1,123 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# maximum number of jobs running at once in this server process, further jobs wait in the executor queue
+JOB_WORKERS = 4
+
+# kinds of job (the first item of their key) that can hold a worker for minutes -> workers of their own
+# they never take the JOB_WORKERS, so the catalogue jobs of Load Images always find a free worker
+LONG_JOB_WORKERS = {'movie': 2, 'stack': 2, 'restore': 2}
+
+# seconds a finished job stays available for polling
+JOB_TTL = 600
+
+# job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+
+_long_executors = dict((kind, ThreadPoolExecutor(max_workers=workers)) for kind, workers in LONG_JOB_WORKERS.items())
+
+# guards the job tables below
+_jobs_lock = threading.Lock()
+
+# job id -> job record
+_jobs = dict()
+
+# (session id, job key) -> id of the job still queued or running for it
+_active = dict()
+
+
+# submits fn to the job executor and returns the job id straight away
+# fn is called as fn(report, *args), report(progress, message) updates the job progress in [0, 1]
+# a job with the same key already queued or running for the session is reused instead
+def submit(session_id, key, fn, *args):
+    with _jobs_lock:
+        _prune()
+
+        job_id = _active.get((session_id, key))
+
+        if job_id is not None:
+            return job_id
+
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {'session': session_id, 'key': key, 'state': QUEUED, 'progress': 0.0, 'message': '',
+                         'result': None, 'error': None, 'finished': None}
+        _active[(session_id, key)] = job_id
+
+    _job_executor(key).submit(_run, job_id, fn, args)
+
+    return job_id
+
+
+# executor of a job key, long running kinds have their own
+def _job_executor(key):
+    kind = key[0] if isinstance(key, tuple) and key else None
+
+    return _long_executors.get(kind, _executor)
+
+
+# returns a copy of the job record, or None for an unknown or expired job
+def status(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+# True once every listed job has finished or is unknown
+def all_finished(job_ids):
+    return all(job is None or job['state'] in (DONE, FAILED) for job in map(status, job_ids))
+
+
+# mean progress of the listed jobs, unknown jobs count as finished
+def overall_progress(job_ids):
+    jobs = [status(job_id) for job_id in job_ids]
+
+    if len(jobs) == 0:
+        return 1.0
+
+    return sum(1.0 if job is None else job['progress'] for job in jobs) / len(jobs)
+
+
+def _run(job_id, fn, args):
+
+    def report(progress, message=''):
+        with _jobs_lock:
+            _jobs[job_id]['progress'] = min(max(float(progress), 0.0), 1.0)
+            _jobs[job_id]['message'] = message
+
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job['state'] = RUNNING
+
+    try:
+        result = fn(report, *args)
+    except Exception as e:
+        with _jobs_lock:
+            job.update(state=FAILED, error=repr(e), finished=time.time())
+    else:
+        with _jobs_lock:
+            job.update(state=DONE, progress=1.0, result=result, finished=time.time())
+    finally:
+        with _jobs_lock:
+            if _active.get((job['session'], job['key'])) == job_id:
+                del _active[(job['session'], job['key'])]
+
+
+# drops finished jobs older than JOB_TTL, must be called with the lock held
+def _prune():
+    expired = time.time() - JOB_TTL
+
+    for job_id in [job_id for job_id, job in _jobs.items()
+                   if job['finished'] is not None and job['finished'] < expired]:
+        del _jobs[job_id]
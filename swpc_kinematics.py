@@ -0,0 +1,144 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import threading
+
+import numpy as np
+import swpc_session
+from swpc_lazy import LazyModule
+
+u = LazyModule('astropy.units')
+
+# radial distance the arrival time is given at (solar radii)
+ARRIVAL_RADIUS = 21.5
+
+# arrivals further from the store origin than this (days) are not given, a nearly flat line puts them beyond
+# any date datetime64 or a julian date can hold
+MAX_ARRIVAL_DAYS = 1e6
+
+# julian date of the unix epoch
+UNIX_EPOCH_JD = 2440587.5
+
+# error model of a match: one sigma of the radial distance (solar radii) and of the timestamp (minutes)
+RADIAL_SIGMA = float(os.environ.get('SWPC_CAT_RADIAL_SIGMA', '0.5'))
+TIME_SIGMA = float(os.environ.get('SWPC_CAT_TIME_SIGMA', '2'))
+
+# 'montecarlo' perturbs every match by the error model, 'bootstrap' also resamples the matches with replacement
+UNCERTAINTY_MODE = os.environ.get('SWPC_CAT_UNCERTAINTY', 'montecarlo')
+
+# number of perturbed match lists fitted per match list revision
+UNCERTAINTY_SAMPLES = int(os.environ.get('SWPC_CAT_UNCERTAINTY_SAMPLES', '10000'))
+
+# percentiles of the velocity and arrival distributions shown in the results
+UNCERTAINTY_PERCENTILES = (5, 50, 95)
+
+# one fit per session and match list revision, shared by the result and graph callbacks
+_kinematics_lock = threading.Lock()
+
+
+# kinematics of the matches of a session, computed once per revision of its match store
+def session_kinematics(session_id, store):
+    with _kinematics_lock:
+        revision = store.revision
+        cached = swpc_session.published(session_id, 'kinematics', 'fit')
+
+        if cached is None or cached[0] != revision:
+            cached = (revision, kinematics(store))
+            swpc_session.publish(session_id, 'kinematics', 'fit', cached)
+
+    return cached[1]
+
+
+# linear fit of the radial distance over time of the matches of a store, or None without matches
+# slope and intercept come from the running sums of the store, the per match values are vectorised over
+# datetime64 times in days since the store origin
+# returns a dict with the matches (timestamps, instruments, radial, days since origin) and, for two or more matches at
+# distinct times, the fit: origin_jd, slope (solar radii per day), intercept (solar radii at origin), velocity (km/s),
+# line, residuals, the arrival at ARRIVAL_RADIUS as datetime64 and julian date (None for a flat line, a line
+# through non finite values or an arrival beyond MAX_ARRIVAL_DAYS) and the uncertainty of velocity and arrival
+# over samples perturbed match lists, UNCERTAINTY_SAMPLES by default
+def kinematics(store, samples=None):
+    matches = store.matches()
+
+    if not matches:
+        return None
+
+    timestamps = np.array([match['timestamp'] for match in matches], dtype='datetime64[s]')
+    origin = np.datetime64(store.origin, 's')
+
+    result = {'timestamps': [match['timestamp'] for match in matches],
+              'instruments': np.array([match['instrument'] for match in matches]),
+              'radial': np.array([match['radial'] for match in matches], dtype=np.float64),
+              'days': (timestamps - origin) / np.timedelta64(1, 'D'),
+              'fit': store.fit()}
+
+    if result['fit'] is None:
+        return result
+
+    slope, intercept = result['fit']
+
+    result['slope'] = slope
+    result['intercept'] = intercept
+    result['velocity'] = slope * u.solRad.to(u.km) / u.day.to(u.s)
+    result['line'] = slope * result['days'] + intercept
+    result['residuals'] = result['radial'] - result['line']
+    result['arrival'] = result['arrival_jd'] = None
+
+    origin_jd = result['origin_jd'] = (origin - np.datetime64(0, 's')) / np.timedelta64(1, 'D') + UNIX_EPOCH_JD
+
+    arrival_days = (ARRIVAL_RADIUS - intercept) / slope if slope != 0 else np.nan
+
+    if np.isfinite(arrival_days) and abs(arrival_days) <= MAX_ARRIVAL_DAYS:
+        result['arrival'] = origin + np.timedelta64(int(round(arrival_days * 86400e3)), 'ms')
+        result['arrival_jd'] = origin_jd + arrival_days
+
+    result['uncertainty'] = uncertainty(result['days'], result['radial'], origin_jd, samples)
+
+    return result
+
+
+# velocity and arrival distributions of a match list under the error model
+# every sample perturbs the times and radial distances of all matches (and resamples them in bootstrap mode),
+# then the lines through all samples are solved at once from their centred sums
+# samples with no spread in time are dropped, samples with a line that does not rise get a nan arrival
+# the generator is seeded, so a match list always gets the same distributions
+# returns the velocity (km/s) and arrival (julian date) samples, paired by index, and their UNCERTAINTY_PERCENTILES
+def uncertainty(days, radial, origin_jd, samples=None, radial_sigma=None, time_sigma=None, mode=None, seed=0):
+    samples = UNCERTAINTY_SAMPLES if samples is None else samples
+    radial_sigma = RADIAL_SIGMA if radial_sigma is None else radial_sigma
+    time_sigma = TIME_SIGMA if time_sigma is None else time_sigma
+    mode = UNCERTAINTY_MODE if mode is None else mode
+
+    random = np.random.RandomState(seed)
+
+    times = days[np.newaxis] + random.normal(0.0, time_sigma / 1440.0, (samples, len(days)))
+    distances = radial[np.newaxis] + random.normal(0.0, radial_sigma, (samples, len(days)))
+
+    if mode == 'bootstrap':
+        picks = random.randint(0, len(days), (samples, len(days)))
+        times = np.take_along_axis(times, picks, axis=1)
+        distances = np.take_along_axis(distances, picks, axis=1)
+
+    time_mean = times.mean(axis=1)
+    distance_mean = distances.mean(axis=1)
+    times -= time_mean[:, np.newaxis]
+    distances -= distance_mean[:, np.newaxis]
+
+    spread = np.einsum('ij,ij->i', times, times)
+    valid = spread > 1e-12
+    slope = np.einsum('ij,ij->i', times[valid], distances[valid]) / spread[valid]
+    intercept = distance_mean[valid] - slope * time_mean[valid]
+
+    rising = slope > 0
+    arrival_jd = np.full(len(slope), np.nan)
+    arrival_jd[rising] = origin_jd + (ARRIVAL_RADIUS - intercept[rising]) / slope[rising]
+    velocity = slope * (u.solRad.to(u.km) / u.day.to(u.s))
+
+    return {'percentiles': UNCERTAINTY_PERCENTILES,
+            'velocity': velocity,
+            'arrival_jd': arrival_jd,
+            'velocity_percentiles': np.percentile(velocity, UNCERTAINTY_PERCENTILES) if len(velocity) else None,
+            'arrival_percentiles': np.nanpercentile(arrival_jd, UNCERTAINTY_PERCENTILES) if rising.any() else None}
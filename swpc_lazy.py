@@ -0,0 +1,34 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import importlib
+
+
+# module stand-in that imports the real module on first attribute access
+# keeps the sunpy/astropy/scipy stack out of the import time of the app
+# submodules are imported along with the package, e.g. LazyModule('sunpy', ['sunpy.map'])
+class LazyModule(object):
+
+    def __init__(self, name, submodules=()):
+        self.__dict__['_name'] = name
+        self.__dict__['_submodules'] = tuple(submodules)
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def _load(self):
+        module = self.__dict__['_module']
+
+        if module is None:
+            for submodule in self._submodules:
+                importlib.import_module(submodule)
+
+            module = self.__dict__['_module'] = importlib.import_module(self._name)
+
+        return module
+
+    def __repr__(self):
+        return '<lazy module {!r}>'.format(self._name)
@@ -0,0 +1,113 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import json
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+# format of the match timestamps
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+# matched images of a session, indexed by link and by instrument
+# keeps the running sums of a least squares line through (time, radial distance), so adding or
+# removing a match updates the fit in constant time
+# times are in days since origin, the timestamp of the first match added, to keep the sums well conditioned
+class MatchStore(object):
+
+    def __init__(self, matches=(), revision=0):
+        self._matches = OrderedDict()
+        self._instruments = defaultdict(set)
+        self._sums = [0, 0.0, 0.0, 0.0, 0.0]
+        self.origin = None
+        self.revision = revision
+
+        for match in matches:
+            self._insert(match)
+
+    # adds a match, a match of an already matched link replaces it
+    def add(self, instrument, timestamp, link, radial):
+        if link in self._matches:
+            self._delete(link)
+
+        self._insert({'instrument': instrument, 'timestamp': str(timestamp), 'link': link, 'radial': radial})
+        self.revision += 1
+
+    # removes the match of a link, returns False if the link was not matched
+    def remove(self, link):
+        if link not in self._matches:
+            return False
+
+        self._delete(link)
+        self.revision += 1
+
+        return True
+
+    def clear(self):
+        self.__init__(revision=self.revision + 1)
+
+    def __contains__(self, link):
+        return link in self._matches
+
+    def __len__(self):
+        return len(self._matches)
+
+    # links matched for an instrument
+    def instrument_links(self, instrument):
+        return frozenset(self._instruments.get(instrument, ()))
+
+    # matches in the order they were made
+    def matches(self):
+        return list(self._matches.values())
+
+    # slope (solar radii per day) and intercept (solar radii at origin) of the radial distance over time,
+    # or None for fewer than two matches at distinct times
+    def fit(self):
+        n, sum_t, sum_r, sum_tt, sum_tr = self._sums
+        denominator = n * sum_tt - sum_t * sum_t
+
+        if n < 2 or abs(denominator) <= 1e-12 * max(n * sum_tt, 1e-300):
+            return None
+
+        slope = (n * sum_tr - sum_t * sum_r) / denominator
+
+        return slope, (sum_r - slope * sum_t) / n
+
+    def to_json(self):
+        return json.dumps({'matches': self.matches(), 'revision': self.revision})
+
+    @classmethod
+    def from_json(cls, match_json):
+        matches = json.loads(match_json) if match_json else dict()
+
+        return cls(matches.get('matches', []), matches.get('revision', 0))
+
+    def _insert(self, match):
+        time = datetime.strptime(match['timestamp'], TIMESTAMP_FORMAT)
+
+        if self.origin is None:
+            self.origin = time
+
+        self._matches[match['link']] = match
+        self._instruments[match['instrument']].add(match['link'])
+        self._accumulate(time, match['radial'], 1)
+
+    def _delete(self, link):
+        match = self._matches.pop(link)
+        self._instruments[match['instrument']].discard(link)
+        self._accumulate(datetime.strptime(match['timestamp'], TIMESTAMP_FORMAT), match['radial'], -1)
+
+        # drop the rounding left over by the subtractions
+        if not self._matches:
+            self._sums = [0, 0.0, 0.0, 0.0, 0.0]
+
+    def _accumulate(self, time, radial, sign):
+        t = (time - self.origin).total_seconds() / 86400.0
+
+        self._sums[0] += sign
+        self._sums[1] += sign * t
+        self._sums[2] += sign * radial
+        self._sums[3] += sign * t * t
+        self._sums[4] += sign * t * radial
@@ -0,0 +1,334 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# server side movies of a loaded window: every running difference of its stack with the lemniscate silhouette
+# drawn over it, rasterised with matplotlib Agg over a pool of worker processes and encoded as GIF, APNG or MP4
+# movies are cached on disk keyed by everything they are rendered from, a repeated request is served from there
+
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import swpc_api
+import swpc_utils
+from swpc_lazy import LazyModule
+
+pyplot = LazyModule('matplotlib.pyplot')
+sunpy = LazyModule('sunpy', ['sunpy.map'])
+PIL = LazyModule('PIL', ['PIL.Image'])
+
+# movie format -> (file extension, mimetype)
+MOVIE_FORMATS = {'gif': ('gif', 'image/gif'), 'apng': ('png', 'image/apng'), 'mp4': ('mp4', 'video/mp4')}
+
+# width and height of a movie frame (pixels), even as MP4 needs
+MOVIE_PIXELS = 512
+MOVIE_DPI = 100
+
+# worker processes rasterising the frames of a movie, every WSGI process starts a pool of its own next to
+# the preprocessing one (swpc_preprocess.PREPROCESS_WORKERS), so the default stays small
+MOVIE_WORKERS = int(os.environ.get('SWPC_CAT_MOVIE_WORKERS', min(os.cpu_count() or 1, 2)))
+
+# directory of the movie cache and the number of movies kept in it, the least recently written go first
+MOVIE_CACHE_DIR = os.environ.get('SWPC_CAT_MOVIE_CACHE', os.path.join(tempfile.gettempdir(), 'swpc_cat_movies'))
+MOVIE_CACHE_FILES = int(os.environ.get('SWPC_CAT_MOVIE_CACHE_FILES', 50))
+
+# ffmpeg executable, encodes GIF and MP4; APNG is always written here
+FFMPEG = os.environ.get('SWPC_CAT_FFMPEG') or shutil.which('ffmpeg')
+
+# part of every cache key, raised when the rendering changes so older movies are not served
+MOVIE_VERSION = 1
+
+# share of the job progress taken by the frame geometries, the encoding takes the rest after the frames
+GEOMETRY_PROGRESS = 0.1
+FRAMES_PROGRESS = 0.9
+
+# ffmpeg output options per format, the input is raw rgb24 frames on stdin
+FFMPEG_OUTPUT = {'gif': ['-vf', 'split[a][b];[a]palettegen[p];[b][p]paletteuse', '-loop', '0', '-f', 'gif'],
+                 'mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-movflags', '+faststart', '-f', 'mp4']}
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+# formats a movie can be encoded in with the encoders of this machine
+def movie_formats():
+    formats = ['apng']
+
+    if FFMPEG is not None or importlib.util.find_spec('PIL') is not None:
+        formats.insert(0, 'gif')
+
+    if FFMPEG is not None:
+        formats.append('mp4')
+
+    return formats
+
+
+# figure of a difference image with a silhouette drawn over it, in grid units, as the 2d panels show it
+def overlay_figure(image_data, hull, title, inches=6, clim=(None, None)):
+    figure = pyplot.figure(figsize=(inches, inches), dpi=MOVIE_DPI)
+    axes = figure.add_axes([0, 0, 1, 1])
+    half_width = swpc_utils.GRID_HALF_WIDTH
+
+    axes.imshow(image_data, cmap='gray', origin='lower', extent=[-half_width, half_width, -half_width, half_width],
+                vmin=clim[0], vmax=clim[1])
+    axes.plot(np.append(hull[0], hull[0, 0]), np.append(hull[1], hull[1, 0]), color='yellow', linewidth=1)
+    axes.text(0.02, 0.98, title, color='white', transform=axes.transAxes, verticalalignment='top')
+    axes.set_xlim(-half_width, half_width)
+    axes.set_ylim(-half_width, half_width)
+    axes.axis('off')
+
+    return figure
+
+
+# rasterises one frame of a stack, the display is stretched and gamma corrected as the panel sliders do
+# returns the (MOVIE_PIXELS, MOVIE_PIXELS, 3) uint8 rgb frame
+def render_frame(frame, hull, title, gamma, stretch_top, stretch_bot):
+    image = swpc_utils.display_image(frame.astype(np.float32), gamma, stretch_top, stretch_bot)
+    clim = (min(stretch_top, stretch_bot) ** gamma, max(stretch_top, stretch_bot) ** gamma)
+
+    figure = overlay_figure(image, hull, title, MOVIE_PIXELS / MOVIE_DPI, clim)
+    figure.canvas.draw()
+    rgb = np.asarray(figure.canvas.buffer_rgba())[..., :3].copy()
+    pyplot.close(figure)
+
+    return rgb
+
+
+# key of a movie in the cache: the frames and their saturation, the lemniscate parameters, the display and the encoding
+def movie_key(links, saturation, sat_id, parameters, display, fps, fmt):
+    values = [MOVIE_VERSION, list(links), saturation, sat_id, list(parameters), list(display), fps, fmt, MOVIE_PIXELS]
+
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()
+
+
+def movie_path(key, fmt):
+    return os.path.join(MOVIE_CACHE_DIR, '{}.{}'.format(key, MOVIE_FORMATS[fmt][0]))
+
+
+# path of a cached movie, None when it was not rendered yet
+def cached_movie(key, fmt):
+    path = movie_path(key, fmt)
+
+    return path if os.path.isfile(path) else None
+
+
+# job function rendering the movie of a difference stack, see swpc_utils.difference_stack
+# titles holds the caption of every frame, display is (gamma, stretch top, stretch bottom)
+# returns (key, fmt) once the movie is in the cache
+def render_movie(report, key, stack, sat_id, titles, lemniscate, display, fps, fmt):
+    if cached_movie(key, fmt) is not None:
+        return key, fmt
+
+    frames = stack['frames']
+    count = len(frames)
+
+    # frame i is the difference of links i + 1 and i, seen from the observer of link i + 1
+    geometries = [swpc_api.Observer.from_map(sunpy.map.Map(frames[index], stack['meta'][index + 1]), sat_id).geometry
+                  for index in range(count)]
+    hulls = lemniscate.silhouettes(geometries)
+    report(GEOMETRY_PROGRESS, 'silhouettes')
+
+    return encode_movie(report, key, frames, hulls, titles, display, fps, fmt)
+
+
+# rasterises frames with their silhouettes over the worker pool, encodes them and moves the movie into the cache
+# every render writes a partial file of its own, two sessions rendering the same movie do not write into each other
+# returns (key, fmt)
+def encode_movie(report, key, frames, hulls, titles, display, fps, fmt):
+    count = len(frames)
+
+    os.makedirs(MOVIE_CACHE_DIR, exist_ok=True)
+    descriptor, partial = tempfile.mkstemp(suffix='.part', prefix=key + '.', dir=MOVIE_CACHE_DIR)
+    os.close(descriptor)
+
+    try:
+        encoder = _encoder(partial, fmt, fps, count)
+    except Exception:
+        os.remove(partial)
+        raise
+
+    # frames come back in order and go to the encoder one at a time, so only a few are ever held
+    try:
+        rendered = _worker_pool().map(render_frame, frames, hulls, titles,
+                                      *[itertools.repeat(value) for value in display],
+                                      chunksize=max(1, count // (4 * MOVIE_WORKERS)))
+
+        for index, rgb in enumerate(rendered):
+            encoder.add(rgb)
+            report(GEOMETRY_PROGRESS + (FRAMES_PROGRESS - GEOMETRY_PROGRESS) * (index + 1) / count,
+                   'frame {} of {}'.format(index + 1, count))
+
+        report(FRAMES_PROGRESS, 'encoding')
+        encoder.close()
+    except Exception as error:
+        if isinstance(error, BrokenProcessPool):
+            _reset_pool()
+
+        _discard(encoder, partial)
+        raise
+
+    os.replace(partial, movie_path(key, fmt))
+    _prune_cache()
+
+    return key, fmt
+
+
+# worker processes only rasterise, matplotlib runs on its Agg backend there
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+# the worker pool is started with the first movie and shared by all later ones
+def _worker_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MOVIE_WORKERS, initializer=_init_worker)
+
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+
+    with _pool_lock:
+        _pool = None
+
+
+# closes the encoder of a failed movie and removes what it wrote
+def _discard(encoder, partial):
+    try:
+        encoder.close()
+    except Exception:
+        pass
+
+    if os.path.exists(partial):
+        os.remove(partial)
+
+
+# drops the least recently written movies beyond MOVIE_CACHE_FILES
+def _prune_cache():
+    movies = [entry for entry in os.scandir(MOVIE_CACHE_DIR) if entry.is_file() and not entry.name.endswith('.part')]
+    movies.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+
+    for entry in movies[MOVIE_CACHE_FILES:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _encoder(path, fmt, fps, count):
+    if fmt == 'apng':
+        return _ApngEncoder(path, fps, count)
+
+    if FFMPEG is not None:
+        return _FfmpegEncoder(path, fmt, fps)
+
+    if fmt == 'gif' and importlib.util.find_spec('PIL') is not None:
+        return _PillowGifEncoder(path, fps)
+
+    raise ValueError('no local encoder for {} movies'.format(fmt))
+
+
+# animated PNG written chunk by chunk as the frames come in, needs nothing but zlib
+class _ApngEncoder(object):
+
+    def __init__(self, path, fps, count):
+        self.file = open(path, 'wb')
+        self.fps = fps
+        self.count = count
+        self.sequence = 0
+
+    def add(self, rgb):
+        height, width = rgb.shape[:2]
+
+        if self.sequence == 0:
+            self.file.write(b'\x89PNG\r\n\x1a\n')
+            self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            self._chunk(b'acTL', struct.pack('>II', self.count, 0))
+
+        first = self.sequence == 0
+        self._chunk(b'fcTL', struct.pack('>IIIIIHHBB', self._next(), width, height, 0, 0, 1, self.fps, 0, 0))
+
+        # every scanline starts with filter type 0
+        data = zlib.compress(np.insert(rgb.reshape(height, -1), 0, 0, axis=1).tobytes(), 6)
+
+        if first:
+            self._chunk(b'IDAT', data)
+        else:
+            self._chunk(b'fdAT', struct.pack('>I', self._next()) + data)
+
+    def close(self):
+        if not self.file.closed:
+            self._chunk(b'IEND', b'')
+            self.file.close()
+
+    def _next(self):
+        self.sequence += 1
+        return self.sequence - 1
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data)))
+
+
+# raw rgb24 frames piped into ffmpeg as they come in
+class _FfmpegEncoder(object):
+
+    def __init__(self, path, fmt, fps):
+        self.path = path
+        self.fmt = fmt
+        self.fps = fps
+        self.process = None
+
+    def add(self, rgb):
+        if self.process is None:
+            self.process = subprocess.Popen([FFMPEG, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                             '-s', '{}x{}'.format(rgb.shape[1], rgb.shape[0]), '-r', str(self.fps),
+                                             '-i', '-'] + FFMPEG_OUTPUT[self.fmt] + [self.path],
+                                            stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        self.process.stdin.write(np.ascontiguousarray(rgb).tobytes())
+
+    def close(self):
+        if self.process is None:
+            return
+
+        self.process.stdin.close()
+        error = self.process.stderr.read()
+
+        if self.process.wait() != 0:
+            raise RuntimeError('ffmpeg failed: ' + error.decode(errors='replace').strip())
+
+
+# animated GIF through Pillow where there is no ffmpeg, the quantised frames are kept until the end
+class _PillowGifEncoder(object):
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.images = []
+
+    def add(self, rgb):
+        self.images.append(PIL.Image.fromarray(rgb).quantize(256))
+
+    def close(self):
+        if self.images:
+            self.images[0].save(self.path, format='GIF', save_all=True, append_images=self.images[1:],
+                                duration=int(1000 / self.fps), loop=0)
+            self.images = []
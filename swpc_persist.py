@@ -0,0 +1,142 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# server side session documents: the loaded windows, matches and control values of a session, kept in SQLite
+# under the session id so a reloaded or shared page reopens where it was left
+# a document is plain JSON, stored zlib compressed, and replaced as a whole when it is written
+# saves are gathered for SAVE_DELAY seconds and only the last document of a session is written, expired documents
+# are swept at most every SWEEP_INTERVAL seconds
+
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# SQLite file of the session documents
+SESSION_DB = os.environ.get('SWPC_CAT_SESSION_DB', os.path.join(tempfile.gettempdir(), 'swpc_cat_sessions.sqlite'))
+
+# seconds a session document is kept after its last save
+SESSION_TTL = float(os.environ.get('SWPC_CAT_SESSION_TTL_DAYS', 30)) * 86400
+
+# seconds the saves of a session are gathered before its document is written
+SAVE_DELAY = float(os.environ.get('SWPC_CAT_SESSION_SAVE_DELAY', 2))
+
+# seconds between two sweeps of the expired documents
+SWEEP_INTERVAL = 3600
+
+# part of every document, raised when the document layout changes so older documents are not restored
+DOCUMENT_VERSION = 1
+
+# one connection per thread, sqlite3 connections cannot be shared between threads
+_local = threading.local()
+
+# session id -> compressed document saved but not written yet
+_pending_lock = threading.Lock()
+_pending = dict()
+
+# documents are written on one thread, away from the request threads
+_writer = ThreadPoolExecutor(max_workers=1)
+
+# time of the last sweep of the expired documents
+_last_sweep = 0.0
+
+
+def _connection():
+    connection = getattr(_local, 'connection', None)
+
+    if connection is None:
+        connection = _local.connection = sqlite3.connect(SESSION_DB, timeout=10)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS sessions '
+                           '(id TEXT PRIMARY KEY, saved REAL NOT NULL, document BLOB NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS sessions_saved ON sessions (saved)')
+
+    return connection
+
+
+# saves the document of a session, replacing the one saved before; it is written SAVE_DELAY seconds after the
+# first save that is not written yet, together with every save that came in meanwhile
+def save(session_id, document):
+    blob = zlib.compress(json.dumps(dict(document, version=DOCUMENT_VERSION)).encode())
+
+    with _pending_lock:
+        scheduled = session_id in _pending
+        _pending[session_id] = blob
+
+    if not scheduled:
+        _schedule(session_id)
+
+
+# writes every document saved but not written yet, e.g. before the process exits
+def flush():
+    with _pending_lock:
+        session_ids = list(_pending)
+
+    for session_id in session_ids:
+        _write(session_id)
+
+
+atexit.register(flush)
+
+
+def _schedule(session_id):
+    timer = threading.Timer(SAVE_DELAY, _writer.submit, (_write, session_id))
+    timer.daemon = True
+    timer.start()
+
+
+# writes the last saved document of a session, and sweeps the expired documents when it is time to
+# the document stays pending until it is written, a save coming in meanwhile is written after it
+def _write(session_id):
+    global _last_sweep
+
+    with _pending_lock:
+        blob = _pending.get(session_id)
+
+    if blob is None:
+        return
+
+    now = time.time()
+
+    with _connection() as connection:
+        connection.execute('INSERT OR REPLACE INTO sessions (id, saved, document) VALUES (?, ?, ?)',
+                           (session_id, now, blob))
+
+        if now - _last_sweep >= SWEEP_INTERVAL:
+            connection.execute('DELETE FROM sessions WHERE saved < ?', (now - SESSION_TTL,))
+            _last_sweep = now
+
+    with _pending_lock:
+        current = _pending.get(session_id)
+
+        if current is blob:
+            del _pending[session_id]
+
+    if current is not None and current is not blob:
+        _schedule(session_id)
+
+
+# the document of a session, None when there is none or it was saved by an older document version
+# a document saved but not written yet is read from memory
+def load(session_id):
+    with _pending_lock:
+        blob = _pending.get(session_id)
+
+    if blob is None:
+        row = _connection().execute('SELECT saved, document FROM sessions WHERE id = ?', (session_id,)).fetchone()
+
+        if row is None or row[0] < time.time() - SESSION_TTL:
+            return None
+
+        blob = row[1]
+
+    document = json.loads(zlib.decompress(blob).decode())
+
+    return document if document.get('version') == DOCUMENT_VERSION else None
@@ -0,0 +1,116 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from swpc_lazy import LazyModule
+
+sunpy = LazyModule('sunpy', ['sunpy.map'])
+
+# number of preprocessing worker processes, 0 runs the preprocessing synchronously in the calling thread
+# every WSGI process starts a pool of its own, so the default stays well below the core count
+PREPROCESS_WORKERS = int(os.environ.get('SWPC_CAT_PREPROCESS_WORKERS', min(os.cpu_count() or 1, 4)))
+
+# directory used to hand arrays back from the workers, tmpfs keeps the transfer in shared memory
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# sets the number of worker processes, 0 disables the pool (single process dev mode)
+def configure(workers):
+    global _pool, PREPROCESS_WORKERS
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+        PREPROCESS_WORKERS = workers
+
+
+# applies fn to every argument tuple, in the worker pool when it is enabled
+# fn must be a module level function returning an object with .data and .meta (a sunpy map)
+# the results are rebuilt as sunpy maps in the calling process, in argument order
+# when one frame fails every other one is still waited for and its shared file released before the error is raised
+def map_frames(fn, arg_list):
+    pool = _get_pool()
+
+    if pool is None:
+        return [fn(*args) for args in arg_list]
+
+    futures = []
+
+    try:
+        for args in arg_list:
+            futures.append(pool.submit(_shared_result, fn, args))
+
+        wait(futures)
+
+        return [sunpy.map.Map(_take_shared(path), meta) for path, meta in [future.result() for future in futures]]
+    except BrokenProcessPool:
+        _reset_pool(pool)
+    finally:
+        wait(futures)
+
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                _release_shared(future.result()[0])
+
+    return [fn(*args) for args in arg_list]
+
+
+def _get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None and PREPROCESS_WORKERS > 0:
+            _pool = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS)
+
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+# runs in the worker, writes the frame data to a shared memory map instead of pickling it back
+def _shared_result(fn, args):
+    frame = fn(*args)
+
+    path = os.path.join(SHARED_DIR, 'swpc_cat_{}.npy'.format(uuid.uuid4().hex))
+    shared = np.lib.format.open_memmap(path, mode='w+', dtype=frame.data.dtype, shape=frame.data.shape)
+    shared[...] = frame.data
+    shared.flush()
+    del shared
+
+    return path, dict(frame.meta)
+
+
+# reads an array handed back by a worker and releases its shared memory
+def _take_shared(path):
+    try:
+        return np.array(np.load(path, mmap_mode='r'))
+    finally:
+        os.remove(path)
+
+
+# releases the shared memory of an array that was not taken, a taken one is already gone
+def _release_shared(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
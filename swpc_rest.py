@@ -0,0 +1,303 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+# versioned JSON routes for other tools: batched silhouettes and kinematic fits, served from the caches of the app
+#
+# POST /api/v1/silhouettes
+#   {"parameters": [[radial, angular, long, lat], ...],
+#    "observers": [{"geometry": {"lon", "lat", "x_translate", "y_translate", "scale"}}
+#                  | {"instrument": "SOHO C3", "link": url, "previous": url}, ...],
+#    "format": "json" | "npz"}
+#   parameters lie within the ranges of the sliders of the app, frame links must be on one of FRAME_HOSTS
+#   json: {"silhouettes": [[[[x, y], ...] per observer] per parameter set]}
+#   npz: vertices (n, 2) float32 and offsets (parameter sets * observers + 1),
+#        hull i is vertices[offsets[i]:offsets[i + 1]], parameter set major
+# POST /api/v1/kinematics
+#   {"match_lists": [[{"instrument", "timestamp": "YYYY-MM-DD HH:MM:SS", "radial"}, ...], ...]}
+#   {"fits": [{"velocity", "arrival", ...} | null, ...]}, the uncertainty over API_UNCERTAINTY_SAMPLES per list
+# GET /api/v1/metrics
+#   request count, errors and latency per route, percentiles and maximum over the last LATENCY_WINDOW requests
+# errors are answered as {"error": message}: 4xx for requests that cannot be served, 502 for frames that cannot be
+# downloaded or read
+
+import functools
+import io
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+import flask
+import numpy as np
+import swpc_api
+import swpc_kinematics
+import swpc_matches
+import swpc_utils
+
+API_VERSION = 'v1'
+
+api = flask.Blueprint('swpc_api_' + API_VERSION, __name__, url_prefix='/api/' + API_VERSION)
+
+# largest request body accepted (bytes)
+MAX_REQUEST_BYTES = 1 << 20
+
+# most silhouettes (parameter sets * observers) per request
+MAX_SILHOUETTES = 20000
+
+# most observers given as frame links per request, each may need a download
+MAX_FRAME_OBSERVERS = 8
+
+# most match lists per request, and matches per list
+MAX_MATCH_LISTS = 1000
+MAX_MATCHES = 500
+
+# perturbed match lists the uncertainty of a fit is taken over, fewer than in the app as one request may hold
+# as many matches as MAX_REQUEST_BYTES allows
+API_UNCERTAINTY_SAMPLES = 1000
+
+# radial, angular, longitude and latitude range of the lemniscate parameters, as the sliders of the app
+PARAMETER_RANGES = ((1, 45), (20, 140), (-180, 180), (-90, 90))
+
+# hosts frame links are downloaded from, the frame catalogue host by default
+FRAME_HOSTS = frozenset(os.environ.get('SWPC_CAT_FRAME_HOSTS', 'iswa.gsfc.nasa.gov').split(','))
+
+# number of recent latencies per route the percentiles are taken over
+LATENCY_WINDOW = 1000
+
+# fits of recent match lists, (instrument, timestamp, radial) tuples -> kinematics result
+KINEMATICS_CACHE_LIMIT = 1024
+
+_metrics_lock = threading.Lock()
+
+# route -> request count, error count, total and recent latencies
+route_metrics = OrderedDict()
+
+_kinematics_lock = threading.Lock()
+_kinematics_cache = OrderedDict()
+
+GEOMETRY_KEYS = ('lon', 'lat', 'x_translate', 'y_translate', 'scale')
+
+
+# request the API cannot serve, answered with its status and a JSON error message
+class ApiError(Exception):
+
+    def __init__(self, status, message):
+        super(ApiError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+# JSON error answer of a route
+def error_response(status, message):
+    return flask.make_response(flask.jsonify({'error': message}), status)
+
+
+# records the latency of every request of a route and turns its errors into JSON error responses
+# silhouettes qhull cannot hull are the request's, anything else unexpected is logged and answered with a 500
+def timed(fn):
+    @functools.wraps(fn)
+    def route(*args, **kwargs):
+        start = time.perf_counter()
+        failed = True
+
+        try:
+            response = fn(*args, **kwargs)
+            failed = False
+            return response
+        except ApiError as error:
+            return error_response(error.status, error.message)
+        except swpc_utils.spatial.QhullError:
+            return error_response(400, 'the parameters give no silhouette for an observer')
+        except Exception:
+            flask.current_app.logger.exception('%s failed', fn.__name__)
+            return error_response(500, 'internal error')
+        finally:
+            _record(fn.__name__, time.perf_counter() - start, failed)
+
+    return route
+
+
+def _record(name, elapsed, failed):
+    with _metrics_lock:
+        metrics = route_metrics.setdefault(name, {'count': 0, 'errors': 0, 'total_s': 0.0,
+                                                  'recent': deque(maxlen=LATENCY_WINDOW)})
+        metrics['count'] += 1
+        metrics['errors'] += failed
+        metrics['total_s'] += elapsed
+        metrics['recent'].append(elapsed)
+
+
+# JSON body of a request, within MAX_REQUEST_BYTES
+def payload():
+    if flask.request.content_length is None or flask.request.content_length > MAX_REQUEST_BYTES:
+        raise ApiError(413, 'request body must be given and at most {} bytes'.format(MAX_REQUEST_BYTES))
+
+    body = flask.request.get_json(silent=True)
+
+    if not isinstance(body, dict):
+        raise ApiError(400, 'request body must be a JSON object')
+
+    return body
+
+
+# geometry of an observer given either as geometry values or as a frame pair, the latter goes through the
+# frame cache of the app
+def observer_geometry(spec):
+    if not isinstance(spec, dict):
+        raise ApiError(400, 'observers must be objects')
+
+    if 'geometry' in spec:
+        try:
+            geometry = dict((key, float(spec['geometry'][key])) for key in GEOMETRY_KEYS)
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, 'a geometry needs numeric {}'.format(', '.join(GEOMETRY_KEYS)))
+
+        if not np.isfinite(list(geometry.values())).all() or geometry['scale'] <= 0:
+            raise ApiError(400, 'geometry values must be finite and the scale positive')
+
+        return geometry
+
+    if spec.get('instrument') not in swpc_api.INSTRUMENTS or 'link' not in spec or 'previous' not in spec:
+        raise ApiError(400, 'a frame observer needs instrument, link and previous')
+
+    links = (frame_link(spec['link']), frame_link(spec['previous']))
+
+    try:
+        image = swpc_api.DifferenceImage.from_links(links[0], links[1], swpc_api.INSTRUMENTS[spec['instrument']][1])
+    except OSError:
+        raise ApiError(502, 'frames {} could not be downloaded'.format(', '.join(links)))
+    except (KeyError, TypeError, ValueError):
+        raise ApiError(502, 'frames {} could not be read'.format(', '.join(links)))
+
+    return image.observer.geometry
+
+
+# a frame link of a request, only https links on FRAME_HOSTS are downloaded
+def frame_link(link):
+    parts = urlsplit(link) if isinstance(link, str) else None
+
+    if parts is None or parts.scheme != 'https' or parts.hostname not in FRAME_HOSTS or parts.port is not None:
+        raise ApiError(400, 'frame links must be https links on {}'.format(', '.join(sorted(FRAME_HOSTS))))
+
+    return link
+
+
+@api.route('/silhouettes', methods=['POST'])
+@timed
+def silhouettes():
+    body = payload()
+
+    try:
+        parameters = np.asarray(body.get('parameters'), dtype=np.float64)
+    except (TypeError, ValueError):
+        parameters = None
+
+    if parameters is None or parameters.ndim != 2 or parameters.shape[1] != 4 or not len(parameters):
+        raise ApiError(400, 'parameters must be a non empty list of [radial, angular, long, lat]')
+
+    low, high = np.array(PARAMETER_RANGES).T
+
+    if not (np.isfinite(parameters).all() and (parameters >= low).all() and (parameters <= high).all()):
+        raise ApiError(400, 'radial, angular, long and lat must lie within {}'.format(
+            ', '.join('[{}, {}]'.format(*limits) for limits in PARAMETER_RANGES)))
+
+    specs = body.get('observers')
+
+    if not isinstance(specs, list) or not specs:
+        raise ApiError(400, 'observers must be a non empty list')
+
+    if len(parameters) * len(specs) > MAX_SILHOUETTES:
+        raise ApiError(413, 'at most {} silhouettes per request'.format(MAX_SILHOUETTES))
+
+    if sum('geometry' not in spec for spec in specs if isinstance(spec, dict)) > MAX_FRAME_OBSERVERS:
+        raise ApiError(413, 'at most {} frame observers per request'.format(MAX_FRAME_OBSERVERS))
+
+    geometries = [observer_geometry(spec) for spec in specs]
+    hulls = [swpc_api.Lemniscate(*values).silhouettes(geometries) for values in parameters]
+
+    if body.get('format') == 'npz':
+        vertices = [hull.T for observer_hulls in hulls for hull in observer_hulls]
+        buffer = io.BytesIO()
+        np.savez(buffer, vertices=np.concatenate(vertices).astype(np.float32),
+                 offsets=np.cumsum([0] + [len(points) for points in vertices]))
+
+        return flask.Response(buffer.getvalue(), mimetype='application/octet-stream')
+
+    return flask.jsonify({'silhouettes': [[np.round(hull.T, 3).tolist() for hull in observer_hulls]
+                                          for observer_hulls in hulls]})
+
+
+@api.route('/kinematics', methods=['POST'])
+@timed
+def kinematics():
+    match_lists = payload().get('match_lists')
+
+    if not isinstance(match_lists, list) or not all(isinstance(matches, list) for matches in match_lists):
+        raise ApiError(400, 'match_lists must be a list of lists')
+
+    if len(match_lists) > MAX_MATCH_LISTS or any(len(matches) > MAX_MATCHES for matches in match_lists):
+        raise ApiError(413, 'at most {} match lists of {} matches per request'.format(MAX_MATCH_LISTS, MAX_MATCHES))
+
+    return flask.jsonify({'fits': [match_list_fit(matches).summary() for matches in match_lists]})
+
+
+# fit of a match list, from the kinematics cache when the same list was fitted before
+def match_list_fit(matches):
+    try:
+        key = tuple((str(match.get('instrument', '')), str(match['timestamp']), float(match['radial']))
+                    for match in matches)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise ApiError(400, 'a match needs a timestamp and a numeric radial')
+
+    if not np.isfinite([radial for _, _, radial in key]).all():
+        raise ApiError(400, 'radial distances must be finite')
+
+    with _kinematics_lock:
+        result = _kinematics_cache.get(key)
+
+        if result is not None:
+            _kinematics_cache.move_to_end(key)
+            return swpc_api.KinematicFit(result)
+
+    store = swpc_matches.MatchStore()
+
+    try:
+        for number, (instrument, timestamp, radial) in enumerate(key):
+            store.add(instrument, timestamp, str(number), radial)
+    except ValueError:
+        raise ApiError(400, 'timestamps must be formatted as YYYY-MM-DD HH:MM:SS')
+
+    try:
+        result = swpc_kinematics.kinematics(store, API_UNCERTAINTY_SAMPLES)
+    except (ArithmeticError, ValueError):
+        raise ApiError(422, 'the match list cannot be fitted')
+
+    with _kinematics_lock:
+        _kinematics_cache[key] = result
+
+        while len(_kinematics_cache) > KINEMATICS_CACHE_LIMIT:
+            _kinematics_cache.popitem(last=False)
+
+    return swpc_api.KinematicFit(result)
+
+
+@api.route('/metrics')
+def metrics():
+    with _metrics_lock:
+        snapshot = [(name, dict(values, recent=sorted(values['recent']))) for name, values in route_metrics.items()]
+
+    report = dict()
+
+    for name, values in snapshot:
+        recent = values['recent']
+        report[name] = {'count': values['count'],
+                        'errors': values['errors'],
+                        'mean_ms': 1e3 * values['total_s'] / values['count'],
+                        'p50_ms': 1e3 * recent[len(recent) // 2],
+                        'p95_ms': 1e3 * recent[min(int(len(recent) * 0.95), len(recent) - 1)],
+                        'max_ms': 1e3 * recent[-1]}
+
+    return flask.jsonify(report)
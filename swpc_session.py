@@ -0,0 +1,143 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import itertools
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+# maximum number of sessions kept in the session store, the least recently used one is dropped first
+SESSION_LIMIT = 256
+
+# largest total size (bytes) of the difference stacks kept over all sessions, the least recently published
+# stack is dropped first and rebuilt when its panel asks for it again
+STACK_STORE_BYTES = int(float(os.environ.get('SWPC_CAT_STACK_STORE_MB', 1024)) * 2 ** 20)
+
+# guards the render tokens and counters below
+_render_lock = threading.Lock()
+
+# monotonically increasing render token source, shared by every session
+_render_tokens = itertools.count(1)
+
+# latest render token per (session id, panel)
+_latest_render = dict()
+
+# render counters, cancelled renders are also counted by the stage they were dropped at
+render_stats = Counter()
+
+
+# guards the session store
+_store_lock = threading.Lock()
+
+# session id -> dict of server side session data, in least recently used order
+_session_store = OrderedDict()
+
+# (session id, hidden div id) -> bytes of every published difference stack, in publishing order
+_stack_bytes = OrderedDict()
+
+
+# raised at a pipeline stage boundary when a newer render for the same panel has arrived
+class RenderCancelled(Exception):
+    pass
+
+
+# creates the id that ties the callbacks of one browser page together
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+# returns the server side data dict of a session, creating it on first use
+def session_data(session_id):
+    with _store_lock:
+        data = _session_store.get(session_id)
+
+        if data is None:
+            data = _session_store[session_id] = dict()
+
+            if len(_session_store) > SESSION_LIMIT:
+                dropped, _ = _session_store.popitem(last=False)
+
+                for key in [key for key in _stack_bytes if key[0] == dropped]:
+                    del _stack_bytes[key]
+        else:
+            _session_store.move_to_end(session_id)
+
+        return data
+
+
+# stores a value under section/key in the session data
+def publish(session_id, section, key, value):
+    data = session_data(session_id)
+
+    with _store_lock:
+        data.setdefault(section, dict())[key] = value
+
+
+# publishes the difference stack of a window under stacks/hidden_id, dropping the least recently published
+# stacks of any session while the stacks exceed STACK_STORE_BYTES; the stack just published is always kept
+def publish_stack(session_id, hidden_id, stack):
+    publish(session_id, 'stacks', hidden_id, stack)
+
+    with _store_lock:
+        _stack_bytes.pop((session_id, hidden_id), None)
+        _stack_bytes[(session_id, hidden_id)] = stack['frames'].nbytes + (
+            stack['raw'].nbytes if stack['raw'] is not None else 0)
+        total = sum(_stack_bytes.values())
+
+        while total > STACK_STORE_BYTES and len(_stack_bytes) > 1:
+            (dropped, dropped_hidden), size = _stack_bytes.popitem(last=False)
+            total -= size
+            _session_store.get(dropped, dict()).get('stacks', dict()).pop(dropped_hidden, None)
+
+
+# reads a value published under section/key, or default if it is not there
+def published(session_id, section, key, default=None):
+    data = session_data(session_id)
+
+    with _store_lock:
+        return data.get(section, dict()).get(key, default)
+
+
+# registers a new render for a panel and returns its token
+# any render of the same panel started before it becomes stale
+def begin_render(session_id, panel):
+    with _render_lock:
+        token = next(_render_tokens)
+        _latest_render[(session_id, panel)] = token
+        render_stats['started'] += 1
+
+    return token
+
+
+# aborts the render if a newer one for the same panel has been registered
+# stage names the pipeline boundary, e.g. 'fetch', 'preprocess' or 'serialise'
+def check_render(session_id, panel, token, stage):
+    if _latest_render.get((session_id, panel)) != token:
+        with _render_lock:
+            render_stats['cancelled'] += 1
+            render_stats['cancelled_' + stage] += 1
+        raise RenderCancelled(stage)
+
+
+# returns a checkpoint function bound to one render, for use inside the image pipeline
+def render_checkpoint(session_id, panel, token):
+    return lambda stage: check_render(session_id, panel, token, stage)
+
+
+# marks a render as finished, forgetting the panel if no newer render is in flight
+def end_render(session_id, panel, token):
+    with _render_lock:
+        render_stats['completed'] += 1
+
+    forget_render(session_id, panel, token)
+
+
+# forgets the panel of a render that ended without a figure, e.g. when its pipeline raised,
+# if no newer render is in flight; a finished or overtaken render leaves nothing to forget
+def forget_render(session_id, panel, token):
+    with _render_lock:
+        if _latest_render.get((session_id, panel)) == token:
+            del _latest_render[(session_id, panel)]
@@ -3,21 +3,29 @@
 # National Aeronautics and Space Administration. All Rights Reserved.
 #
 
+import os
+import threading
 import time
+from collections import Counter, OrderedDict
 
 import numpy as np
-import sunpy.map
-import sunpy.io
 import json
-import astropy.units as u
-import pandas as pd
-from scipy import stats
-from scipy.spatial import ConvexHull
-from astropy.utils.data import download_file
 import urllib
 from datetime import datetime, timedelta
 import requests
 from pyquaternion import Quaternion
+import swpc_preprocess
+import swpc_ephemeris
+import swpc_frames
+from swpc_lazy import LazyModule
+
+# the sunpy/astropy/scipy stack is only imported on first use
+sunpy = LazyModule('sunpy', ['sunpy.map', 'sunpy.coordinates', 'sunpy.io'])
+u = LazyModule('astropy.units')
+astropy_data = LazyModule('astropy.utils.data')
+spatial = LazyModule('scipy.spatial')
+ndimage = LazyModule('scipy.ndimage')
+pd = LazyModule('pandas')
 
 # quantity of polygons
 n = 21
@@ -33,6 +41,59 @@ AU_REFERENCE_CUBE = 1
 # constant for domain and grid inits
 GRID_HALF_WIDTH = 800
 
+# pixel dimensions every frame is warped to
+FRAME_SHAPE = (256, 256)
+
+# frame sizes of the resolution pyramid, the first is the overview (FRAME_SHAPE), the others are built on demand
+PYRAMID_LEVELS = (256, 512, 1024)
+
+# zero border added around a frame before warping, wide enough for the cubic spline support
+WARP_MARGIN = 8
+
+# floating point type of the image pipeline (warp, difference, display), float64 reproduces the original path
+PIPELINE_DTYPE = np.dtype(os.environ.get('SWPC_CAT_DTYPE', 'float32'))
+
+# preallocated work arrays, per thread so concurrent renders never share them
+_work = threading.local()
+
+# rows reduced at a time by min_max, a block stays in cache between its min and its max
+MIN_MAX_BLOCK = 64
+
+# running: each frame against the one before it, base: every frame against a fixed reference frame,
+# ratio: each frame divided by the one before it
+DIFFERENCE_MODES = ('running', 'base', 'ratio')
+
+# labels of the difference modes in the panel controls
+DIFFERENCE_MODE_LABELS = {'running': 'Running', 'base': 'Base', 'ratio': 'Ratio'}
+
+# keep the unscaled float difference next to the uint8 stack, so the stack also serves other saturations
+# (four times the memory of the uint8 stack); without it a stack serves the saturation it was built at,
+# the app builds every stack at the saturation of its panel
+STACK_KEEP_FLOAT = False
+
+# largest window a difference stack is built for
+STACK_MAX_FRAMES = 300
+
+# frames normalised and differenced per pass while building a stack, below the normalised frame cache size
+STACK_CHUNK = 32
+
+# maximum number of silhouettes kept in the hull cache
+HULL_CACHE_LIMIT = 4096
+
+# steps of the radial, angular, longitude and latitude sliders, the app quantises slider values to them
+HULL_QUANTA = (0.1, 1, 1, 1)
+
+# decimals of the observer geometry values that tell two observers apart in the hull cache
+HULL_GEOMETRY_DECIMALS = 6
+
+# hull cache, (observer geometry, lemniscate parameters) -> read only hull, least recently used first
+# shared by every panel and session of the process
+_hull_cache = OrderedDict()
+_hull_cache_lock = threading.Lock()
+
+# hits, misses and evictions of the hull cache
+hull_cache_stats = Counter()
+
 
 # function takes care of updating all of the points for the different plots
 def plot_update(radial, angular, long, lat):
@@ -71,13 +132,47 @@ def functions_sphere(radius, smooth, distance):
     return np.array([x, y, z])
 
 
-# quaternion rotation function
-def rotation(lo, la, v, smooth):
+# builds the lemniscate surface as a flat (n * n, 3) point cloud in plot pixels
+# unlike plot_update no rotation is applied, so the mesh can be shared by several observers
+def lemniscate_mesh(radial, angular):
+    c_one = radial * u.solRad.to(u.km) * (GRID_HALF_WIDTH / (AU_REFERENCE_CUBE * u.AU).to(u.km).value)
+    c_two = c_one * np.tan(np.radians(angular / 2))
+
+    x_mod = c_one * np.cos(theta)
+    y_mod = c_two * np.cos(theta) * np.sin(theta) * np.cos(phi)
+    z_mod = c_two * np.cos(theta) * np.sin(theta) * np.sin(phi)
+
+    return np.column_stack((np.ravel(x_mod), np.ravel(y_mod), np.ravel(z_mod)))
+
+
+# rotation matrix of the longitude/latitude quaternion used by rotation
+def rotation_matrix(lo, la):
     q1 = Quaternion(axis=[0.0, 0.0, 1.0], degrees=lo)
     q2 = Quaternion(axis=[0.0, 1.0, 0.0], degrees=la)
     q_rot = q2 * q1
 
-    rot_matrix = q_rot.rotation_matrix
+    return q_rot.rotation_matrix
+
+
+# rotation matrices of many longitude/latitude pairs at once, equal to rotation_matrix of each pair
+# returns an (n, 3, 3) array
+def rotation_matrices(lo, la):
+    lo = np.radians(np.asarray(lo, dtype=np.float64))
+    la = np.radians(np.asarray(la, dtype=np.float64))
+
+    zeros = np.zeros_like(lo)
+    ones = np.ones_like(lo)
+
+    # rotation about z by the longitude, then about y by the latitude
+    about_z = np.stack([np.cos(lo), -np.sin(lo), zeros, np.sin(lo), np.cos(lo), zeros, zeros, zeros, ones], axis=-1)
+    about_y = np.stack([np.cos(la), zeros, np.sin(la), zeros, ones, zeros, -np.sin(la), zeros, np.cos(la)], axis=-1)
+
+    return about_y.reshape(-1, 3, 3) @ about_z.reshape(-1, 3, 3)
+
+
+# quaternion rotation function
+def rotation(lo, la, v, smooth):
+    rot_matrix = rotation_matrix(lo, la)
     format_v = np.array(list(zip(np.ravel(v[0]), np.ravel(v[1]), np.ravel(v[2]))))
     format_v = format_v @ rot_matrix
 
@@ -85,12 +180,9 @@ def rotation(lo, la, v, smooth):
 
 
 # function for gamma correction
+# corrects image_data in place
 def gamma_correction(image_data, gamma):
-    for i in range(0, len(image_data[1, :])):
-        for j in range(0, len(image_data[:, 1])):
-            image_data[i, j] = image_data[i, j] ** gamma
-
-    return image_data
+    return np.power(image_data, gamma, out=image_data)
 
 
 # grabs a list of url links upon a date
@@ -142,45 +234,273 @@ def extract_images(date, start_time, end_time, satellite):
         return np.empty(1)
 
 
+# minimum and maximum of values in a single sweep over memory
+def min_max(values):
+    rows = np.reshape(values, (-1, np.shape(values)[-1]))
+
+    low = rows[:MIN_MAX_BLOCK].min()
+    high = rows[:MIN_MAX_BLOCK].max()
+
+    for start in range(MIN_MAX_BLOCK, len(rows), MIN_MAX_BLOCK):
+        block = rows[start:start + MIN_MAX_BLOCK]
+        low = min(low, block.min())
+        high = max(high, block.max())
+
+    return low, high
+
+
 # normalizes values to a range of [0,255]
-def byte_scale(values):
-    return 255 * ((values - values.min()) / (values.max() - values.min()))
+# out may be values itself to scale in place
+def byte_scale(values, out=None):
+    low, high = min_max(values)
+
+    out = np.subtract(values, low, out=out)
+    return np.multiply(out, 255 / (high - low), out=out)
 
 
-# takes in two 2d arrays
-# returns the difference of the two arrays
-# by comparing each value to it's representation in the other array
-def difference_image(current, previous, sat, current_exposure, previous_exposure, sat_id, current_off, previous_off):
-    if sat_id == 'LASCO':
-        diff = ((np.ravel(current) - current_off) / current_exposure) - (
-                (np.ravel(previous) - previous_off) / previous_exposure)
+# work arrays of a panel for frames of the given shape, allocated on first use by the calling thread
+# 'display' holds the stretched image; frames are exposure corrected once, in place, when they enter the frame cache
+def work_buffers(panel, shape, dtype=None):
+    dtype = np.dtype(dtype or PIPELINE_DTYPE)
+    buffers = getattr(_work, 'buffers', None)
+
+    if buffers is None:
+        buffers = _work.buffers = {}
+
+    key = (panel, tuple(shape), dtype.str)
+
+    if key not in buffers:
+        buffers[key] = {'display': np.empty(shape, dtype)}
+
+    return buffers[key]
+
+
+# corrects a frame for its offset and exposure, SECCHI frames are also scaled to [0,255]
+# out may be data itself to normalise in place
+def normalise_frame(data, exposure, offset, sat_id, out=None):
+    out = np.subtract(data, offset, out=out)
+    np.divide(out, exposure, out=out)
+
+    if sat_id != 'LASCO':
+        byte_scale(out, out=out)
+
+    return out
+
+
+# takes in two normalised 2d arrays of any (matching) shape
+# returns the clipped difference (or ratio) of the two scaled to [0,255], in out when given
+# a ratio is only taken where the reference is positive, byte scaled SECCHI frames hold zeros and
+# those pixels show no change rather than a saturated one
+def difference_frames(current, reference, sat, mode='running', out=None):
+    if mode not in DIFFERENCE_MODES:
+        raise ValueError('unknown difference mode {!r}'.format(mode))
+
+    if out is None:
+        out = np.empty(np.shape(current), np.result_type(current, reference))
+
+    if mode == 'ratio':
+        positive = np.greater(reference, 0)
+        out.fill(0)
+
+        with np.errstate(invalid='ignore'):
+            np.divide(current, reference, out=out, where=positive)
+
+        np.subtract(out, 1, out=out, where=positive)
+        np.nan_to_num(out, copy=False)
     else:
-        diff = byte_scale((np.ravel(current) - current_off) / current_exposure) - byte_scale(
-            (np.ravel(previous) - previous_off) / previous_exposure)
-    clip = byte_scale(np.clip(diff, -sat, sat))
-    return np.reshape(clip, [int(np.sqrt(np.size(clip))), int(np.sqrt(np.size(clip)))])
+        np.subtract(current, reference, out=out)
+
+    np.clip(out, -sat, sat, out=out)
+    return byte_scale(out, out=out)
 
 
-# NOTE: in order for SOHO LASCO sub map in sunpy to work properly
-# NOTE: I had to edit the Dataset formating within the sunpy library
-# NOTE: Location of change: sunpy/map/sources/soho.py   line 118
-# NOTE: Added: if 'T' not in self.meta['date-obs']:
+# NOTE: LASCO frames used to need a hand edit of sunpy/map/sources/soho.py (line 118,
+# NOTE: if 'T' not in self.meta['date-obs']:) to stop DATE-OBS from being formatted twice
+# NOTE: load_frame now normalises LASCO headers itself (swpc_frames.normalise_lasco_header),
+# NOTE: so a stock sunpy works
 # takes in two urls and downloads both FITS images
 # then rotates, interpolates, corrects, and differance the two
-# then returns a new sunpy map, and the rotated and interpolated fits files
-def new_map(current_file, previous_file, sat):
+# then returns a new sunpy map, and the normalised frames as sunpy maps
+# previous_file is the frame before current_file, or the fixed reference frame in base mode
+# checkpoint, if given, is called with the stage name after the fetch and after the preprocessing
+# so a caller can abandon a render that is no longer needed
+def new_map(current_file, previous_file, sat, checkpoint=None, mode='running'):
+    (current, current_meta), (previous, previous_meta) = normalised_frames([current_file, previous_file], checkpoint)
+
+    return sunpy.map.Map(difference_frames(current, previous, sat, mode), current_meta), \
+        sunpy.map.Map(current, current_meta), sunpy.map.Map(previous, previous_meta)
+
+
+# normalised (data, meta) of every link, frames that are not cached yet are downloaded, preprocessed
+# (in parallel when the preprocessing pool is enabled) and normalised in place
+# level selects a higher pyramid level (frame size) instead of the overview frames
+def normalised_frames(links, checkpoint=None, level=None):
+    if level == FRAME_SHAPE[0]:
+        level = None
+
+    frames = [swpc_frames.normalised_frame(link, level) for link in links]
+    missing = [idx for idx, frame in enumerate(frames) if frame is None]
+
+    paths = [fetch_frame(links[idx]) for idx in missing]
+
+    if checkpoint is not None:
+        checkpoint('fetch')
+
+    shape = FRAME_SHAPE if level is None else (level, level)
+    loaded = swpc_preprocess.map_frames(load_frame, [(path, swpc_frames.frame_header(links[idx]), shape)
+                                                     for idx, path in zip(missing, paths)])
+
+    if checkpoint is not None:
+        checkpoint('preprocess')
+
+    for idx, frame in zip(missing, loaded):
+        data = np.asarray(frame.data, dtype=PIPELINE_DTYPE)
+        normalise_frame(data, frame.exposure_time.to_value(u.s), frame.meta['offset'], frame.instrument, out=data)
+        frames[idx] = swpc_frames.store_normalised(links[idx], data, frame.meta, level)
+
+    return frames
+
+
+# smallest pyramid level that shows a span (in grid units) of the full grid at least at screen resolution
+def pyramid_level(span, half_width=GRID_HALF_WIDTH):
+    needed = FRAME_SHAPE[0] * 2 * half_width / max(span, 1e-9)
+
+    for level in PYRAMID_LEVELS:
+        if level >= needed:
+            return level
+
+    return PYRAMID_LEVELS[-1]
+
+
+# difference image of the visible region x_range, y_range (grid units) at the pyramid level the zoom needs
+# returns the cropped image and its x and y grid coordinates, or None when the overview is fine enough
+def zoomed_difference(current_link, previous_link, sat, x_range, y_range, checkpoint=None, mode='running',
+                      half_width=GRID_HALF_WIDTH):
+    level = pyramid_level(min(abs(x_range[1] - x_range[0]), abs(y_range[1] - y_range[0])), half_width)
+
+    if level == FRAME_SHAPE[0]:
+        return None
+
+    (current, meta), (previous, previous_meta) = normalised_frames([current_link, previous_link], checkpoint, level)
+
+    # the whole level is differenced so the contrast matches the overview, only the crop is sent
+    diff = difference_frames(current, previous, sat, mode)
+    grid = np.linspace(-half_width, half_width, level)
+
+    columns = _grid_slice(grid, x_range)
+    rows = _grid_slice(grid, y_range)
+
+    return diff[rows, columns], grid[columns], grid[rows]
+
+
+# slice of the grid coordinates covering value_range, one pixel wider on each side
+def _grid_slice(grid, value_range):
+    low, high = min(value_range), max(value_range)
+    start = max(int(np.searchsorted(grid, low)) - 1, 0)
+    stop = min(int(np.searchsorted(grid, high)) + 1, len(grid))
+    return slice(start, max(stop, start + 1))
+
+
+# builds the running difference of a whole window, frame i + 1 against frame i for every i
+# each chunk of frames is differenced, clipped and scaled in one vectorised pass and stored as uint8
+# returns a dict with the links, the saturation, the uint8 stack, the raw float stack (or None) and the frame metas
+# report, if given, is called with the fraction of the stack done
+def difference_stack(links, sat, keep_float=STACK_KEEP_FLOAT, report=None):
+    links = list(links)
+    count = len(links) - 1
 
-    current = header_safe(sunpy.map.Map(current_file))
-    previous = header_safe(sunpy.map.Map(previous_file))
+    frames = None
+    raw = None
+    metas = []
 
-    current_offset = current.meta['offset']
-    previous_offset = previous.meta['offset']
-    current_exposure = current.exposure_time / u.s
-    previous_exposure = previous.exposure_time / u.s
+    for start in range(0, count, STACK_CHUNK):
+        chunk = normalised_frames(links[start:start + STACK_CHUNK + 1])
+        cube = np.stack([data for data, meta in chunk])
 
-    return sunpy.map.Map(difference_image(current.data, previous.data, sat, current_exposure, previous_exposure,
-                                          current.instrument, current_offset, previous_offset),
-                         current.meta), current, previous
+        if frames is None:
+            frames = np.empty((count,) + cube.shape[1:], np.uint8)
+            raw = np.empty((count,) + cube.shape[1:], cube.dtype) if keep_float else None
+            metas.append(chunk[0][1])
+
+        metas.extend(meta for data, meta in chunk[1:])
+
+        # difference in place in the tail of the cube
+        diff = np.subtract(cube[1:], cube[:-1], out=cube[1:])
+        stop = start + len(diff)
+
+        if raw is not None:
+            raw[start:stop] = diff
+
+        scale_stack(diff, sat, frames[start:stop])
+
+        if report is not None:
+            report(stop / count)
+
+    return {'links': links, 'index': dict((link, idx) for idx, link in enumerate(links)), 'sat': sat,
+            'frames': frames, 'raw': raw, 'meta': metas}
+
+
+# clips a (frames, y, x) difference to [-sat, sat] and scales every frame to [0,255] in place, then rounds into out
+def scale_stack(diff, sat, out):
+    np.clip(diff, -sat, sat, out=diff)
+
+    low = diff.min(axis=(1, 2), keepdims=True)
+    high = diff.max(axis=(1, 2), keepdims=True)
+
+    np.subtract(diff, low, out=diff)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.multiply(diff, 255 / (high - low), out=diff)
+
+    np.nan_to_num(diff, copy=False)
+    np.rint(diff, out=diff)
+    out[...] = diff
+
+    return out
+
+
+# difference of current_link against previous_link taken from a stack, as a sunpy map
+# returns None when the stack does not hold that pair or cannot serve the saturation
+def stack_map(stack, current_link, previous_link, sat):
+    if stack is None:
+        return None
+
+    index = stack['index'].get(current_link)
+
+    if not index or stack['links'][index - 1] != previous_link:
+        return None
+
+    if sat == stack['sat']:
+        data = stack['frames'][index - 1].astype(PIPELINE_DTYPE)
+    elif stack['raw'] is not None:
+        data = np.clip(stack['raw'][index - 1], -sat, sat)
+        byte_scale(data, out=data)
+    else:
+        return None
+
+    return sunpy.map.Map(data, stack['meta'][index])
+
+
+# downloads a FITS file into the local astropy cache and returns its path
+def fetch_frame(url):
+    return astropy_data.download_file(url, cache=True)
+
+
+# reads a cached FITS file and rotates and resamples it to shape
+# module level so it can run in the preprocessing pool
+def load_frame(path, corrections=None, shape=FRAME_SHAPE):
+    return header_safe(read_frame(path, corrections), shape)
+
+
+# reads a cached FITS file into a sunpy map
+# LASCO headers are normalised first, corrections are the frame index values of the frame
+def read_frame(path, corrections=None):
+    data, header = sunpy.io.read_file(path)[0]
+
+    if header.get('INSTRUME') == 'LASCO':
+        return sunpy.map.GenericMap(data, swpc_frames.normalise_lasco_header(header, corrections))
+
+    return sunpy.map.Map(data, header)
 
 
 # returns length between the center of the picture and
@@ -243,52 +563,189 @@ def pic_wcs_solar(observer, all=0):
 # edits LASCO FITS files so they don't produce a lot of warning messages
 # also speeds up calculation by having the satellite not
 # continue to access the .get_earth function
-def header_safe(current):
+# the Earth position comes from the offline ephemeris pack, so no download is needed
+def header_safe(current, shape=FRAME_SHAPE):
+    swpc_ephemeris.apply_download_policy()
+
     if current.instrument == 'LASCO':
         if 'hgln_obs' not in current.meta:
-            temp_earth = sunpy.coordinates.get_earth(time=current.date)
+            earth_lat, earth_dsun = swpc_ephemeris.earth_position(current.date)
             current.meta['hgln_obs'] = '0'
-            current.meta['hglt_obs'] = temp_earth.lat
-            current.meta['dsun_obs'] = temp_earth.radius
-    return current.rotate(order=3, recenter=True).resample((256, 256) * u.pix, 'linear')
+            current.meta['hglt_obs'] = earth_lat
+            current.meta['dsun_obs'] = earth_dsun
+    return warp_frame(current, shape)
 
 
-# calculates json data for lemniscate plotting
+# rotates a map north up about its reference pixel, recenters it and resamples it to shape in one pass
+# same result as .rotate(order=3, recenter=True).resample(shape * u.pix, 'linear') but the roll,
+# recentering and downscale are composed into a single affine transform evaluated straight onto
+# the target grid, so there is one interpolation and no padded full resolution copy
+def warp_frame(frame, shape=FRAME_SHAPE, order=3):
+    rmatrix = np.asarray(frame.rotation_matrix)
 
-def calc_plot_json(observer, sat_id, radial, angular, long, lat):
+    # (y, x) pixel vectors, as scipy sees the data array
+    data_shape = np.array(frame.data.shape)
+    out_shape = np.array(shape)
 
-    if sat_id == 0:
+    # extent of the rotated frame, as the padding of rotate would make it
+    extent = np.max(np.abs(np.vstack((data_shape @ rmatrix, data_shape @ rmatrix.T))), axis=0)
+    diff = np.asarray(np.ceil((extent - data_shape) / 2), dtype=int).ravel()
 
-        v = plot_update(radial, angular, -long, lat)
+    pad = np.maximum(diff, 0)
+    unpad = np.maximum(-diff, 0)
 
-        v = rotation(observer.observer_coordinate.lon / u.deg + 90, -observer.observer_coordinate.lat / u.deg, v, n)
+    padded_center = (data_shape + 2 * pad - 1) / 2.0
+    rotated_shape = data_shape + 2 * diff
+    rotation_center = np.array([frame.meta['crpix2'], frame.meta['crpix1']]) - 1
 
-    else:
-        v = plot_update(radial, angular, -long, lat)
+    # target pixel -> rotated frame pixel (pixel center aligned resample) -> source pixel (roll about crpix)
+    scale = rotated_shape / out_shape
+    matrix = rmatrix @ np.diag(scale)
+    offset = rmatrix @ (0.5 * scale - 0.5 + unpad - padded_center) + rotation_center + WARP_MARGIN
+
+    source = np.zeros(data_shape + 2 * WARP_MARGIN, dtype=PIPELINE_DTYPE)
+    source[WARP_MARGIN:-WARP_MARGIN, WARP_MARGIN:-WARP_MARGIN] = frame.data
+    np.nan_to_num(source, copy=False)
+
+    data = ndimage.affine_transform(source, matrix, offset=offset, output_shape=tuple(shape), order=order,
+                                    mode='constant', cval=0.0, output=PIPELINE_DTYPE)
+
+    return frame._new_instance(data, warp_meta(frame.meta, rotated_shape, shape), frame.plot_settings)
+
+
+# header of a warped frame: north up, reference pixel in the center, pixel scale grown by the downscale
+def warp_meta(meta, rotated_shape, shape):
+    new_meta = meta.copy()
+
+    for key in ['crota1', 'crota2', 'cd1_1', 'cd1_2', 'cd2_1', 'cd2_2']:
+        new_meta.pop(key, None)
+
+    new_meta['pc1_1'] = 1.0
+    new_meta['pc1_2'] = 0.0
+    new_meta['pc2_1'] = 0.0
+    new_meta['pc2_2'] = 1.0
+
+    new_meta['cdelt1'] = meta['cdelt1'] * rotated_shape[1] / shape[1]
+    new_meta['cdelt2'] = meta['cdelt2'] * rotated_shape[0] / shape[0]
+    new_meta['crpix1'] = (shape[1] + 1) / 2.
+    new_meta['crpix2'] = (shape[0] + 1) / 2.
+    new_meta['naxis1'] = shape[1]
+    new_meta['naxis2'] = shape[0]
 
-        v = rotation(observer.observer_coordinate.lon / u.deg + 90, observer.observer_coordinate.lat / u.deg, v, n)
+    return new_meta
 
-    points = np.array(list(zip(np.ravel(v[0]), np.ravel(v[2]))))
-    hull = ConvexHull(points, qhull_options='QbB')
+
+# extracts the parts of an observer map needed to place a lemniscate silhouette on it
+# sat_id 0 (SOHO) views the lemniscate with the latitude flipped
+def observer_geometry(observer, sat_id):
+    swpc_ephemeris.apply_download_policy()
+
+    lat = float(observer.observer_coordinate.lat / u.deg)
 
     # sun center point on the picture
     # obtains CRVAL1 = r_x and CRVAL = r_y
     sun_x_center, sun_y_center = observer.reference_pixel
 
+    # determines aspect ratio for distance from satellite
+    pic_width_ratio = pic_wcs_length(observer, 256, 128, r_x=128, r_y=128)
+
     # used to determine how far the lemniscate must be moved
     # due to the picture not having the sun in the exact center
     # 128 = have of the dimensions of the plot
+    return {'lon': float(observer.observer_coordinate.lon / u.deg),
+            'lat': -lat if sat_id == 0 else lat,
+            'x_translate': float(sun_x_center / u.pix) - 128,
+            'y_translate': float(sun_y_center / u.pix) - 128,
+            'scale': float((AU_REFERENCE_CUBE * u.AU).to(u.km) / pic_width_ratio)}
 
-    x_translate = (sun_x_center / u.pix) - 128
-    y_translate = (sun_y_center / u.pix) - 128
 
-    # determines aspect ratio for distance from satellite
-    pic_width_ratio = pic_wcs_length(observer, 256, 128, r_x=128, r_y=128)
+# projects one lemniscate into every observer in a single pass
+# the mesh is built once and all observer rotations are applied in one batched matmul
+# None geometries (panels without images) produce a None hull
+# the parameters are used as given, hulls already in the hull cache are not recomputed
+def calc_plot_batch(geometries, radial, angular, long, lat):
+    parameters = tuple(float(value) for value in (radial, angular, long, lat))
+    keys = [hull_key(g, parameters) if g is not None else None for g in geometries]
+    hulls = [cached_hull(key) if key is not None else None for key in keys]
+
+    active = [idx for idx, g in enumerate(geometries) if g is not None and hulls[idx] is None]
+
+    if len(active) == 0:
+        return hulls
+
+    mesh = lemniscate_mesh(radial, angular)
+    lem_rotation = rotation_matrix(-long, lat)
+
+    rotations = np.array([lem_rotation @ rotation_matrix(geometries[idx]['lon'] + 90, geometries[idx]['lat'])
+                          for idx in active])
+    projected = mesh[np.newaxis] @ rotations
+
+    for idx, v in zip(active, projected):
+        hulls[idx] = store_hull(keys[idx], silhouette(v[:, [0, 2]], geometries[idx]))
+
+    return hulls
+
+
+# hull cache key of an observer geometry and the lemniscate parameters the hull is computed from
+def hull_key(geometry, parameters):
+    return tuple(round(geometry[name], HULL_GEOMETRY_DECIMALS)
+                 for name in ['lon', 'lat', 'x_translate', 'y_translate', 'scale']) + parameters
+
+
+# radial, angular, longitude and latitude slider values rounded to the slider steps, so values a drag leaves
+# a little off a step share their hulls in the hull cache
+def quantise_sliders(radial, angular, long, lat):
+    return tuple(round(value / quantum) * quantum for value, quantum in zip((radial, angular, long, lat), HULL_QUANTA))
+
+
+# hull of a cache key, or None on a miss
+def cached_hull(key):
+    with _hull_cache_lock:
+        hull = _hull_cache.get(key)
+
+        if hull is None:
+            hull_cache_stats['misses'] += 1
+        else:
+            hull_cache_stats['hits'] += 1
+            _hull_cache.move_to_end(key)
 
-    lem_distance_c_ratio = (AU_REFERENCE_CUBE * u.AU).to(u.km) / pic_width_ratio
+        return hull
 
-    hull = np.array(((points[hull.vertices, 0] * lem_distance_c_ratio + x_translate),
-                     (points[hull.vertices, 1] * lem_distance_c_ratio + y_translate)))
+
+# caches a hull, the array is made read only as every panel and session shares it
+def store_hull(key, hull):
+    hull.flags.writeable = False
+
+    with _hull_cache_lock:
+        _hull_cache[key] = hull
+        _hull_cache.move_to_end(key)
+
+        while len(_hull_cache) > HULL_CACHE_LIMIT:
+            _hull_cache.popitem(last=False)
+            hull_cache_stats['evictions'] += 1
+
+    return hull
+
+
+# hit, miss and eviction counts of the hull cache and its size
+def hull_cache_info():
+    with _hull_cache_lock:
+        return dict(hull_cache_stats, size=len(_hull_cache), limit=HULL_CACHE_LIMIT)
+
+
+# convex hull of the projected points, moved into the pixel frame of the observer
+def silhouette(points, geometry):
+    hull = spatial.ConvexHull(points, qhull_options='QbB')
+
+    return np.array(((points[hull.vertices, 0] * geometry['scale'] + geometry['x_translate']),
+                     (points[hull.vertices, 1] * geometry['scale'] + geometry['y_translate'])))
+
+
+# calculates json data for lemniscate plotting
+
+def calc_plot_json(observer, sat_id, radial, angular, long, lat):
+
+    hull = calc_plot_batch([observer_geometry(observer, sat_id)], radial, angular, long, lat)[0]
 
     return json.dumps(hull.tolist())
 
@@ -296,21 +753,30 @@ def calc_plot_json(observer, sat_id, radial, angular, long, lat):
 # calculates json data for image plotting
 
 def calc_image_json(image_data, gamma, stretch_top, stretch_bot):
+    return json.dumps(display_image(image_data, gamma, stretch_top, stretch_bot).tolist())
+
+
+# stretches and gamma corrects image data for display, into out when given (image_data is left untouched)
+def display_image(image_data, gamma, stretch_top, stretch_bot, out=None):
 
     # stretch bottom and top
-    image_data = np.clip(image_data, stretch_top, stretch_bot)
+    image_data = np.clip(image_data, stretch_top, stretch_bot, out=out)
 
     # correct image based on slider value
-    image_data = gamma_correction(image_data, gamma)
-
-    return json.dumps(image_data.tolist())
+    return gamma_correction(image_data, gamma)
 
 
-# returns plot data
+# returns plot data, the (2, n) silhouette of the lemniscate in the pixels of an observer map
 def return_plot(observer, sat_id, radial, angular, long, lat):
-    return np.array(pd.read_json(calc_plot_json(observer, sat_id, radial, angular, long, lat,)))
+    return calc_plot_batch([observer_geometry(observer, sat_id)], radial, angular, long, lat)[0]
 
 
 # returns image data
-def return_image(image_data, gamma, stretch_top, stretch_bot):
-    return np.array(json.loads(calc_image_json(image_data, gamma, stretch_top, stretch_bot)))
+# with a panel the image is built in that panel's display buffer, valid until the panel's next render
+def return_image(image_data, gamma, stretch_top, stretch_bot, panel=None):
+    out = None
+
+    if panel is not None:
+        out = work_buffers(panel, np.shape(image_data), np.result_type(image_data, PIPELINE_DTYPE))['display']
+
+    return display_image(image_data, gamma, stretch_top, stretch_bot, out=out)
@@ -0,0 +1,37 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import json
+import os
+import subprocess
+import sys
+
+# modules the library layer (swpc_api) must not import
+WEB_MODULES = ['dash', 'plotly', 'flask']
+
+# modules the app defers to their first use (swpc_lazy.LazyModule)
+DEFERRED_MODULES = ['sunpy', 'astropy', 'scipy', 'pandas', 'plotly.graph_objs', 'julian']
+
+# imports a module in a fresh interpreter and lists the modules it pulled in
+IMPORT_SCRIPT = '''
+import json, sys
+import {}
+print(json.dumps(sorted(sys.modules)))
+'''
+
+
+def imported_modules(module):
+    output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT.format(module)],
+                                     cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_api_imports_without_the_web_stack():
+    assert not set(name.split('.')[0] for name in imported_modules('swpc_api')) & set(WEB_MODULES)
+
+
+def test_app_defers_heavy_imports():
+    assert not set(imported_modules('__SWPC_CAT__')) & set(DEFERRED_MODULES)
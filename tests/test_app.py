@@ -0,0 +1,219 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import json
+
+import __SWPC_CAT__
+import numpy as np
+import pytest
+import swpc_api
+import swpc_movie
+import swpc_session
+
+ROWS = [['2019-05-01 00:{:02d}:00'.format(12 * idx), 'https://example.org/{}.fts'.format(idx)] for idx in range(4)]
+
+
+class Rendered(Exception):
+    pass
+
+
+# the links and mode every panel render asks the frame cache for, the render stops there
+def requested_differences(monkeypatch, mode, slider=3):
+    requests = []
+
+    def from_links(current, previous, sat_id, saturation, mode, checkpoint=None):
+        requests.append((current, previous, mode))
+        raise Rendered()
+
+    monkeypatch.setattr(swpc_api.DifferenceImage, 'from_links', from_links)
+    panel_values = [0, 255, 1, 1, mode, json.dumps(ROWS), slider, None] * len(__SWPC_CAT__.PANELS)
+
+    with __SWPC_CAT__.server.test_request_context():
+        with pytest.raises(Rendered):
+            __SWPC_CAT__.lemniscate_update.__wrapped__(10, 60, 0, 0, *(panel_values + [None,
+                                                                                       swpc_session.new_session_id()]))
+
+    return requests
+
+
+@pytest.mark.parametrize('mode, previous', [('running', ROWS[2][1]), ('ratio', ROWS[2][1]), ('base', ROWS[0][1])])
+def test_difference_mode_of_a_panel(monkeypatch, mode, previous):
+    assert requested_differences(monkeypatch, mode) == [(ROWS[3][1], previous, mode)]
+
+
+def test_difference_mode_controls():
+    layout = __SWPC_CAT__.main_layout()
+
+    for tab in 'LCR':
+        assert layout[tab + '-difference-mode'].value == 'running'
+        assert (tab + '-difference-mode', 'value') in __SWPC_CAT__.PERSISTED_CONTROLS
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(__SWPC_CAT__.swpc_jobs, 'submit', lambda session_id, key, fn, *args: jobs.append(args))
+    return jobs
+
+
+# a render asks for the stack of its window at the panel saturation, the first panel render stops the update
+def test_render_asks_for_the_stack_at_the_panel_saturation(monkeypatch, submitted):
+    requested_differences(monkeypatch, 'running')
+
+    assert [args[1:] for args in submitted] == [('stereo-b-hidden', [row[1] for row in ROWS], 1)]
+
+
+def test_stack_is_rebuilt_when_the_saturation_changes(submitted):
+    session_id = swpc_session.new_session_id()
+    links = [row[1] for row in ROWS]
+
+    __SWPC_CAT__.request_stack(session_id, 'soho-c3-hidden', links, 1)
+    swpc_session.publish(session_id, 'stacks', 'soho-c3-hidden', {'links': links, 'sat': 1})
+    __SWPC_CAT__.request_stack(session_id, 'soho-c3-hidden', links, 1)
+    __SWPC_CAT__.request_stack(session_id, 'soho-c3-hidden', links, 2.5)
+
+    assert [args[-1] for args in submitted] == [1, 2.5]
+
+
+# a stack finished after its panel moved on to another saturation is not published
+def test_stale_stack_is_dropped(monkeypatch):
+    session_id = swpc_session.new_session_id()
+    links = [row[1] for row in ROWS]
+    monkeypatch.setattr(__SWPC_CAT__.swpc_utils, 'difference_stack',
+                        lambda links, sat, report=None: {'links': links, 'sat': sat, 'frames': np.zeros(1, np.uint8),
+                                                         'raw': None})
+
+    swpc_session.publish(session_id, 'stack-wanted', 'soho-c3-hidden', (links, 2.5))
+    __SWPC_CAT__.stack_job(None, session_id, 'soho-c3-hidden', links, 1)
+    assert swpc_session.published(session_id, 'stacks', 'soho-c3-hidden') is None
+
+    __SWPC_CAT__.stack_job(None, session_id, 'soho-c3-hidden', links, 2.5)
+    assert swpc_session.published(session_id, 'stacks', 'soho-c3-hidden')['sat'] == 2.5
+
+
+# a player holding the stack gets a 304 back, a stack rebuilt at another saturation comes with a new ETag
+def test_difference_stack_is_only_sent_when_changed():
+    session_id = swpc_session.new_session_id()
+    links = [row[1] for row in ROWS]
+    url = '/difference-stack/{}/soho-c3-hidden'.format(session_id)
+    client = __SWPC_CAT__.server.test_client()
+
+    swpc_session.publish(session_id, 'stacks', 'soho-c3-hidden',
+                         {'links': links, 'sat': 1, 'frames': np.zeros((3, 4, 4), np.uint8)})
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers['X-Stack-Shape'] == '3,4,4'
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    swpc_session.publish(session_id, 'stacks', 'soho-c3-hidden',
+                         {'links': links, 'sat': 2.5, 'frames': np.zeros((3, 4, 4), np.uint8)})
+    rebuilt = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert rebuilt.status_code == 200 and rebuilt.headers['ETag'] != first.headers['ETag']
+
+
+def test_panel_callbacks_leave_no_module_globals():
+    assert not hasattr(__SWPC_CAT__, 'panel')
+
+
+# every exported stack is differenced at the saturation of its panel
+def test_stack_export_uses_the_panel_saturation(monkeypatch):
+    session_id = swpc_session.new_session_id()
+    saturations = []
+
+    def source_frames(source, lemniscate, saturation):
+        saturations.append((source.instrument, saturation))
+        return ((source.rows[index][0], np.zeros((4, 4)), np.zeros((2, 3))) for index in range(1, len(source)))
+
+    monkeypatch.setattr(__SWPC_CAT__.swpc_export, 'source_frames', source_frames)
+    swpc_session.publish(session_id, 'rows', 'soho-c3-hidden', ROWS)
+    response = __SWPC_CAT__.server.test_client().get(
+        '/export/stacks/{}?format=npz&radial=8&angular=90&long=0&lat=0'
+        '&l_saturation=1&c_saturation=2.5&r_saturation=1'.format(session_id))
+
+    assert response.status_code == 200 and response.data
+    assert saturations == [('SOHO C3', 2.5)]
+
+
+def press_movie(session_id, saturation, tab='c'):
+    callback = [value['callback'] for key, value in __SWPC_CAT__.app.callback_map.items()
+                if 'movie-job-{}.children'.format(tab) in key][0]
+
+    with __SWPC_CAT__.server.test_request_context():
+        __SWPC_CAT__.flask.g.triggered_inputs = [{'prop_id': 'movie-btn-{}.n_clicks'.format(tab), 'value': 1}]
+        return callback.__wrapped__(1, None, 10, 60, 0, 0, 1, 0, 255, saturation, 8, 'apng', '', session_id)
+
+
+# a movie is made from the stack at the panel saturation, a stack at another saturation is rebuilt first
+def test_movie_uses_the_panel_saturation(monkeypatch, submitted):
+    session_id = swpc_session.new_session_id()
+    links = [row[1] for row in ROWS]
+    monkeypatch.setattr(__SWPC_CAT__.swpc_movie, 'cached_movie', lambda key, fmt: None)
+    swpc_session.publish(session_id, 'rows', 'soho-c3-hidden', [tuple(row) for row in ROWS])
+    swpc_session.publish(session_id, 'stacks', 'soho-c3-hidden', {'links': links, 'sat': 1})
+
+    job_id, message, _ = press_movie(session_id, 2.5)
+    assert job_id == '' and 'saturation 2.5' in message
+    assert [args[-1] for args in submitted] == [2.5]
+
+    swpc_session.publish(session_id, 'stacks', 'soho-c3-hidden', {'links': links, 'sat': 2.5})
+    press_movie(session_id, 2.5)
+    key = swpc_movie.movie_key(links, 2.5, 0, (10, 60, 0, 0), (1, 0, 255), 8, 'apng')
+    assert submitted[-1][0] == key
+
+
+# a page opened from a saved or shared session works on a copy of it under a session id of its own
+def test_restored_session_gets_a_fresh_id(monkeypatch, submitted, tmpdir):
+    monkeypatch.setattr(__SWPC_CAT__.swpc_persist, 'SESSION_DB', str(tmpdir.join('sessions.sqlite')))
+    monkeypatch.setattr(__SWPC_CAT__.swpc_persist, '_local', type(__SWPC_CAT__.swpc_persist._local)())
+    monkeypatch.setattr(__SWPC_CAT__.swpc_persist, '_pending', dict())
+    shared_id = swpc_session.new_session_id()
+    document = {'controls': {'radial-slider.value': 9.5}, 'windows': {'stereo-a-hidden': ROWS}, 'matches': None}
+    __SWPC_CAT__.swpc_persist.save(shared_id, document)
+
+    with __SWPC_CAT__.server.test_request_context(headers={'Cookie': __SWPC_CAT__.SESSION_COOKIE + '=' + shared_id}):
+        opened = [__SWPC_CAT__.serve_layout()['session-id'].children for _ in range(2)]
+
+    assert shared_id not in opened and opened[0] != opened[1]
+    assert all(__SWPC_CAT__.swpc_persist.load(session_id)['windows'] == document['windows'] for session_id in opened)
+    assert swpc_session.published(opened[0], 'rows', 'stereo-a-hidden') == [tuple(row) for row in ROWS]
+
+
+# the panel saturation sliders start out and reset at the default saturation of their instrument, the one
+# batch runs, exports and library differences use when no saturation is given
+def test_panel_saturation_defaults(monkeypatch):
+    layout = __SWPC_CAT__.main_layout()
+    resets = {'L': __SWPC_CAT__.l_saturation_reset, 'C': __SWPC_CAT__.c_saturation_reset,
+              'R': __SWPC_CAT__.r_saturation_reset}
+    frame = (np.ones((8, 8), np.float32), {})
+    monkeypatch.setattr(swpc_api.swpc_utils, 'normalised_frames', lambda links, checkpoint=None: [frame, frame])
+
+    for panel in __SWPC_CAT__.PANELS:
+        default = swpc_api.SATURATIONS[panel['instrument']]
+        source = swpc_api.FrameSource(panel['instrument'], ROWS)
+
+        assert layout[panel['tab'] + '-saturation-slider'].value == default
+        assert resets[panel['tab']].__wrapped__(1) == default
+        assert source.difference(1).saturation == default
+
+
+# the restore progress ends at 1 when the last chunk of matched frames is not a full one
+def test_restore_progress_is_clamped(monkeypatch, submitted):
+    progress = []
+    matches = [{'link': row[1]} for row in ROWS[1:]]
+    monkeypatch.setattr(__SWPC_CAT__.swpc_utils, 'normalised_frames', lambda links: None)
+    monkeypatch.setattr(__SWPC_CAT__, 'RESTORE_CHUNK', 3)
+
+    __SWPC_CAT__.restore_job(lambda value, message: progress.append(value), swpc_session.new_session_id(),
+                             {'soho-c3-hidden': ROWS}, matches)
+
+    assert progress == [0.75, 1.0]
+
+
+def test_panel_triggered_by_its_own_inputs():
+    panel = __SWPC_CAT__.PANELS[1]
+
+    assert __SWPC_CAT__.panel_triggered(panel, {'C-gamma-slider'})
+    assert __SWPC_CAT__.panel_triggered(panel, {'soho-c3-hidden'})
+    assert __SWPC_CAT__.panel_triggered(panel, {'c-image-slider'})
+    assert not __SWPC_CAT__.panel_triggered(panel, {'L-gamma-slider', 'stereo-a-hidden', 'hull-refine-interval'})
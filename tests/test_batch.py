@@ -0,0 +1,41 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import swpc_api
+import swpc_batch
+
+
+# catalogue of a frame every 12 minutes, no frame is ever differenced
+class Catalogue(object):
+
+    rows = [('2012-07-12 18:{:02d}:00'.format(minute), 'frame-{}'.format(minute)) for minute in range(0, 60, 12)]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def nearest(self, timestamp):
+        minute = int(timestamp[14:16])
+        return min(range(len(self.rows)), key=lambda index: abs(12 * index - minute))
+
+    def difference(self, index, saturation):
+        raise AssertionError('differenced a frame')
+
+
+# two matches nearest to the same frame fail the event, instead of the second silently replacing the first
+def test_matches_on_the_same_frame_fail_the_event(monkeypatch, tmpdir):
+    monkeypatch.setattr(swpc_api.FrameSource, 'query', lambda *args: Catalogue())
+    event = {'id': 'same-frame', 'date': '2012-07-12', 'start_time': '18:00', 'hours': 1,
+             'angular': 90, 'long': 10, 'lat': -5,
+             'matches': [{'instrument': 'SOHO C3', 'timestamp': '2012-07-12 18:23:00', 'radial': 9.5},
+                         {'instrument': 'SOHO C3', 'timestamp': '2012-07-12 18:25:00', 'radial': 10.5}]}
+
+    event_id, error, _ = swpc_batch._run(event, str(tmpdir))
+
+    assert event_id == 'same-frame'
+    assert error == 'ValueError: matches 0 and 1 are both nearest to the SOHO C3 frame of 2012-07-12 18:24:00'
+    assert not tmpdir.join('same-frame', swpc_batch.RESULT_FILE).exists()
@@ -0,0 +1,23 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import swpc_ensemble
+import swpc_utils
+
+# largest score (pixels) allowed for the unperturbed ensemble member against its own silhouettes
+SELF_SCORE = 0.5
+
+
+def test_unperturbed_member_scores_against_its_own_silhouettes():
+    radial, angular, long, lat = 12.0, 70.0, 20.0, -10.0
+    geometries = [{'lon': lon, 'lat': obs_lat, 'x_translate': 0.0, 'y_translate': 0.0, 'scale': 1.0}
+                  for lon, obs_lat in [(-110.0, 3.0), (0.0, -5.0), (95.0, 7.0)]]
+    hulls = swpc_utils.calc_plot_batch(geometries, radial, angular, long, lat)
+
+    ensemble = swpc_ensemble.sample_members(lat, long, angular, 800.0, 2458800.0, members=200)
+    ensemble = swpc_ensemble.score_ensemble(ensemble, geometries, hulls, radial)
+
+    assert ensemble['score'][0] <= SELF_SCORE
+    assert ensemble['accepted'][0]
@@ -0,0 +1,115 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import numpy as np
+import pytest
+import swpc_ephemeris
+
+# largest difference allowed between the interpolated pack and the sunpy ephemeris, latitude in degrees
+LATITUDE_TOLERANCE = 1e-5
+
+# same for the Sun-Earth distance in meters, the pack stores float32 (about 8 km resolution at 1 AU)
+DISTANCE_TOLERANCE = 2e4
+
+# span and resolution (seconds) of the test pack, kept small so sunpy builds it in a second
+PACK_START = '2019-05-01'
+PACK_END = '2019-05-03'
+PACK_STEP = 3600
+
+
+@pytest.fixture
+def pack(tmpdir, monkeypatch):
+    pack_dir = str(tmpdir.join('ephemeris'))
+    swpc_ephemeris.build_pack(pack_dir, PACK_START, PACK_END, PACK_STEP)
+
+    monkeypatch.setattr(swpc_ephemeris, 'EPHEMERIS_PACK', pack_dir)
+    monkeypatch.setattr(swpc_ephemeris, '_pack', None)
+    monkeypatch.setattr(swpc_ephemeris, '_pack_loaded', False)
+
+    return swpc_ephemeris.load_pack()
+
+
+# records the times handed to the sunpy fallback
+@pytest.fixture
+def fallbacks(monkeypatch):
+    calls = []
+    sunpy_earth = swpc_ephemeris._sunpy_earth
+
+    def recording(stamps):
+        calls.append(stamps.copy())
+        return sunpy_earth(stamps)
+
+    monkeypatch.setattr(swpc_ephemeris, '_sunpy_earth', recording)
+
+    return calls
+
+
+def minutes(first, count, step):
+    return np.datetime64(first, 'ms') + np.arange(0, count * step, step) * np.timedelta64(1, 'm')
+
+
+# times between the pack samples match sunpy, without calling it
+def test_interpolated_pack_matches_sunpy(pack, fallbacks):
+    stamps = minutes(PACK_START, 400, 7)
+    lat, dsun = swpc_ephemeris.earth_position(stamps)
+
+    assert not fallbacks
+
+    reference_lat, reference_dsun = swpc_ephemeris._sunpy_earth(stamps)
+
+    assert np.max(np.abs(lat - reference_lat)) <= LATITUDE_TOLERANCE
+    assert np.max(np.abs(dsun - reference_dsun)) <= DISTANCE_TOLERANCE
+
+
+# a scalar time gives floats, the last pack sample is still covered
+def test_scalar_time_at_pack_end(pack, fallbacks):
+    last = pack['start'] + np.timedelta64(PACK_STEP * (len(pack['lat']) - 1), 's')
+    lat, dsun = swpc_ephemeris.earth_position(last)
+
+    assert not fallbacks
+    assert isinstance(lat, float) and isinstance(dsun, float)
+    assert lat == pytest.approx(float(pack['lat'][-1]))
+    assert dsun == pytest.approx(float(pack['dsun'][-1]))
+
+
+# only the times before and after the pack go to sunpy, the results keep their order
+def test_times_outside_pack_fall_back_to_sunpy(pack, fallbacks):
+    before = minutes('2019-04-30T23:00', 2, 30)
+    inside = minutes('2019-05-02T00:00', 2, 30)
+    after = minutes('2019-05-03T06:00', 2, 30)
+    stamps = np.concatenate([before, inside, after])
+
+    lat, dsun = swpc_ephemeris.earth_position(stamps)
+
+    assert len(fallbacks) == 1
+    assert np.array_equal(fallbacks[0], np.concatenate([before, after]))
+
+    reference_lat, reference_dsun = swpc_ephemeris._sunpy_earth(stamps)
+
+    assert np.max(np.abs(lat - reference_lat)) <= LATITUDE_TOLERANCE
+    assert np.max(np.abs(dsun - reference_dsun)) <= DISTANCE_TOLERANCE
+    assert np.array_equal(lat[[0, 1, 4, 5]], reference_lat[[0, 1, 4, 5]])
+
+
+# without a usable pack every time goes to sunpy
+@pytest.mark.parametrize('version', [None, swpc_ephemeris.PACK_VERSION + 1])
+def test_missing_or_stale_pack_falls_back_to_sunpy(tmpdir, monkeypatch, fallbacks, version):
+    pack_dir = str(tmpdir.join('ephemeris'))
+
+    if version is not None:
+        swpc_ephemeris.build_pack(pack_dir, PACK_START, PACK_END, PACK_STEP)
+        tmpdir.join('ephemeris', 'manifest.json').write('{"version": %d}' % version)
+        del fallbacks[:]
+
+    monkeypatch.setattr(swpc_ephemeris, 'EPHEMERIS_PACK', pack_dir)
+    monkeypatch.setattr(swpc_ephemeris, '_pack', None)
+    monkeypatch.setattr(swpc_ephemeris, '_pack_loaded', False)
+
+    stamps = minutes('2019-05-01T12:00', 3, 60)
+    lat, dsun = swpc_ephemeris.earth_position(stamps)
+
+    assert swpc_ephemeris.load_pack() is None
+    assert len(fallbacks) == 1 and np.array_equal(fallbacks[0], stamps)
+    assert np.array_equal(lat, swpc_ephemeris._sunpy_earth(stamps)[0])
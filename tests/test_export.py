@@ -0,0 +1,106 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import io
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+import swpc_api
+import swpc_export
+import swpc_matches
+import swpc_utils
+
+# largest memory peak (bytes) of streaming a stack archive of FRAME_SHAPE frames, a frame is 256 KiB in float32
+# and the peak measures about 1.4 MB whatever the number of frames
+EXPORT_PEAK_BYTES = 2 << 20
+
+# growth of that peak allowed from 10 to 100 frames per stack, the timestamps and hulls kept for the end
+EXPORT_PEAK_GROWTH = 1.1
+
+
+def synthetic_frames(stack, hull, count):
+    for index in range(count):
+        yield '2019-05-01 {:02d}:{:02d}:00'.format(index // 60 % 24, index % 60), stack[index % len(stack)], hull
+
+
+def archive_bytes(stacks, fmt='npz'):
+    return b''.join(swpc_export.stack_archive(stacks, fmt))
+
+
+def test_stack_archive_reads_back():
+    random = np.random.RandomState(0)
+    stack = random.normal(0, 1, (3, 64, 48)).astype(np.float32)
+    hull = random.normal(0, 100, (2, 40))
+    data = archive_bytes([('SOHO C3', 10, synthetic_frames(stack, hull, 10)),
+                          ('Stereo-A', 7, synthetic_frames(stack, hull, 7))])
+
+    with np.load(io.BytesIO(data)) as archive:
+        differences = archive['soho_c3_differences']
+        offsets = archive['stereo_a_hull_offsets']
+
+        assert differences.shape == (10, 64, 48)
+        np.testing.assert_array_equal(differences[-1], stack[9 % 3])
+        assert len(offsets) == 8
+        np.testing.assert_allclose(archive['stereo_a_hull_vertices'][offsets[2]:offsets[3]], hull.T.astype(np.float32))
+        assert str(archive['soho_c3_timestamps'][1]) == '2019-05-01T00:01:00'
+
+
+def test_fits_archive_reads_back():
+    from astropy.io import fits
+    import zipfile
+
+    stack = np.arange(2 * 8 * 6, dtype=np.float32).reshape(2, 8, 6)
+    data = archive_bytes([('Stereo-B', 5, synthetic_frames(stack, np.zeros((2, 3)), 5))], 'fits')
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with fits.open(io.BytesIO(archive.read('stereo_b.fits'))) as cube:
+            assert cube[0].data.shape == (5, 8, 6)
+            np.testing.assert_array_equal(cube[0].data[3], stack[1])
+
+        assert len(archive.read('stereo_b_hulls.csv').decode().splitlines()) == 1 + 5 * 3
+
+
+def test_measurement_tables_hold_every_match():
+    store = swpc_matches.MatchStore()
+
+    for index in range(50):
+        store.add('SOHO C3', '2019-05-01 {:02d}:{:02d}:00'.format(index // 60 % 24, index % 60), str(index),
+                  3.0 + index / 60.0)
+
+    fit = swpc_api.KinematicFit.from_store(store)
+    table = json.loads(''.join(swpc_export.measurement_json(store, fit, -5.0, 10.0, 90.0)))
+    rows = [row for row in swpc_export.measurement_csv(store, fit, -5.0, 10.0, 90.0) if not row.startswith('#')]
+
+    assert len(table['matches']) == 50
+    assert len(rows) == 51
+    assert table['half_width'] == 45.0
+
+
+def archive_peak(stack, count, fmt):
+    hull = np.zeros((2, 40))
+    tracemalloc.start()
+
+    for _ in swpc_export.stack_archive([('SOHO C3', count, synthetic_frames(stack, hull, count)),
+                                        ('Stereo-A', count, synthetic_frames(stack, hull, count))], fmt):
+        pass
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+# the archive is streamed a frame at a time, its memory peak stays flat as the stacks grow
+@pytest.mark.parametrize('fmt', swpc_export.STACK_FORMATS)
+def test_stack_archive_memory_is_flat(fmt):
+    stack = np.random.RandomState(0).normal(0, 1, (3,) + swpc_utils.FRAME_SHAPE).astype(np.float32)
+    archive_peak(stack, 2, fmt)
+
+    few, many = archive_peak(stack, 10, fmt), archive_peak(stack, 100, fmt)
+
+    assert many <= EXPORT_PEAK_BYTES
+    assert many <= EXPORT_PEAK_GROWTH * few
@@ -0,0 +1,109 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import swpc_frames
+
+ROWS = [['2019-05-01 00:{:02d}:00'.format(12 * idx), 'https://example.org/{}.fts'.format(idx)] for idx in range(4)]
+
+# raw header of a LASCO C3 frame, date and time apart as the instrument writes them
+LASCO_HEADER = OrderedDict([('SIMPLE', True), ('DATE-OBS', '2019/05/01'), ('TIME-OBS', '00:18:05.123'),
+                            ('CUNIT1', 'ARCSEC'), ('CUNIT2', 'ARCSEC'), ('CDELT1', 56.0), ('', 'blank card')])
+
+
+# an empty frame index and an ephemeris that records its calls, latitude is the minute of the time
+@pytest.fixture
+def ephemeris(monkeypatch):
+    calls = []
+
+    def earth_position(times):
+        calls.append(times)
+        minutes = (np.asarray(times) - np.datetime64('2019-05-01', 'ms')) / np.timedelta64(1, 'm')
+        return minutes / 100.0, 1.5e11 + minutes
+
+    monkeypatch.setattr(swpc_frames.swpc_ephemeris, 'earth_position', earth_position)
+    monkeypatch.setattr(swpc_frames, '_frame_index', OrderedDict())
+
+    return calls
+
+
+# every frame of a window is indexed from one ephemeris call
+def test_index_window_headers(ephemeris):
+    swpc_frames.index_window(ROWS)
+
+    assert len(ephemeris) == 1 and len(ephemeris[0]) == len(ROWS)
+
+    for idx, (_, link) in enumerate(ROWS):
+        header = swpc_frames.frame_header(link)
+
+        assert header == {'hgln_obs': 0.0, 'hglt_obs': 12 * idx / 100.0, 'dsun_obs': 1.5e11 + 12 * idx}
+        assert all(type(value) is float for value in header.values())
+
+    assert swpc_frames.frame_header('https://example.org/missing.fts') is None
+
+
+# a failed catalogue request (np.empty(1)) or an empty window indexes nothing
+@pytest.mark.parametrize('image_dir', [np.empty(1), [], np.empty((0, 2))])
+def test_index_window_skips_empty_windows(ephemeris, image_dir):
+    swpc_frames.index_window(image_dir)
+
+    assert not ephemeris
+    assert not swpc_frames._frame_index
+
+
+# the least recently indexed frames are dropped first
+def test_index_window_limit(ephemeris, monkeypatch):
+    monkeypatch.setattr(swpc_frames, 'FRAME_INDEX_LIMIT', 3)
+
+    swpc_frames.index_window(ROWS[:2])
+    swpc_frames.index_window(ROWS[2:])
+    swpc_frames.index_window(ROWS[1:2])
+
+    assert list(swpc_frames._frame_index) == [ROWS[2][1], ROWS[3][1], ROWS[1][1]]
+
+
+# the header copy handed out does not change the index
+def test_frame_header_is_a_copy(ephemeris):
+    swpc_frames.index_window(ROWS[:1])
+    swpc_frames.frame_header(ROWS[0][1])['hglt_obs'] = 99.0
+
+    assert swpc_frames.frame_header(ROWS[0][1])['hglt_obs'] == 0.0
+
+
+# keys are lower case, the date is joined with its time once, units are lower case
+def test_normalise_lasco_header(ephemeris):
+    corrections = {'hgln_obs': 0.0, 'hglt_obs': -4.0, 'dsun_obs': 1.51e11}
+    meta = swpc_frames.normalise_lasco_header(LASCO_HEADER, corrections)
+
+    assert not ephemeris
+    assert meta['date-obs'] == '2019-05-01T00:18:05.123'
+    assert meta['cunit1'] == meta['cunit2'] == 'arcsec'
+    assert meta['cdelt1'] == 56.0
+    assert '' not in meta and 'DATE-OBS' not in meta
+    assert meta['hglt_obs'] == -4.0 and meta['dsun_obs'] == 1.51e11
+
+    assert swpc_frames.normalise_lasco_header(meta, corrections)['date-obs'] == '2019-05-01T00:18:05.123'
+
+
+# without corrections the observer is looked up at the observation time
+def test_normalise_lasco_header_looks_up_observer(ephemeris):
+    meta = swpc_frames.normalise_lasco_header(LASCO_HEADER)
+
+    assert len(ephemeris) == 1
+    assert ephemeris[0] == np.datetime64('2019-05-01T00:18:05.123', 'ms')
+    assert meta['hgln_obs'] == 0.0
+    assert meta['hglt_obs'] == pytest.approx((18 + 5.123 / 60) / 100.0)
+
+
+# an observer already in the header is kept
+def test_normalise_lasco_header_keeps_observer(ephemeris):
+    header = dict(LASCO_HEADER, HGLN_OBS=1.0, HGLT_OBS=2.0, DSUN_OBS=3.0)
+    meta = swpc_frames.normalise_lasco_header(header, {'hgln_obs': 0.0, 'hglt_obs': -4.0, 'dsun_obs': 1.51e11})
+
+    assert not ephemeris
+    assert (meta['hgln_obs'], meta['hglt_obs'], meta['dsun_obs']) == (1.0, 2.0, 3.0)
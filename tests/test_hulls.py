@@ -0,0 +1,90 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+import swpc_hulls
+import swpc_utils
+
+# largest difference (grid units) allowed between a lattice hull and the exact hull, lattices store float32
+LATTICE_TOLERANCE = 1e-3
+
+# observer of the lattice, a STEREO-A like orientation with a shifted and scaled disk
+GEOMETRY = {'lon': 97.0, 'lat': -3.0, 'x_translate': 12.0, 'y_translate': -7.5, 'scale': 1.3}
+
+
+# a small lattice around the test parameters, built through request_lattice like the app does
+@pytest.fixture
+def lattice(monkeypatch):
+    monkeypatch.setattr(swpc_hulls, 'HULL_LATTICE', True)
+    monkeypatch.setattr(swpc_hulls, 'LATTICE_ANGULAR', np.arange(40, 61, 5))
+    monkeypatch.setattr(swpc_hulls, 'LATTICE_LONG', np.arange(-40, 41, 5))
+    monkeypatch.setattr(swpc_hulls, 'LATTICE_LAT', np.arange(-20, 21, 5))
+    monkeypatch.setattr(swpc_hulls, '_lattices', OrderedDict())
+    monkeypatch.setattr(swpc_hulls, '_building', set())
+
+    swpc_hulls.request_lattice(GEOMETRY)
+    deadline = time.time() + 30
+
+    while swpc_hulls._building and time.time() < deadline:
+        time.sleep(0.01)
+
+    return swpc_hulls._lattices.get(swpc_hulls.observer_key(GEOMETRY))
+
+
+# hull vertices as a sorted set of (x, y) points, the two paths may start the hull at different vertices
+def points(hull):
+    return np.array(sorted(map(tuple, np.asarray(hull, dtype=float).T)))
+
+
+# at a lattice point the lattice hull is the exact hull
+@pytest.mark.parametrize('angular, long, lat', [(50, 10, -5), (40, -40, 20), (60, 35, 0)])
+def test_lattice_hull_at_lattice_point(lattice, angular, long, lat):
+    assert lattice is not None
+
+    hull = swpc_hulls.lattice_hull(GEOMETRY, 11.0, angular, long, lat)
+    exact = swpc_utils.calc_plot_batch([GEOMETRY], 11.0, angular, long, lat)[0]
+
+    assert hull.shape == exact.shape
+    np.testing.assert_allclose(points(hull), points(exact), rtol=0, atol=LATTICE_TOLERANCE)
+
+
+# approximate hulls of an observer with a lattice come from its nearest lattice point
+def test_observer_hulls_from_lattice(lattice):
+    hulls, from_lattice = swpc_hulls.observer_hulls([GEOMETRY, None], 11.0, 51.0, 9.0, -4.0, approximate=True)
+
+    assert from_lattice == [True, False]
+    assert hulls[1] is None
+    np.testing.assert_allclose(points(hulls[0]), points(swpc_hulls.lattice_hull(GEOMETRY, 11.0, 50, 10, -5)))
+
+
+# observers without a lattice, or exact requests, get the exact hull
+def test_observer_hulls_fall_back_to_exact(lattice):
+    other = dict(GEOMETRY, lon=-97.0)
+    exact = swpc_utils.calc_plot_batch([GEOMETRY, other], 11.0, 51.0, 9.0, -4.0)
+
+    hulls, from_lattice = swpc_hulls.observer_hulls([GEOMETRY, other], 11.0, 51.0, 9.0, -4.0, approximate=True)
+
+    assert from_lattice == [True, False]
+    assert swpc_hulls.lattice_hull(other, 11.0, 51.0, 9.0, -4.0) is None
+    np.testing.assert_array_equal(hulls[1], exact[1])
+
+    hulls, from_lattice = swpc_hulls.observer_hulls([GEOMETRY, other], 11.0, 51.0, 9.0, -4.0)
+
+    assert from_lattice == [False, False]
+    np.testing.assert_array_equal(hulls[0], exact[0])
+
+
+# with the lattice mode off no lattice is queued
+def test_no_lattice_when_off(monkeypatch):
+    monkeypatch.setattr(swpc_hulls, 'HULL_LATTICE', False)
+    monkeypatch.setattr(swpc_hulls, '_building', set())
+
+    swpc_hulls.request_lattice(GEOMETRY)
+
+    assert not swpc_hulls._building
@@ -0,0 +1,37 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import threading
+import time
+
+import swpc_jobs
+
+
+def wait_finished(job_ids, timeout=5.0):
+    deadline = time.time() + timeout
+
+    while not swpc_jobs.all_finished(job_ids) and time.time() < deadline:
+        time.sleep(0.01)
+
+    return swpc_jobs.all_finished(job_ids)
+
+
+# movie and stack jobs running on every worker of their own do not hold up a catalogue job
+def test_long_jobs_leave_catalogue_jobs_a_worker():
+    release = threading.Event()
+    blocked = [swpc_jobs.submit('jobs-test', (kind, index), lambda report: release.wait(5))
+               for kind in ('movie', 'stack') for index in range(swpc_jobs.JOB_WORKERS)]
+
+    try:
+        catalogue = swpc_jobs.submit('jobs-test', ('soho-c3-hidden', 3, '2019-05-01', '00:00', 12),
+                                     lambda report: 'rows')
+
+        assert wait_finished([catalogue])
+        assert swpc_jobs.status(catalogue)['result'] == 'rows'
+        assert not swpc_jobs.all_finished(blocked)
+    finally:
+        release.set()
+
+    assert wait_finished(blocked)
@@ -0,0 +1,83 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+from datetime import datetime, timedelta
+
+import astropy.units as u
+import julian
+import numpy as np
+import pytest
+import swpc_kinematics
+import swpc_matches
+
+# relative velocity and arrival time (seconds) the shared fit may differ from the per match polyfit by,
+# a julian date float resolves a few tens of microseconds
+VELOCITY_TOLERANCE = 1e-9
+ARRIVAL_TOLERANCE = 1.0
+
+
+def synthetic_store(count=30):
+    random = np.random.RandomState(0)
+    start = datetime(2019, 5, 1, 12)
+    store = swpc_matches.MatchStore()
+
+    for idx in range(count):
+        timestamp = start + timedelta(minutes=12 * idx + int(random.randint(0, 6)))
+        store.add(['Stereo-B', 'SOHO C3', 'Stereo-A'][idx % 3], timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                  'frame-{}'.format(idx), 3.0 + 0.4 * idx + random.normal(0, 0.1))
+
+    return store
+
+
+# the velocity and arrival time as the result callbacks computed them before the shared fit
+def polyfit_kinematics(matches):
+    time_arr = [julian.to_jd(datetime.strptime(match['timestamp'], '%Y-%m-%d %H:%M:%S'), fmt='jd')
+                for match in matches]
+    time_arr = [time - time_arr[0] for time in time_arr]
+    slope, intercept = np.polyfit(time_arr, [match['radial'] for match in matches], 1)
+    velocity = slope * u.solRad.to(u.km) / u.day.to(u.s)
+
+    return velocity, julian.to_jd(datetime.strptime(matches[0]['timestamp'], '%Y-%m-%d %H:%M:%S'), fmt='jd') + \
+        (21.5 - intercept) / slope
+
+
+def test_shared_fit_matches_polyfit():
+    store = synthetic_store()
+    velocity, arrival = polyfit_kinematics(store.matches())
+    fit = swpc_kinematics.kinematics(store)
+
+    assert abs(fit['velocity'] - velocity) / abs(velocity) <= VELOCITY_TOLERANCE
+    assert abs(fit['arrival_jd'] - arrival) * 86400.0 <= ARRIVAL_TOLERANCE
+
+
+def test_store_fit_follows_removals():
+    store = synthetic_store()
+
+    for idx in range(0, 30, 3):
+        store.remove('frame-{}'.format(idx))
+
+    velocity, arrival = polyfit_kinematics(store.matches())
+
+    assert abs(swpc_kinematics.kinematics(store)['velocity'] - velocity) / abs(velocity) <= VELOCITY_TOLERANCE
+
+
+def test_uncertainty_brackets_the_fit():
+    fit = swpc_kinematics.kinematics(synthetic_store())
+    spread = swpc_kinematics.uncertainty(fit['days'], fit['radial'], fit['origin_jd'], 2000)
+    low, _, high = spread['velocity_percentiles']
+
+    assert low < fit['velocity'] < high
+
+
+# a line through a nan radial, or one too flat to reach ARRIVAL_RADIUS in any date, has no arrival
+@pytest.mark.parametrize('radial', [np.nan, 3.0])
+def test_fit_without_an_arrival(radial):
+    store = swpc_matches.MatchStore()
+    store.add('SOHO C3', '2019-05-01 12:00:00', 'frame-0', 3.0)
+    store.add('SOHO C3', '2019-05-01 12:12:00', 'frame-1', radial + 1e-12)
+
+    fit = swpc_kinematics.kinematics(store)
+
+    assert fit['arrival'] is None and fit['arrival_jd'] is None
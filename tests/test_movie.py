@@ -0,0 +1,95 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import struct
+
+import numpy as np
+import pytest
+import swpc_movie
+
+
+# frames of an APNG file: the frame count of its acTL chunk and the number of its fcTL chunks
+def apng_frames(path):
+    with open(path, 'rb') as png:
+        data = png.read()
+
+    declared, chunks, offset = None, 0, 8
+
+    while offset < len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+
+        if kind == b'acTL':
+            declared = struct.unpack('>I', data[offset + 8:offset + 12])[0]
+
+        chunks += kind == b'fcTL'
+        offset += 12 + length
+
+    return declared, chunks
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(swpc_movie, 'MOVIE_CACHE_DIR', str(tmpdir))
+    return str(tmpdir)
+
+
+def synthetic_movie(count):
+    random = np.random.RandomState(0)
+    stack = random.randint(0, 256, (count, 64, 64)).astype(np.uint8)
+    angles = np.linspace(0, 2 * np.pi, 30, endpoint=False)
+    hulls = [np.vstack([(100 + 2 * index) * np.cos(angles), 60 * np.sin(angles)]) for index in range(count)]
+
+    return stack, hulls, ['frame {}'.format(index) for index in range(count)]
+
+
+def test_render_frame_size():
+    swpc_movie._init_worker()
+    stack, hulls, titles = synthetic_movie(1)
+
+    rgb = swpc_movie.render_frame(stack[0], hulls[0], titles[0], 1, 0, 255)
+
+    assert rgb.shape == (swpc_movie.MOVIE_PIXELS, swpc_movie.MOVIE_PIXELS, 3) and rgb.dtype == np.uint8
+
+
+def test_apng_movie_holds_every_frame(cache_dir):
+    stack, hulls, titles = synthetic_movie(4)
+    key = swpc_movie.movie_key(titles, 0.5, 0, (10, 90, 0, 0), (1, 0, 255), 8, 'apng')
+
+    swpc_movie.encode_movie(lambda progress, message='': None, key, stack, hulls, titles, (1, 0, 255), 8, 'apng')
+    path = swpc_movie.cached_movie(key, 'apng')
+
+    assert path is not None
+    assert apng_frames(path) == (4, 4)
+
+
+def test_movie_key_follows_every_input():
+    values = (['a', 'b'], 0.5, 0, (10, 90, 0, 0), (1, 0, 255), 8, 'apng')
+    key = swpc_movie.movie_key(*values)
+
+    assert key == swpc_movie.movie_key(*values)
+
+    for index, other in enumerate([['a', 'c'], 1.0, 1, (11, 90, 0, 0), (2, 0, 255), 4, 'gif']):
+        assert swpc_movie.movie_key(*(values[:index] + (other,) + values[index + 1:])) != key
+
+
+# two renders of the same movie write partial files of their own, only the finished movie is left in the cache
+def test_renders_of_one_movie_do_not_share_a_partial_file(cache_dir, monkeypatch):
+    stack, hulls, titles = synthetic_movie(2)
+    key = swpc_movie.movie_key(titles, 0.5, 0, (10, 90, 0, 0), (1, 0, 255), 8, 'apng')
+    partials = []
+    encoder = swpc_movie._encoder
+
+    def recorded(path, fmt, fps, count):
+        partials.append(path)
+        return encoder(path, fmt, fps, count)
+
+    monkeypatch.setattr(swpc_movie, '_encoder', recorded)
+
+    for _ in range(2):
+        swpc_movie.encode_movie(lambda progress, message='': None, key, stack, hulls, titles, (1, 0, 255), 8, 'apng')
+
+    assert len(set(partials)) == 2 and all(os.path.dirname(path) == cache_dir for path in partials)
+    assert os.listdir(cache_dir) == [os.path.basename(swpc_movie.movie_path(key, 'apng'))]
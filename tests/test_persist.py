@@ -0,0 +1,100 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import time
+
+import pytest
+import swpc_matches
+import swpc_persist
+
+
+@pytest.fixture(autouse=True)
+def session_db(tmpdir, monkeypatch):
+    monkeypatch.setattr(swpc_persist, 'SESSION_DB', os.path.join(str(tmpdir), 'sessions.sqlite'))
+    monkeypatch.setattr(swpc_persist, '_local', type(swpc_persist._local)())
+    monkeypatch.setattr(swpc_persist, '_pending', dict())
+
+
+def document():
+    windows = dict((hidden_id, [('2019-05-01 00:{:02d}:00'.format(idx), '{}/{:05d}.fts'.format(hidden_id, idx))
+                                for idx in range(20)])
+                   for hidden_id in ('stereo-b-hidden', 'soho-c3-hidden', 'stereo-a-hidden'))
+    store = swpc_matches.MatchStore()
+
+    for timestamp, link in windows['soho-c3-hidden'][::5]:
+        store.add('SOHO C3', timestamp, link, 3.0 + len(store))
+
+    return {'controls': {'radial-slider.value': 9.5}, 'windows': windows, 'matches': store.to_json()}
+
+
+def test_document_reads_back():
+    saved = document()
+    swpc_persist.save('0' * 32, saved)
+    loaded = swpc_persist.load('0' * 32)
+
+    assert loaded['controls'] == saved['controls']
+    assert loaded['windows']['soho-c3-hidden'][3] == list(saved['windows']['soho-c3-hidden'][3])
+    assert swpc_matches.MatchStore.from_json(loaded['matches']).matches() == \
+        swpc_matches.MatchStore.from_json(saved['matches']).matches()
+
+
+def test_missing_expired_and_older_documents(monkeypatch):
+    assert swpc_persist.load('1' * 32) is None
+
+    version = swpc_persist.DOCUMENT_VERSION
+    swpc_persist.save('2' * 32, document())
+    swpc_persist.flush()
+    monkeypatch.setattr(swpc_persist, 'DOCUMENT_VERSION', version + 1)
+    assert swpc_persist.load('2' * 32) is None
+
+    monkeypatch.setattr(swpc_persist, 'DOCUMENT_VERSION', version)
+    assert swpc_persist.load('2' * 32) is not None
+    monkeypatch.setattr(time, 'time', lambda now=time.time(): now + swpc_persist.SESSION_TTL + 1)
+    assert swpc_persist.load('2' * 32) is None
+
+
+def stored_rows():
+    return swpc_persist._connection().execute('SELECT id, saved FROM sessions').fetchall()
+
+
+# saves within SAVE_DELAY are written once, with the last document, and read back before they are written
+def test_saves_are_gathered(monkeypatch):
+    monkeypatch.setattr(swpc_persist, 'SAVE_DELAY', 0.2)
+    saved = document()
+
+    for radial in (8.0, 9.0, 10.0):
+        swpc_persist.save('3' * 32, dict(saved, controls={'radial-slider.value': radial}))
+
+    assert stored_rows() == []
+    assert swpc_persist.load('3' * 32)['controls'] == {'radial-slider.value': 10.0}
+
+    for _ in range(50):
+        if not swpc_persist._pending:
+            break
+
+        time.sleep(0.05)
+
+    assert [row[0] for row in stored_rows()] == ['3' * 32]
+    assert swpc_persist.load('3' * 32)['controls'] == {'radial-slider.value': 10.0}
+
+
+# expired documents are swept at most every SWEEP_INTERVAL, not on every write
+def test_expired_documents_are_swept_occasionally(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(swpc_persist, '_last_sweep', now)
+    monkeypatch.setattr(time, 'time', lambda: now - swpc_persist.SESSION_TTL - 1)
+    swpc_persist.save('4' * 32, document())
+    swpc_persist.flush()
+
+    monkeypatch.setattr(time, 'time', lambda: now)
+    swpc_persist.save('5' * 32, document())
+    swpc_persist.flush()
+    assert sorted(row[0] for row in stored_rows()) == ['4' * 32, '5' * 32]
+
+    monkeypatch.setattr(time, 'time', lambda: now + swpc_persist.SWEEP_INTERVAL)
+    swpc_persist.save('6' * 32, document())
+    swpc_persist.flush()
+    assert sorted(row[0] for row in stored_rows()) == ['5' * 32, '6' * 32]
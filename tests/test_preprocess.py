@@ -0,0 +1,52 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import os
+import time
+
+import numpy as np
+import pytest
+import swpc_preprocess
+
+
+class Frame(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.meta = {'naxis': 2, 'naxis1': data.shape[1], 'naxis2': data.shape[0], 'ctype1': 'HPLN-TAN',
+                     'ctype2': 'HPLT-TAN', 'cunit1': 'arcsec', 'cunit2': 'arcsec', 'cdelt1': 1.0, 'cdelt2': 1.0,
+                     'crpix1': 4.5, 'crpix2': 4.5, 'crval1': 0.0, 'crval2': 0.0}
+
+
+# frame of a worker, frame 0 fails once the others are under way
+def synthetic_frame(index):
+    if index == 0:
+        time.sleep(0.2)
+        raise ValueError('frame {} failed'.format(index))
+
+    return Frame(np.full((8, 8), index, dtype=np.float32))
+
+
+@pytest.fixture
+def shared_dir(tmpdir, monkeypatch):
+    monkeypatch.setattr(swpc_preprocess, 'SHARED_DIR', str(tmpdir))
+    swpc_preprocess.configure(2)
+    yield str(tmpdir)
+    swpc_preprocess.configure(0)
+
+
+def test_frames_come_back_in_order(shared_dir):
+    frames = swpc_preprocess.map_frames(synthetic_frame, [(index,) for index in range(1, 6)])
+
+    assert [float(frame.data[0, 0]) for frame in frames] == [1, 2, 3, 4, 5]
+    assert os.listdir(shared_dir) == []
+
+
+# the frames that did finish release their shared files when another one fails
+def test_failed_frame_releases_the_others(shared_dir):
+    with pytest.raises(ValueError):
+        swpc_preprocess.map_frames(synthetic_frame, [(index,) for index in range(6)])
+
+    assert os.listdir(shared_dir) == []
@@ -0,0 +1,107 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import io
+import json
+import urllib.error
+
+import numpy as np
+import pytest
+import swpc_api
+import swpc_frames
+import swpc_utils
+
+OBSERVERS = [{'geometry': {'lon': lon, 'lat': 0.0, 'x_translate': 0.0, 'y_translate': 0.0, 'scale': 1.0}}
+             for lon in (-110.0, 0.0, 95.0)]
+
+
+@pytest.fixture(scope='module')
+def client():
+    import __SWPC_CAT__
+    return __SWPC_CAT__.server.test_client()
+
+
+def post(client, url, body):
+    return client.post(url, data=json.dumps(body), content_type='application/json')
+
+
+def test_silhouettes_json(client):
+    response = post(client, '/api/v1/silhouettes', {'parameters': [[10, 60, 0, 0], [12, 80, 20, -10]],
+                                                     'observers': OBSERVERS})
+    result = json.loads(response.data.decode())
+
+    assert response.status_code == 200
+    assert len(result['silhouettes']) == 2 and len(result['silhouettes'][0]) == 3
+
+
+def test_silhouettes_npz(client):
+    response = post(client, '/api/v1/silhouettes', {'parameters': [[10, 60, 0, 0]], 'observers': OBSERVERS,
+                                                     'format': 'npz'})
+
+    assert response.status_code == 200
+
+    with np.load(io.BytesIO(response.data)) as archive:
+        assert len(archive['offsets']) == 4
+
+
+def test_kinematics(client):
+    match_lists = [[{'instrument': 'SOHO C3', 'timestamp': '2019-05-01 {:02d}:{:02d}:00'.format(hour, minute),
+                     'radial': 3.0 + hour + minute / 60.0 + offset} for hour, minute in [(1, 0), (2, 12), (3, 36)]]
+                   for offset in np.linspace(0, 1, 5)]
+    response = post(client, '/api/v1/kinematics', {'match_lists': match_lists})
+
+    assert response.status_code == 200
+    assert len(json.loads(response.data.decode())['fits']) == 5
+
+
+def test_oversized_request(client):
+    response = post(client, '/api/v1/silhouettes', {'parameters': [[8, 90, 0, 0]] * 200000, 'observers': OBSERVERS})
+
+    assert response.status_code == 413
+    assert 'error' in json.loads(response.data.decode())
+
+
+# bad parameters, links off the frame hosts and frames that cannot be downloaded are answered with JSON errors
+@pytest.mark.parametrize('body, status', [
+    ({'parameters': [[0, 60, 0, 0]], 'observers': OBSERVERS}, 400),
+    ({'parameters': [[10, 0, 0, 0]], 'observers': OBSERVERS}, 400),
+    ({'parameters': [[10, 60, float('nan'), 0]], 'observers': OBSERVERS}, 400),
+    ({'parameters': [], 'observers': OBSERVERS, 'format': 'npz'}, 400),
+    ({'parameters': [[10, 60], [0, 0]], 'observers': OBSERVERS}, 400),
+    ({'parameters': [[10, 60, 0, 0]], 'observers': [{'instrument': 'SOHO C3', 'link': 'http://127.0.0.1:8050/',
+                                                     'previous': 'https://iswa.gsfc.nasa.gov/a.fts'}]}, 400),
+    ({'parameters': [[10, 60, 0, 0]], 'observers': [{'instrument': 'SOHO C3',
+                                                     'link': 'https://iswa.gsfc.nasa.gov@127.0.0.1/b.fts',
+                                                     'previous': 'https://iswa.gsfc.nasa.gov/a.fts'}]}, 400),
+    ({'parameters': [[10, 60, 0, 0]], 'observers': [{'instrument': 'SOHO C3',
+                                                     'link': 'https://iswa.gsfc.nasa.gov/b.fts',
+                                                     'previous': 'https://iswa.gsfc.nasa.gov/a.fts'}]}, 502)])
+def test_silhouette_errors(client, monkeypatch, body, status):
+    def unreachable(url):
+        raise urllib.error.URLError('unreachable')
+
+    monkeypatch.setattr(swpc_utils, 'fetch_frame', unreachable)
+    monkeypatch.setattr(swpc_frames, 'normalised_frame', lambda link, level: None)
+    response = post(client, '/api/v1/silhouettes', body)
+
+    assert response.status_code == status
+    assert 'error' in json.loads(response.data.decode())
+
+
+def test_kinematics_of_a_nan_radial(client):
+    matches = [{'timestamp': '2019-05-01 01:00:00', 'radial': 3.0}, {'timestamp': '2019-05-01 02:00:00',
+                                                                      'radial': float('nan')}]
+    response = post(client, '/api/v1/kinematics', {'match_lists': [matches]})
+
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.data.decode())
+
+
+def test_unexpected_error_is_answered_in_json(client, monkeypatch):
+    monkeypatch.setattr(swpc_api.Lemniscate, 'silhouettes', lambda self, geometries: 1 / 0)
+    response = post(client, '/api/v1/silhouettes', {'parameters': [[10, 60, 0, 0]], 'observers': OBSERVERS})
+
+    assert response.status_code == 500
+    assert json.loads(response.data.decode()) == {'error': 'internal error'}
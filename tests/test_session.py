@@ -0,0 +1,97 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import json
+import time
+
+import dash
+import numpy as np
+import pytest
+import swpc_api
+import swpc_jobs
+import swpc_session
+
+
+def test_render_tokens():
+    session_id = swpc_session.new_session_id()
+    first = swpc_session.begin_render(session_id, 'panel')
+    second = swpc_session.begin_render(session_id, 'panel')
+
+    with pytest.raises(swpc_session.RenderCancelled):
+        swpc_session.check_render(session_id, 'panel', first, 'fetch')
+
+    # the overtaken render does not forget the newer one
+    swpc_session.forget_render(session_id, 'panel', first)
+    swpc_session.check_render(session_id, 'panel', second, 'fetch')
+
+    swpc_session.end_render(session_id, 'panel', second)
+    assert (session_id, 'panel') not in swpc_session._latest_render
+
+
+# a render whose pipeline raises leaves no token behind
+def test_failed_render_forgets_its_token(monkeypatch):
+    import __SWPC_CAT__
+
+    def unreachable(*args, **kwargs):
+        raise OSError('frame not reachable')
+
+    monkeypatch.setattr(swpc_api.DifferenceImage, 'from_links', unreachable)
+    session_id = swpc_session.new_session_id()
+    rows = json.dumps([['2019-05-01 00:00:00', 'https://example.org/a.fts'],
+                       ['2019-05-01 00:12:00', 'https://example.org/b.fts']])
+    panel_values = []
+
+    for panel in __SWPC_CAT__.PANELS:
+        panel_values += [0, 255, 1, 1, 'running', rows, 1, None]
+
+    with __SWPC_CAT__.server.test_request_context():
+        with pytest.raises(OSError):
+            __SWPC_CAT__.lemniscate_update.__wrapped__(10, 60, 0, 0, *(panel_values + [None, session_id]))
+
+    assert not [key for key in swpc_session._latest_render if key[0] == session_id]
+
+
+# a catalogue job finishing after the session store dropped its session is reported, not delivered empty
+def test_poll_of_an_expired_session():
+    import __SWPC_CAT__
+
+    session_id = swpc_session.new_session_id()
+    job_id = swpc_jobs.submit(session_id, ('soho-c3-hidden',), lambda report: None)
+
+    while not swpc_jobs.all_finished([job_id]):
+        time.sleep(0.01)
+
+    outputs = __SWPC_CAT__.load_images_poll.__wrapped__(1, json.dumps({'soho-c3-hidden': job_id}), session_id)
+
+    assert outputs[:len(__SWPC_CAT__.CATALOGUE_HIDDEN)] == [dash.no_update] * 3
+    assert outputs[-2:] == ['Session expired, reload the page', True]
+
+
+def synthetic_stack(frames):
+    return {'frames': np.zeros((frames, 16, 16), np.uint8), 'raw': None, 'sat': 1}
+
+
+# stacks are dropped oldest first, over every session, once they exceed the byte budget
+def test_stack_store_is_capped_in_bytes(monkeypatch):
+    monkeypatch.setattr(swpc_session, 'STACK_STORE_BYTES', 3 * 16 * 16 * 10)
+    sessions = [swpc_session.new_session_id() for _ in range(3)]
+
+    for session_id in sessions:
+        swpc_session.publish_stack(session_id, 'soho-c3-hidden', synthetic_stack(10))
+
+    swpc_session.publish_stack(sessions[0], 'stereo-a-hidden', synthetic_stack(10))
+
+    assert swpc_session.published(sessions[0], 'stacks', 'soho-c3-hidden') is None
+    assert all(swpc_session.published(session_id, 'stacks', 'soho-c3-hidden') is not None
+               for session_id in sessions[1:])
+    assert swpc_session.published(sessions[0], 'stacks', 'stereo-a-hidden') is not None
+
+    # a stack larger than the budget is still kept, alone
+    swpc_session.publish_stack(sessions[1], 'stereo-b-hidden', synthetic_stack(40))
+
+    assert [swpc_session.published(session_id, 'stacks', hidden_id) is not None
+            for session_id, hidden_id in [(sessions[1], 'soho-c3-hidden'), (sessions[2], 'soho-c3-hidden'),
+                                          (sessions[0], 'stereo-a-hidden'), (sessions[1], 'stereo-b-hidden')]] == \
+        [False, False, False, True]
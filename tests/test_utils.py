@@ -0,0 +1,172 @@
+#
+# Copyright © 2018 United States Government as represented by the Administrator of the 
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+
+import tracemalloc
+
+import astropy.units as u
+import numpy as np
+import pytest
+import sunpy.map
+import swpc_utils
+from swpc_bench import normalised_pair, render_steps
+
+# largest difference (in display units, 0-255) allowed between the float32 and the float64 image pipeline
+DTYPE_TOLERANCE = 1e-2
+
+# largest distance (target pixels) allowed between a feature of the one pass warp and of rotate then resample
+WARP_PIXEL_TOLERANCE = 0.02
+
+# largest distance (target pixels) allowed between a blob of the warp and where its world coordinate falls,
+# half a pixel as the centroid window is cut at whole pixels
+WORLD_PIXEL_TOLERANCE = 0.5
+
+# largest difference allowed between the two warps, relative to the peak, they interpolate at different orders
+WARP_VALUE_TOLERANCE = 0.02
+
+# (y, x, sigma, amplitude) of the gaussian blobs of the synthetic coronagraph frame
+BLOBS = [(60, 80, 6, 1000.0), (130, 50, 9, 700.0), (110, 150, 5, 1500.0)]
+
+
+def frames(size=128):
+    random = np.random.RandomState(0)
+    return [random.gamma(2.0, 400.0, (size, size)) for _ in range(2)]
+
+
+@pytest.mark.parametrize('mode', ['running', 'base', 'ratio'])
+def test_float32_pipeline_matches_float64(mode):
+    current, previous = frames()
+    reference = render_steps(*normalised_pair(current, previous, np.float64), mode=mode, panel='test').copy()
+    image = render_steps(*normalised_pair(current, previous, np.float32), mode=mode, panel='test')
+
+    assert image.dtype == np.float32
+    assert np.max(np.abs(image - reference)) <= DTYPE_TOLERANCE
+
+
+# the difference the render keeps is its only frame sized allocation, the display goes into the panel buffer
+def test_warm_render_allocates_one_frame():
+    current, previous = normalised_pair(*frames(256), dtype=np.float32)
+
+    for _ in range(2):
+        render_steps(current, previous, 'running', 'test-warm')
+
+    tracemalloc.start()
+    render_steps(current, previous, 'running', 'test-warm')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert peak <= 1.5 * current.nbytes
+
+
+def test_rotation_matrices_match_rotation_matrix():
+    random = np.random.RandomState(0)
+    lons, lats = random.uniform(-180, 180, 100), random.uniform(-90, 90, 100)
+    single = np.array([swpc_utils.rotation_matrix(lon, lat) for lon, lat in zip(lons, lats)])
+
+    np.testing.assert_allclose(swpc_utils.rotation_matrices(lons, lats), single, rtol=0, atol=1e-12)
+
+
+# a 200 x 200 frame of gaussian blobs, rolled by roll degrees, its reference pixel off the center
+def blob_map(roll):
+    y, x = np.mgrid[:200, :200]
+    data = sum(amplitude * np.exp(-((x - bx) ** 2 + (y - by) ** 2) / (2.0 * sigma ** 2))
+               for by, bx, sigma, amplitude in BLOBS)
+    meta = {'naxis': 2, 'naxis1': 200, 'naxis2': 200, 'ctype1': 'HPLN-TAN', 'ctype2': 'HPLT-TAN',
+            'cunit1': 'arcsec', 'cunit2': 'arcsec', 'cdelt1': 56.0, 'cdelt2': 56.0, 'crpix1': 92.3, 'crpix2': 108.7,
+            'crval1': 0.0, 'crval2': 0.0, 'crota2': roll, 'date-obs': '2019-05-01T00:00:00',
+            'hgln_obs': 0.0, 'hglt_obs': -4.0, 'dsun_obs': 1.5e11, 'rsun_ref': 695700000.0}
+
+    return sunpy.map.GenericMap(data, meta)
+
+
+# intensity weighted (y, x) center of the blob around a pixel
+def blob_center(data, y, x, radius=6):
+    y, x = int(round(y)), int(round(x))
+    window = np.nan_to_num(data[y - radius:y + radius + 1, x - radius:x + radius + 1])
+    rows, columns = np.indices(window.shape)
+
+    return np.array([(window * rows).sum(), (window * columns).sum()]) / window.sum() + [y - radius, x - radius]
+
+
+# the one pass warp matches rotate then resample: the blobs land on the same target pixels and world
+# coordinates, and the header is the same
+@pytest.mark.parametrize('roll', [0.0, 30.0, -105.0])
+@pytest.mark.parametrize('shape', [(100, 100), (80, 80)])
+def test_warp_frame_matches_rotate_then_resample(roll, shape):
+    frame = blob_map(roll)
+    warped = swpc_utils.warp_frame(frame, shape)
+    reference = frame.rotate(order=3, recenter=True).resample(shape * u.pix, 'linear')
+
+    assert warped.data.shape == shape
+
+    for key in ['cdelt1', 'cdelt2', 'crpix1', 'crpix2', 'pc1_1', 'pc1_2', 'pc2_1', 'pc2_2']:
+        assert warped.meta[key] == pytest.approx(reference.meta[key])
+
+    for by, bx, _, _ in BLOBS:
+        world = frame.pixel_to_world(bx * u.pix, by * u.pix)
+        x, y = (float(value / u.pix) for value in warped.world_to_pixel(world))
+
+        assert blob_center(warped.data, y, x) == pytest.approx([y, x], abs=WORLD_PIXEL_TOLERANCE)
+        assert blob_center(warped.data, y, x) == pytest.approx(blob_center(reference.data, y, x),
+                                                                abs=WARP_PIXEL_TOLERANCE)
+
+    assert np.nanmax(np.abs(warped.data - reference.data)) <= WARP_VALUE_TOLERANCE * np.nanmax(reference.data)
+
+
+# the full grid shows at the overview size, each halving of the span needs the next level, up to the largest
+@pytest.mark.parametrize('span, level', [(3200, 256), (1600, 256), (1599, 512), (800, 512), (799, 1024), (400, 1024),
+                                         (50, 1024), (0, 1024)])
+def test_pyramid_level_of_span(span, level):
+    assert swpc_utils.pyramid_level(span) == level
+
+
+# the span is relative to the half width of the grid it is measured on
+def test_pyramid_level_of_half_width():
+    assert swpc_utils.pyramid_level(200, half_width=100) == 256
+    assert swpc_utils.pyramid_level(100, half_width=100) == 512
+
+
+# a range inside the grid is covered with one pixel to spare on each side, in either order
+@pytest.mark.parametrize('value_range', [(-100.0, 250.0), (250.0, -100.0)])
+def test_grid_slice_inside(value_range):
+    grid = np.linspace(-800, 800, 256)
+    columns = swpc_utils._grid_slice(grid, value_range)
+
+    assert grid[columns.start] < -100.0 <= grid[columns.start + 1]
+    assert grid[columns.stop - 2] < 250.0 <= grid[columns.stop - 1]
+
+
+# ranges partly off the grid stop at its edges, ranges fully off it keep the nearest edge pixel
+@pytest.mark.parametrize('value_range, expected', [((-1000.0, -700.0), (0, 17)), ((700.0, 1000.0), (239, 256)),
+                                                   ((-2000.0, 2000.0), (0, 256)), ((-800.0, 800.0), (0, 256)),
+                                                   ((-2000.0, -1500.0), (0, 1)), ((1500.0, 2000.0), (255, 256))])
+def test_grid_slice_at_edges(value_range, expected):
+    columns = swpc_utils._grid_slice(np.linspace(-800, 800, 256), value_range)
+
+    assert (columns.start, columns.stop) == expected
+
+
+# byte scaled SECCHI frames hold zeros, the ratio shows no change there instead of saturating
+def test_ratio_ignores_non_positive_reference():
+    reference = np.full((4, 6), 2.0)
+    reference[0, 0] = 0
+    current = reference.copy()
+    current[0, 0] = 5
+    current[3, 3] = 3
+
+    out = swpc_utils.difference_frames(current, reference, 1.0, 'ratio')
+
+    assert np.isfinite(out).all()
+    assert out[0, 0] == out[1, 1]
+    assert out[3, 3] > out[1, 1]
+
+
+# the library computes from the parameters it is given, only the app rounds slider values to the slider steps
+def test_hulls_are_computed_from_the_given_parameters():
+    geometry = {'lon': -30.0, 'lat': 4.0, 'x_translate': 0.0, 'y_translate': 0.0, 'scale': 1.0}
+    quantised = swpc_utils.calc_plot_batch([geometry], 12.0, 70.0, 20.0, -10.0)[0]
+    off_step = swpc_utils.calc_plot_batch([geometry], 12.04, 70.0, 20.0, -10.0)[0]
+
+    assert np.abs(off_step).max() > np.abs(quantised).max()
+    np.testing.assert_allclose(swpc_utils.quantise_sliders(12.04, 70.4, 19.6, -10.2), (12.0, 70, 20, -10))